@@ -0,0 +1,116 @@
+"""
+Autocomplete latency of GameCatalog on a synthetic catalog of tens of thousands of
+titles, for prefix, word and misspelled queries, plus the cost of incremental
+catalog updates.
+
+Usage:
+    python benchmarks/bench_autocomplete.py --titles 50000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "one_v_one_bot", "bot")
+)
+
+from autocomplete import GameCatalog
+
+WORDS = (
+    "street fighter tekken mortal kombat guilty gear dragon ball forza gran turismo "
+    "need speed dirt racing legends arena champions ultimate world tour league pro "
+    "super battle royale heroes kings empire storm shadow galaxy rivals"
+).split()
+
+
+def make_catalog(titles, seed=7):
+    rng = random.Random(seed)
+    categories = {}
+    for i in range(titles):
+        title = " ".join(rng.choice(WORDS).title() for _ in range(rng.randint(1, 4)))
+        platforms = rng.choice([[], ["PC"], ["PS5"], ["PC", "PS5"]])
+        categories.setdefault(f"Category{i % 5}", []).append(
+            {"title": f"{title} {i}", "platforms": platforms}
+        )
+    return categories
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        p: samples[min(len(samples) - 1, int(len(samples) * p / 100))] * 1000
+        for p in (50, 95, 99)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    catalog_data = make_catalog(args.titles)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "games.json")
+        with open(path, "w") as catalog_file:
+            json.dump(catalog_data, catalog_file)
+
+        start = time.perf_counter()
+        catalog = GameCatalog(path)
+        print(f"load {args.titles} titles: {time.perf_counter() - start:.2f}s")
+        for category, titles in catalog_data.items():
+            for entry in rng.sample(titles, 200):
+                for _ in range(rng.randint(1, 20)):
+                    catalog.record_match(category, entry["title"])
+
+        kinds = {
+            "empty": lambda: "",
+            "1 char": lambda: rng.choice(WORDS)[0],
+            "title prefix": lambda: rng.choice(WORDS)[:4],
+            "word prefix": lambda: f"{rng.choice(WORDS)} {rng.choice(WORDS)[:3]}",
+            "typo": lambda: rng.choice(WORDS)[:-1] + "x",
+        }
+        for label, make_query in kinds.items():
+            samples = []
+            for _ in range(args.queries):
+                category = f"Category{rng.randrange(5)}"
+                platform = rng.choice(["PC", "PS5"])
+                query = make_query()
+                # Bypass the result cache to time the index itself
+                catalog._results.clear()
+                start = time.perf_counter()
+                catalog.search(category, platform, query)
+                samples.append(time.perf_counter() - start)
+            p = percentiles(samples)
+            print(
+                f"{label:>13}: p50 {p[50]:6.2f} ms, p95 {p[95]:6.2f} ms, "
+                f"p99 {p[99]:6.2f} ms"
+            )
+
+        catalog.search("Category0", "PC", "stre")
+        start = time.perf_counter()
+        catalog.search("Category0", "PC", "stre")
+        print(f"   cached hit: {(time.perf_counter() - start) * 1e6:.1f} us")
+
+        catalog_data["Category0"].append({"title": "Brand New Game", "platforms": []})
+        catalog_data["Category1"].pop()
+        with open(path, "w") as catalog_file:
+            json.dump(catalog_data, catalog_file)
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        start = time.perf_counter()
+        catalog.refresh()
+        print(
+            f"incremental refresh (file re-read + 2 changes): "
+            f"{time.perf_counter() - start:.2f}s, "
+            f"found: {catalog.search('Category0', 'PC', 'brand new')}"
+        )
+
+
+if __name__ == "__main__":
+    main()
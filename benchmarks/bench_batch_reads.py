@@ -0,0 +1,107 @@
+"""
+Round trips and wall time to render a 256-entrant tournament: one eth_call per view
+versus lib.get_tournament_state(), which batches the calls and pins them to one block.
+
+Usage:
+    python benchmarks/bench_batch_reads.py --entrants 256 --latency 0.02
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.rpc_stub import RPCStub, encode_words
+
+BOT_DIR = os.path.join(os.path.dirname(__file__), "..", "tournament_bot", "bot")
+
+
+def selector(contract, name, *args):
+    return getattr(contract.functions, name)(*args)._encode_transaction_data()[:10]
+
+
+def install_views(stub, contract, entrants):
+    def entrant(data):
+        index = int(data[-64:], 16)
+        if index >= entrants:
+            return None
+        return encode_words(hex(0x1000 + index))
+
+    stub.call_results.update(
+        {
+            selector(contract, "tournaments", 0): lambda data: encode_words(
+                entrants, 10**18, 10**18, 80, 10, True, True
+            ),
+            selector(contract, "currentTournamentRound", 0): lambda d: encode_words(1),
+            selector(contract, "matchingPool"): lambda d: encode_words(5 * 10**18),
+            selector(contract, "tournamentEntrants", 0, 0): entrant,
+            selector(
+                contract, "tournamentWinners", 0, "0x" + "00" * 20
+            ): lambda d: encode_words(0, False),
+        }
+    )
+
+
+def sequential(client, tournament_id):
+    tournament = client.call("tournaments", tournament_id)
+    client.call("currentTournamentRound", tournament_id)
+    client.call("matchingPool")
+    entrants = [
+        client.call("tournamentEntrants", tournament_id, i)
+        for i in range(tournament[0])
+    ]
+    for entrant in entrants:
+        client.call("tournamentWinners", tournament_id, entrant)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entrants", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--max-batch", type=int, default=None)
+    args = parser.parse_args()
+
+    stub = RPCStub(latency=args.latency, max_batch=args.max_batch).start()
+    os.environ["WEB3_PROVIDER"] = stub.url
+    os.environ["CONTRACT_ABI_PATH"] = os.path.join(BOT_DIR, "contractABI.json")
+    sys.path.insert(0, BOT_DIR)
+
+    import lib
+    from bot_common.contract_client import get_contract_client
+
+    client = get_contract_client()
+    install_views(stub, client.contract, args.entrants)
+    original_handle = stub.handle
+
+    def handle(payload):
+        # Entrant slots past the last entrant revert on chain
+        response = original_handle(payload)
+        if response.get("result", "") is None:
+            return {
+                "jsonrpc": "2.0",
+                "id": payload.get("id"),
+                "error": {"code": 3, "message": "execution reverted"},
+            }
+        return response
+
+    stub.handle = handle
+
+    for label, run in (
+        ("sequential", lambda: sequential(client, 0)),
+        ("batched", lambda: lib.get_tournament_state(0)),
+    ):
+        before = stub.requests
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label:>10}: {stub.requests - before:5d} round trips, {elapsed * 1000:8.1f} ms"
+        )
+    print(f"batch size settled at {client.batch_size}")
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
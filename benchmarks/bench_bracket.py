@@ -0,0 +1,73 @@
+"""
+Bracket engine cost at large entrant counts: building the bracket, reporting every
+result (including Swiss re-pairing at the end of each round) and restoring a
+finished tournament from the BracketStore log.
+
+Usage:
+    python benchmarks/bench_bracket.py --entrants 4096
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "tournament_bot", "bot")
+)
+
+from bracket import FORMATS, BracketStore
+
+HOST = 1
+
+
+def play(store, tournament_id, rng):
+    """Reports random winners until the bracket is done; returns per-result seconds."""
+    bracket = store.get(tournament_id).bracket
+    timings = []
+    while not bracket.finished:
+        for match, a, b in bracket.ready_matches():
+            started = time.perf_counter()
+            store.report(tournament_id, match, rng.choice((a, b)), HOST)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entrants", type=int, default=4096)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as scratch:
+        for tournament_id, bracket_format in enumerate(FORMATS, start=1):
+            path = os.path.join(scratch, f"{bracket_format}.log")
+            store = BracketStore(path).load()
+            store.create(tournament_id, bracket_format, args.entrants, host=HOST)
+            for entrant in range(args.entrants):
+                store.join(tournament_id, 10**17 + entrant)
+
+            started = time.perf_counter()
+            store.start_bracket(tournament_id)
+            build = time.perf_counter() - started
+            timings = play(store, tournament_id, rng)
+            champion = store.get(tournament_id).bracket.champion
+
+            started = time.perf_counter()
+            restored = BracketStore(path).load()
+            restore = time.perf_counter() - started
+            assert restored.get(tournament_id).bracket.champion == champion
+
+            timings.sort()
+            print(
+                f"{bracket_format:>18}: {args.entrants} entrants, build {build * 1000:6.2f} ms, "
+                f"{len(timings)} results p50 {timings[len(timings) // 2] * 1e6:6.1f} us "
+                f"max {timings[-1] * 1000:6.2f} ms, restore {restore * 1000:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
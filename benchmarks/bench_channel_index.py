@@ -0,0 +1,115 @@
+"""
+Resolving the channels of many matches: one matches query per match (what
+postMatchToDiscord does per message) versus the 1v1 bot's ChannelIndex, cold (misses
+loaded in batched queries) and warm (from memory), and through its /channels
+endpoint, against the local PostgREST stub.
+
+Usage:
+    python benchmarks/bench_channel_index.py --matches 10000 --lookups 500 --db-latency 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.postgrest_stub import PostgRESTStub
+
+BOT_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "one_v_one_bot", "bot")
+)
+PORT = 19180
+TOKEN = "bench"
+
+
+def fetch_json(url, token=TOKEN):
+    request = urllib.request.Request(url, headers={"Authorization": f"Bearer {token}"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+async def run(args, postgrest):
+    from channel_index import ChannelIndex
+    from bot_common.repository import Repository
+
+    repository = Repository(postgrest.url, "bench")
+    match_ids = [str(i * 7 % args.matches) for i in range(args.lookups)]
+
+    async def timed(label, coro):
+        requests = postgrest.requests
+        started = time.perf_counter()
+        channels = await coro
+        elapsed = time.perf_counter() - started
+        print(
+            f"{label:>22}: {args.lookups} lookups in {elapsed * 1000:9.1f} ms, "
+            f"{postgrest.requests - requests:4d} queries, "
+            f"{sum(1 for c in channels if c is not None)} found"
+        )
+        return channels
+
+    async def one_by_one():
+        return [await repository.get_match_channel_id(m) for m in match_ids]
+
+    expected = await timed("query per match", one_by_one())
+
+    index = ChannelIndex(repository.get_match_channel_ids)
+
+    async def batched():
+        found = await index.get_many(match_ids)
+        return [found.get(m) for m in match_ids]
+
+    cold = await timed("index, cold", batched())
+    warm = await timed("index, warm", batched())
+    assert [int(c) for c in expected] == cold == warm
+
+    index.start(port=PORT, token=TOKEN)
+    await asyncio.sleep(0.1)
+    url = f"http://127.0.0.1:{PORT}/channels?match_ids={','.join(match_ids)}"
+    try:
+        await asyncio.to_thread(fetch_json, url, "wrong")
+        raise AssertionError("request with a wrong token was served")
+    except urllib.error.HTTPError as e:
+        assert e.code == 401
+    started = time.perf_counter()
+    response = await asyncio.to_thread(fetch_json, url)
+    elapsed = time.perf_counter() - started
+    assert all(response["channels"][m] == str(c) for m, c in zip(match_ids, expected))
+    print(
+        f"{'index, HTTP /channels':>22}: {args.lookups} lookups in "
+        f"{elapsed * 1000:9.1f} ms, one request"
+    )
+
+    started = time.perf_counter()
+    for i in range(args.matches):
+        index.put(f"new{i}", 10**17 + i)
+    print(
+        f"{'index, put':>22}: {(time.perf_counter() - started) / args.matches * 1e6:.2f} us "
+        f"per match, {len(index)} held (size {index.size})"
+    )
+    await repository.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--matches", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--db-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    postgrest = PostgRESTStub(latency=args.db_latency).start()
+    postgrest.tables["matches"] = [
+        {"match_id": str(i), "channel_id": str(10**18 + i)} for i in range(args.matches)
+    ]
+    sys.path.insert(0, BOT_DIR)
+    asyncio.run(run(args, postgrest))
+    postgrest.stop()
+
+
+if __name__ == "__main__":
+    main()
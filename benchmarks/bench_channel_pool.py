@@ -0,0 +1,119 @@
+"""
+Discord API calls and latency on the command path with and without ChannelPool,
+against a fake guild whose create and edit calls sleep for configurable latencies.
+
+Usage:
+    python benchmarks/bench_channel_pool.py --commands 20 --create-latency 0.5
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bot_common.channel_pool import ChannelPool
+
+_ids = itertools.count(1)
+
+
+class FakeRole:
+    id = 0
+
+
+class FakeChannel:
+    def __init__(self, guild, name, category=None):
+        self.id = next(_ids)
+        self.guild = guild
+        self.name = name
+        self.category = category
+        self.text_channels = []
+
+    async def edit(self, name=None, overwrites=None, category=None, reason=None):
+        self.guild.calls["edit"] += 1
+        await asyncio.sleep(self.guild.edit_latency)
+        self.name = name or self.name
+        self.category = category
+
+    async def delete(self):
+        self.guild.calls["delete"] += 1
+        self.guild.channels.pop(self.id, None)
+
+
+class FakeGuild:
+    def __init__(self, create_latency, edit_latency):
+        self.id = next(_ids)
+        self.create_latency = create_latency
+        self.edit_latency = edit_latency
+        self.default_role = FakeRole()
+        self.me = FakeRole()
+        self.channels = {}
+        self.categories = []
+        self.calls = {"create": 0, "edit": 0, "delete": 0}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def create_category(self, name, overwrites=None):
+        category = FakeChannel(self, name)
+        self.channels[category.id] = category
+        self.categories.append(category)
+        return category
+
+    async def create_text_channel(
+        self, name, overwrites=None, category=None, reason=None
+    ):
+        self.calls["create"] += 1
+        await asyncio.sleep(self.create_latency)
+        channel = FakeChannel(self, name, category)
+        self.channels[channel.id] = channel
+        if category is not None:
+            category.text_channels.append(channel)
+        return channel
+
+
+async def run(label, guild, acquire, commands, spacing):
+    latencies = []
+    for i in range(commands):
+        start = time.perf_counter()
+        await acquire(guild, f"1v1-player{i}")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(spacing)
+    latencies.sort()
+    print(
+        f"{label:>9}: p50 {latencies[len(latencies) // 2] * 1000:6.1f} ms, "
+        f"max {latencies[-1] * 1000:6.1f} ms, total calls {guild.calls}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commands", type=int, default=20)
+    parser.add_argument("--create-latency", type=float, default=0.5)
+    parser.add_argument("--edit-latency", type=float, default=0.1)
+    parser.add_argument("--spacing", type=float, default=0.5)
+    args = parser.parse_args()
+
+    guild = FakeGuild(args.create_latency, args.edit_latency)
+
+    async def create(guild, name):
+        return await guild.create_text_channel(name)
+
+    await run("direct", guild, create, args.commands, args.spacing)
+
+    guild = FakeGuild(args.create_latency, args.edit_latency)
+    pool = ChannelPool(size=5, create_interval=0.1)
+    pool.start([guild])
+    # Let the pool fill before the first command, as it does between on_ready and
+    # the first command
+    await asyncio.sleep(5 * (args.create_latency + 0.1) + 0.2)
+    guild.calls = {"create": 0, "edit": 0, "delete": 0}
+    await run("pooled", guild, pool.acquire, args.commands, args.spacing)
+    print(f"{'':>9}  pool {pool.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,172 @@
+"""
+Both bots as two processes versus one combined runtime (combined_bot/main.py) hosting
+both command sets. Each setup drives the /1v1 + Accept and /create_tournament + Join
+flows at the same time against fake Discord objects and the local JSON-RPC and
+PostgREST stubs, and reports peak resident memory, TCP connections opened to the node
+and the databases, and command latency.
+
+Each bot has its own PostgREST stub, as each has its own Supabase project; the run
+fails if a bot's rows end up in the other bot's project.
+
+Discord gateway connections are one per process by construction: two versus one.
+
+Usage:
+    python benchmarks/bench_combined.py --commands 200 --concurrency 20 \
+        --rpc-latency 0.05 --db-latency 0.02 --discord-latency 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.bench_end_to_end import bench_1v1, bench_tournament, percentiles
+from benchmarks import bench_end_to_end
+from benchmarks.fake_discord import FakeDiscord
+from benchmarks.postgrest_stub import PostgRESTStub
+from benchmarks.rpc_stub import RPCStub
+from combined_bot.main import BOT_DIRS, load_bots
+
+BENCHES = {"one_v_one": bench_1v1, "tournament": bench_tournament}
+# User-facing stages; the instrumented internals double up on shared objects
+STAGES = ["/1v1", "accept", "/create_tournament", "join"]
+# Tables each bot writes to
+BOT_TABLES = {
+    "one_v_one": {"matches"},
+    "tournament": {"tournaments", "tournament_entrants", "tournament_channels"},
+}
+
+
+async def worker(names, args):
+    logging.getLogger().setLevel(logging.ERROR)
+    modules = load_bots({name: BOT_DIRS[name] for name in names})
+    from bot_common.services import warm_up
+
+    discord_api = FakeDiscord({"default": args.discord_latency})
+    guild = discord_api.guild()
+    for module in modules.values():
+        module.get_write_queue().start()
+        await asyncio.gather(module.view_router.load(), warm_up())
+        module.channel_pool.start([guild])
+    await asyncio.sleep(args.warm_up)
+
+    await asyncio.gather(
+        *(BENCHES[name](module, guild, args) for name, module in modules.items())
+    )
+    for module in modules.values():
+        await module.outbox.flush()
+        await module.get_write_queue().flush()
+    print(
+        json.dumps(
+            {
+                "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                "samples": {
+                    stage: bench_end_to_end.samples[stage]
+                    for stage in STAGES
+                    if stage in bench_end_to_end.samples
+                },
+            }
+        ),
+        flush=True,
+    )
+
+
+def run(setup, processes, args):
+    rpc = RPCStub(latency=args.rpc_latency).start()
+    postgrest = {
+        name: PostgRESTStub(latency=args.db_latency).start() for name in BOT_TABLES
+    }
+    env = dict(
+        os.environ,
+        WEB3_PROVIDER=rpc.url,
+        SUPABASE_URL=postgrest["one_v_one"].url,
+        SUPABASE_KEY="bench",
+        TOURNAMENT_SUPABASE_URL=postgrest["tournament"].url,
+        TOURNAMENT_SUPABASE_KEY="bench",
+        CONTRACT_ABI_PATH=os.path.join(BOT_DIRS["one_v_one"], "contractABI.json"),
+        GAME_CATALOG_PATH=os.path.join(BOT_DIRS["one_v_one"], "games.json"),
+        CHANNEL_POOL_SIZE=str(args.pool_size),
+        CHANNEL_POOL_CREATE_INTERVAL="0",
+        METRICS_PORT="0",
+    )
+    argv = [
+        "--commands",
+        str(args.commands),
+        "--concurrency",
+        str(args.concurrency),
+        "--entrants",
+        str(args.entrants),
+        "--discord-latency",
+        str(args.discord_latency),
+        "--warm-up",
+        str(args.warm_up),
+    ]
+    with tempfile.TemporaryDirectory() as scratch:
+        workers = []
+        for names in processes:
+            # Separate processes get separate working directories, as deployed
+            cwd = os.path.join(scratch, "-".join(names))
+            os.mkdir(cwd)
+            workers.append(
+                subprocess.Popen(
+                    [sys.executable, __file__, "--worker", ",".join(names), *argv],
+                    env=env,
+                    cwd=cwd,
+                    stdout=subprocess.PIPE,
+                    text=True,
+                )
+            )
+        results = [json.loads(w.communicate()[0].splitlines()[-1]) for w in workers]
+    rpc.stop()
+    for name, stub in postgrest.items():
+        stub.stop()
+        written = {table for table, rows in stub.tables.items() if rows}
+        assert written <= BOT_TABLES[name], f"{name} project got {written}"
+
+    samples = {}
+    for result in results:
+        for stage, values in result["samples"].items():
+            samples.setdefault(stage, []).extend(values)
+    print(
+        f"{setup:>9}: {len(processes)} process(es), "
+        f"peak RSS {sum(r['rss_kb'] for r in results) / 1024:6.1f} MiB, "
+        f"connections rpc {rpc.connections} / postgrest "
+        f"{sum(stub.connections for stub in postgrest.values())}"
+    )
+    for stage in STAGES:
+        p = percentiles(samples[stage])
+        print(
+            f"  {stage:>20}: p50 {p[50]:8.2f} ms  p95 {p[95]:8.2f} ms  "
+            f"p99 {p[99]:8.2f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--entrants", type=int, default=4)
+    parser.add_argument("--rpc-latency", type=float, default=0.0)
+    parser.add_argument("--db-latency", type=float, default=0.0)
+    parser.add_argument("--discord-latency", type=float, default=0.0)
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--warm-up", type=float, default=0.5)
+    parser.add_argument("--worker")
+    args = parser.parse_args()
+
+    if args.worker:
+        asyncio.run(worker(args.worker.split(","), args))
+        return
+    run("separate", [["one_v_one"], ["tournament"]], args)
+    run("combined", [["one_v_one", "tournament"]], args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Per-call cost of reading nextMatchId: the old build-everything-per-call path versus the
+shared, pooled ContractClient.
+
+Usage:
+    python benchmarks/bench_contract_client.py --calls 200 --latency 0
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.rpc_stub import RPCStub
+
+BOT_DIR = os.path.join(os.path.dirname(__file__), "..", "one_v_one_bot", "bot")
+
+
+def legacy_get_next_match_id(provider_url, abi_path, address):
+    from web3 import Web3
+
+    web3 = Web3(Web3.HTTPProvider(provider_url))
+    with open(abi_path, "r") as abi_file:
+        contract_abi = json.load(abi_file)
+    contract = web3.eth.contract(address=address, abi=contract_abi)
+    if web3.is_connected():
+        return int(contract.functions.nextMatchId().call())
+
+
+def measure(label, func, calls, stub):
+    func()  # warm up imports and the connection pool
+    before = stub.requests
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    elapsed = time.perf_counter() - start
+    rpcs = (stub.requests - before) / calls
+    print(
+        f"{label:>7}: {elapsed / calls * 1e6:9.1f} us/call, {rpcs:.1f} RPC requests/call"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = RPCStub(latency=args.latency).start()
+    abi_path = os.path.join(BOT_DIR, "contractABI.json")
+    os.environ["WEB3_PROVIDER"] = stub.url
+    os.environ["CONTRACT_ABI_PATH"] = abi_path
+    sys.path.insert(0, BOT_DIR)
+
+    from bot_common.contract_client import CONTRACT_ADDRESS, get_contract_client
+
+    measure(
+        "legacy",
+        lambda: legacy_get_next_match_id(stub.url, abi_path, CONTRACT_ADDRESS),
+        args.calls,
+        stub,
+    )
+    client = get_contract_client()
+    measure("pooled", lambda: client.call("nextMatchId"), args.calls, stub)
+    print(f"health: {client.health()}")
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
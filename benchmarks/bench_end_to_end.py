@@ -0,0 +1,248 @@
+"""
+End-to-end load test of the bots' command handlers. Drives the real /1v1 and Accept
+flows (1v1 bot) and /create_tournament and Join flows (tournament bot) against fake
+Discord objects, a local JSON-RPC node answering nextMatchId/nextTournamentId and a
+local PostgREST server, and reports throughput and p50/p95/p99 latency per stage.
+
+Each bot runs in its own process, since both ship modules with the same names.
+
+Usage:
+    python benchmarks/bench_end_to_end.py --bot all --commands 200 --concurrency 20 \
+        --rpc-latency 0.05 --db-latency 0.02 --discord-latency 0.1
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.fake_discord import FakeContext, FakeDiscord, FakeInteraction
+from benchmarks.postgrest_stub import PostgRESTStub
+from benchmarks.rpc_stub import RPCStub
+
+BOT_DIRS = {
+    "1v1": os.path.join(os.path.dirname(__file__), "..", "one_v_one_bot", "bot"),
+    "tournament": os.path.join(
+        os.path.dirname(__file__), "..", "tournament_bot", "bot"
+    ),
+}
+
+# stage -> [seconds]
+samples = defaultdict(list)
+failures = defaultdict(int)
+
+
+def percentiles(values):
+    values = sorted(values)
+    return {
+        p: values[min(len(values) - 1, int(len(values) * p / 100))] * 1000
+        for p in (50, 95, 99)
+    }
+
+
+def instrument(owner, name, stage):
+    """Replaces the coroutine function `owner.name` with one that records its latency."""
+    wrapped = getattr(owner, name)
+
+    async def timed(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await wrapped(*args, **kwargs)
+        finally:
+            samples[stage].append(time.perf_counter() - started)
+
+    setattr(owner, name, timed)
+
+
+async def flow(stage, coro):
+    started = time.perf_counter()
+    try:
+        result = await coro
+    except Exception as e:
+        failures[stage] += 1
+        logging.warning(f"{stage} failed: {e!r}")
+        return None
+    samples[stage].append(time.perf_counter() - started)
+    return result
+
+
+async def run_concurrently(count, concurrency, make):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(i):
+        async with semaphore:
+            return await make(i)
+
+    return await asyncio.gather(*(bounded(i) for i in range(count)))
+
+
+def last_custom_id(ctx):
+    message = ctx.followup.messages[-1] if ctx.followup.messages else None
+    if message is None or message.view is None:
+        return None
+    return message.view.children[0].custom_id
+
+
+async def bench_1v1(main, guild, args):
+    instrument(main.channel_pool, "acquire", "channel_acquire")
+    instrument(main.match_allocator, "reserve", "id_reserve")
+    instrument(main, "insert_match_data", "db_insert")
+    category = main.game_catalog.categories()[0]
+    game = main.game_catalog.search(category, "PC", "")[0]
+
+    async def challenge(i):
+        ctx = FakeContext(guild, guild.member(f"player{i}"))
+        await flow(
+            "/1v1", main.one_v_one.callback(ctx, "PC", category, game, 10 + i % 5)
+        )
+        return last_custom_id(ctx)
+
+    async def accept(i):
+        if custom_ids[i] is None:
+            return
+        interaction = FakeInteraction(guild, guild.member(f"rival{i}"), custom_ids[i])
+        await flow("accept", main.view_router.route(interaction))
+
+    started = time.perf_counter()
+    custom_ids = await run_concurrently(args.commands, args.concurrency, challenge)
+    throughput = {"/1v1": args.commands / (time.perf_counter() - started)}
+    started = time.perf_counter()
+    await run_concurrently(args.commands, args.concurrency, accept)
+    throughput["accept"] = args.commands / (time.perf_counter() - started)
+    return throughput
+
+
+async def bench_tournament(main, guild, args):
+    instrument(main.channel_pool, "acquire", "channel_acquire")
+    instrument(main.tournament_allocator, "reserve", "id_reserve")
+    await main.bracket_store.start()
+    main.join_pipeline.start()
+    instrument(main.join_pipeline, "handler", "join_setup")
+
+    async def create(i):
+        ctx = FakeContext(guild, guild.member(f"host{i}"))
+        await flow(
+            "/create_tournament",
+            main.create_tournament.callback(ctx, "PC", "FPS", "Valorant", 8),
+        )
+        return last_custom_id(ctx)
+
+    async def join(i):
+        custom_id = custom_ids[i % len(custom_ids)]
+        if custom_id is None:
+            return
+        interaction = FakeInteraction(guild, guild.member(f"entrant{i}"), custom_id)
+        await flow("join", main.view_router.route(interaction))
+
+    started = time.perf_counter()
+    custom_ids = await run_concurrently(args.commands, args.concurrency, create)
+    throughput = {"/create_tournament": args.commands / (time.perf_counter() - started)}
+    joins = args.commands * args.entrants
+    started = time.perf_counter()
+    await run_concurrently(joins, args.concurrency, join)
+    throughput["join"] = joins / (time.perf_counter() - started)
+    await main.join_pipeline.queue.join()
+    throughput["join_setup"] = joins / (time.perf_counter() - started)
+    return throughput
+
+
+async def run_bot(args, discord_api):
+    import main
+    from bot_common.services import warm_up
+
+    logging.getLogger().setLevel(logging.WARNING)
+    guild = discord_api.guild()
+    main.get_write_queue().start()
+    await asyncio.gather(main.view_router.load(), warm_up())
+    main.channel_pool.start([guild])
+    # Let the pool fill before measuring, as it would be some time after login
+    await asyncio.sleep(args.warm_up)
+
+    if args.bot == "1v1":
+        throughput = await bench_1v1(main, guild, args)
+    else:
+        throughput = await bench_tournament(main, guild, args)
+    await main.outbox.flush()
+    await main.get_write_queue().flush()
+    return throughput
+
+
+def report(args, throughput, discord_api, rpc, postgrest):
+    print(
+        f"{args.bot} bot: {args.commands} commands, concurrency {args.concurrency}, "
+        f"latency rpc {args.rpc_latency * 1000:.0f} ms / "
+        f"db {args.db_latency * 1000:.0f} ms / "
+        f"discord {args.discord_latency * 1000:.0f} ms"
+    )
+    for stage, values in samples.items():
+        p = percentiles(values)
+        rate = f"{throughput[stage]:8.1f}/s" if stage in throughput else " " * 10
+        print(
+            f"  {stage:>20}: {len(values):6d} ok {failures[stage]:4d} failed "
+            f"{rate}  p50 {p[50]:8.2f} ms  p95 {p[95]:8.2f} ms  p99 {p[99]:8.2f} ms"
+        )
+    print(
+        f"  requests: rpc {rpc.requests}, postgrest {postgrest.requests}, "
+        f"discord {dict(discord_api.calls)}"
+    )
+
+
+def run_in_process(args):
+    bot_dir = os.path.abspath(BOT_DIRS[args.bot])
+    rpc = RPCStub(latency=args.rpc_latency).start()
+    postgrest = PostgRESTStub(latency=args.db_latency).start()
+    os.environ.update(
+        {
+            "WEB3_PROVIDER": rpc.url,
+            "SUPABASE_URL": postgrest.url,
+            "SUPABASE_KEY": "bench",
+            "CONTRACT_ABI_PATH": os.path.join(bot_dir, "contractABI.json"),
+            "GAME_CATALOG_PATH": os.path.join(bot_dir, "games.json"),
+            "CHANNEL_POOL_SIZE": str(args.pool_size),
+            "CHANNEL_POOL_CREATE_INTERVAL": "0",
+        }
+    )
+    discord_api = FakeDiscord({"default": args.discord_latency})
+    # Allocator state, spool, snapshot and event store all go to a scratch directory
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        sys.path.insert(0, bot_dir)
+        throughput = asyncio.run(run_bot(args, discord_api))
+    report(args, throughput, discord_api, rpc, postgrest)
+    rpc.stop()
+    postgrest.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bot", choices=["1v1", "tournament", "all"], default="all")
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--entrants", type=int, default=4)
+    parser.add_argument("--rpc-latency", type=float, default=0.0)
+    parser.add_argument("--db-latency", type=float, default=0.0)
+    parser.add_argument("--discord-latency", type=float, default=0.0)
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--warm-up", type=float, default=0.5)
+    args = parser.parse_args()
+
+    if args.bot != "all":
+        run_in_process(args)
+        return
+    for bot in ("1v1", "tournament"):
+        argv = list(sys.argv[1:])
+        if "--bot" in argv:
+            index = argv.index("--bot")
+            del argv[index : index + 2]
+        subprocess.run([sys.executable, __file__, "--bot", bot, *argv], check=True)
+
+
+if __name__ == "__main__":
+    main()
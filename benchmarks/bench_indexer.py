@@ -0,0 +1,116 @@
+"""
+Indexer throughput on synthetic log batches: decode + SQLite store of MatchStarted,
+MatchJoined, MatchClosed and MatchDonation logs, without any network I/O.
+
+Usage:
+    python benchmarks/bench_indexer.py --matches 20000 --logs-per-block 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from eth_abi import encode
+from eth_utils import event_abi_to_log_topic
+from web3 import Web3
+
+BOT_DIR = os.path.join(os.path.dirname(__file__), "..", "one_v_one_bot", "bot")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bot_common.contract_client import CONTRACT_ADDRESS, load_contract_abi
+from bot_common.indexer import EventIndexer, EventStore
+
+
+def make_logs(abi, matches, logs_per_block):
+    events = {e["name"]: e for e in abi if e.get("type") == "event"}
+    player = "0x" + "11" * 20
+    logs = []
+
+    def add(name, values):
+        event = events[name]
+        topics = [event_abi_to_log_topic(event)]
+        data_types, data_values = [], []
+        for item, value in zip(event["inputs"], values):
+            if item["indexed"]:
+                topics.append(encode([item["type"]], [value]))
+            else:
+                data_types.append(item["type"])
+                data_values.append(value)
+        index = len(logs)
+        logs.append(
+            {
+                "address": CONTRACT_ADDRESS,
+                "topics": topics,
+                "data": encode(data_types, data_values),
+                "blockNumber": 1 + index // logs_per_block,
+                "blockHash": (1 + index // logs_per_block).to_bytes(32, "big"),
+                "transactionHash": index.to_bytes(32, "big"),
+                "transactionIndex": 0,
+                "logIndex": index % logs_per_block,
+                "removed": False,
+            }
+        )
+
+    for match_id in range(matches):
+        add("MatchStarted", [match_id, player, 10**18])
+        add("MatchJoined", [match_id, player])
+        add("MatchDonation", [match_id, player, 10**16])
+        add("MatchClosed", [match_id, player, 10**18, 10**16, 10**16])
+    return logs
+
+
+class FakeEth:
+    def __init__(self, logs):
+        self.logs = logs
+        self.block_number = logs[-1]["blockNumber"]
+
+    def get_block(self, number):
+        return {"hash": number.to_bytes(32, "big")}
+
+    def get_logs(self, params):
+        return [
+            log
+            for log in self.logs
+            if params["fromBlock"] <= log["blockNumber"] <= params["toBlock"]
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--matches", type=int, default=20000)
+    parser.add_argument("--logs-per-block", type=int, default=20)
+    args = parser.parse_args()
+
+    abi = load_contract_abi(os.path.join(BOT_DIR, "contractABI.json"))
+    contract = Web3().eth.contract(address=CONTRACT_ADDRESS, abi=abi)
+    logs = make_logs(abi, args.matches, args.logs_per_block)
+
+    web3 = type("FakeWeb3", (), {"eth": FakeEth(logs)})()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EventStore(os.path.join(tmp, "events.sqlite3"))
+        indexer = EventIndexer(web3, contract, store, confirmations=0, start_block=1)
+
+        start = time.perf_counter()
+        events = [indexer.decode(log) for log in logs]
+        decode_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.add_events(events, web3.eth.block_number, "0x")
+        store_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for match_id in range(0, args.matches, max(1, args.matches // 1000)):
+            store.get_match(match_id)
+        lookups = len(range(0, args.matches, max(1, args.matches // 1000)))
+        lookup_time = time.perf_counter() - start
+
+    print(f"logs: {len(logs)}")
+    print(f"decode: {len(logs) / decode_time:10.0f} logs/s")
+    print(f"store:  {len(logs) / store_time:10.0f} logs/s")
+    print(f"lookup: {lookup_time / lookups * 1e6:10.1f} us/match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Accuracy, latency and LLM fallback rate of IntentClassifier on the held-out labeled
+set in intent_eval.jsonl.
+
+The LLM is simulated by an oracle that answers with the true label after
+--llm-latency seconds, so the numbers show what the local stages save; pass
+--openai to call the real model instead (needs OPENAI_API_KEY).
+
+Usage:
+    python benchmarks/bench_intent_classifier.py --threshold 0.75
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bot_common.intent_classifier import IntentClassifier, load_labels, openai_classify
+
+EVAL_PATH = os.path.join(os.path.dirname(__file__), "intent_eval.jsonl")
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))] * 1000
+
+
+async def run(label, classifier, examples):
+    before = dict(classifier.stats)
+    correct = 0
+    latencies = []
+    for text, expected in examples:
+        start = time.perf_counter()
+        intent = await classifier.classify(text)
+        latencies.append(time.perf_counter() - start)
+        correct += intent == expected
+    stats = {
+        key: classifier.stats[key] - before.get(key, 0) for key in ("llm", "cache")
+    }
+    print(
+        f"{label:>16}: accuracy {correct / len(examples):6.1%}, "
+        f"p50 {percentile(latencies, 50):7.3f} ms, "
+        f"p99 {percentile(latencies, 99):8.3f} ms, "
+        f"llm fallback {stats['llm'] / len(examples):6.1%}, "
+        f"cache hits {stats['cache']}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threshold", type=float, default=0.75)
+    parser.add_argument("--llm-latency", type=float, default=0.4)
+    parser.add_argument("--openai", action="store_true")
+    args = parser.parse_args()
+
+    examples = load_labels(EVAL_PATH)
+    truth = dict(examples)
+
+    async def oracle(text):
+        await asyncio.sleep(args.llm_latency)
+        return truth[text]
+
+    llm = openai_classify if args.openai else oracle
+
+    def classifier(**kwargs):
+        kwargs.setdefault("llm", llm)
+        return IntentClassifier(label_log_path=None, **kwargs)
+
+    await run("llm only", classifier(threshold=1.01), examples)
+    await run("local only", classifier(threshold=0.0), examples)
+    pipeline = classifier(threshold=args.threshold)
+    await run("pipeline", pipeline, examples)
+    await run("pipeline, repeat", pipeline, examples)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""
+A sign-up burst on the tournament bot: `--joins` clicks on one Join button spread
+over `--burst` seconds, against fake Discord objects that enforce a channel-creation
+rate limit (429s wait for their slot, as in py-cord). Compares setting the channel up
+inside the click (the previous behaviour, unpaced) with the admission pipeline, which
+answers the click first and sets channels up from a paced queue.
+
+An interaction fails when it is not answered within Discord's 3 second deadline.
+
+Usage:
+    python benchmarks/bench_join_burst.py --joins 1000 --burst 10 --create-rate 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.fake_discord import FakeDiscord, FakeInteraction
+from benchmarks.postgrest_stub import PostgRESTStub
+
+BOT_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "tournament_bot", "bot")
+)
+INTERACTION_DEADLINE = 3.0
+
+
+class Unpaced:
+    async def acquire(self, route, key=None):
+        pass
+
+
+async def burst(main, args, tournament_id, inline):
+    discord_api = FakeDiscord(
+        latency={
+            "create_channel": args.create_latency,
+            "edit_channel": args.create_latency,
+            "default": args.api_latency,
+        },
+        rate_limits={
+            "create_channel": (args.create_rate, 1.0),
+            "edit_channel": (args.create_rate, 1.0),
+        },
+    )
+    guild = discord_api.guild()
+    main.bracket_store.create(tournament_id, "single_elimination", args.joins)
+    custom_id = f"{main.JOIN_TOURNAMENT_PREFIX}{tournament_id}"
+    main.view_router.remember(custom_id, {"tournament_id": tournament_id})
+    acks = []
+
+    async def click(i):
+        await asyncio.sleep(i * args.burst / args.joins)
+        interaction = FakeInteraction(guild, guild.member(f"entrant{i}"), custom_id)
+        started = time.perf_counter()
+        if inline:
+            # Previous behaviour: the click is answered once the channel is ready
+            user = interaction.user
+            main.bracket_store.join(tournament_id, user.id)
+            job = main.JoinJob(tournament_id, user, guild, interaction)
+            await main.process_join(job)
+        else:
+            await main.view_router.route(interaction)
+        acks.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(click(i) for i in range(args.joins)))
+    await main.join_pipeline.queue.join()
+    await main.outbox.flush()
+    elapsed = time.perf_counter() - started
+
+    acks.sort()
+    failed = sum(1 for ack in acks if ack > INTERACTION_DEADLINE)
+    channels = discord_api.calls["create_channel"] + discord_api.calls["edit_channel"]
+    print(
+        f"{'inline' if inline else 'pipeline':>8}: {args.joins} joins, "
+        f"ack p50 {acks[len(acks) // 2] * 1000:7.1f} ms "
+        f"p99 {acks[int(len(acks) * 0.99)] * 1000:8.1f} ms, "
+        f"{failed} failed interactions, {channels} channels ready after "
+        f"{elapsed:5.1f}s, {sum(discord_api.rate_limited.values())} rate-limited calls"
+    )
+
+
+async def run(args):
+    import main
+
+    logging.getLogger().setLevel(logging.ERROR)
+    await main.bracket_store.start()
+    await main.view_router.load()
+    main.get_write_queue().start()
+    main.join_pipeline.start()
+
+    paced = main.join_buckets
+    main.join_buckets = Unpaced()
+    await burst(main, args, 1, inline=True)
+    main.join_buckets = paced
+    await burst(main, args, 2, inline=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--joins", type=int, default=1000)
+    parser.add_argument("--burst", type=float, default=10.0)
+    parser.add_argument("--create-rate", type=int, default=20)
+    parser.add_argument("--create-latency", type=float, default=0.3)
+    parser.add_argument("--api-latency", type=float, default=0.1)
+    args = parser.parse_args()
+
+    postgrest = PostgRESTStub().start()
+    os.environ.update(
+        {
+            "SUPABASE_URL": postgrest.url,
+            "SUPABASE_KEY": "bench",
+            "CONTRACT_ABI_PATH": os.path.join(BOT_DIR, "contractABI.json"),
+            "JOIN_CHANNEL_RATE": str(args.create_rate),
+            "METRICS_PORT": "0",
+        }
+    )
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        sys.path.insert(0, BOT_DIR)
+        asyncio.run(run(args))
+    postgrest.stop()
+
+
+if __name__ == "__main__":
+    main()
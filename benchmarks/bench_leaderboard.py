@@ -0,0 +1,160 @@
+"""
+Leaderboard queries over a long match history: recomputing the rankings from every
+match row and event (what a query over the history does) versus the incremental
+Leaderboard, plus the cost of applying deltas, compacting the log, loading it back and
+catching up on events from the indexer's EventStore.
+
+Usage:
+    python benchmarks/bench_leaderboard.py --matches 100000 --players 5000 --queries 1000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bot_common.indexer import EventStore
+from bot_common.leaderboard import GAME, LEADERBOARD_EVENTS, PLAYER, Leaderboard
+
+GAMES = ["Fortnite", "Valorant", "FIFA 24", "Tekken 8", "Rocket League", "Apex"]
+
+
+def history(args, rng):
+    """Match rows and the MatchStarted/MatchJoined/MatchClosed events they produce."""
+    players = [f"0x{i:040x}" for i in range(args.players)]
+    rows, events = [], []
+    for match_id in range(args.matches):
+        block = match_id // 4
+        player1, player2 = rng.sample(players, 2)
+        amount = rng.choice((5, 10, 20, 50))
+        wei = amount * 10**15
+        rows.append(
+            {
+                "match_id": str(match_id),
+                "platform": rng.choice(("PS5", "PC")),
+                "category": "Games",
+                "game": rng.choice(GAMES),
+                "match_amount_usd": amount,
+            }
+        )
+        for offset, (name, event_args) in enumerate(
+            (
+                ("MatchStarted", {"player1": player1, "matchAmount": wei}),
+                ("MatchJoined", {"player2": player2}),
+                ("MatchClosed", {"winner": player1, "winnerAmount": 2 * wei}),
+            )
+        ):
+            event_args["matchId"] = match_id
+            events.append(
+                {
+                    "event": name,
+                    "args": event_args,
+                    "blockNumber": block,
+                    "logIndex": (match_id % 4) * 3 + offset,
+                    "blockHash": b"\x00" * 32,
+                    "transactionHash": match_id.to_bytes(32, "big"),
+                }
+            )
+    return rows, events
+
+
+def full_scan(rows, events):
+    """Top 10 earners and games by volume, recomputed from the whole history."""
+    winnings = Counter()
+    for event in events:
+        if event["event"] == "MatchClosed":
+            winnings[event["args"]["winner"]] += event["args"]["winnerAmount"]
+    volume = Counter()
+    for row in rows:
+        volume[row["game"]] += row["match_amount_usd"]
+    return winnings.most_common(10), volume.most_common(10)
+
+
+def timed(label, count, unit, function):
+    started = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:>28}: {elapsed * 1000:9.1f} ms ({elapsed / count * 1e6:8.2f} us/{unit})"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--matches", type=int, default=100000)
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rows, events = history(args, random.Random(args.seed))
+    print(f"{args.matches} matches, {len(events)} events, {args.players} players")
+
+    expected = timed(
+        "full scan, top 10",
+        1,
+        "query",
+        lambda: full_scan(rows, events),
+    )
+
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "leaderboard.log")
+        leaderboard = Leaderboard(path).load()
+        leaderboard._following = True
+
+        def apply_all():
+            for row in rows:
+                leaderboard.apply_match(row)
+            # One indexer batch per block
+            for i in range(0, len(events), 12):
+                leaderboard.apply_events(events[i : i + 12])
+
+        timed("apply deltas", len(rows) + len(events), "delta", apply_all)
+
+        def query():
+            for _ in range(args.queries):
+                result = (
+                    leaderboard.top(PLAYER, "winnings", 10),
+                    leaderboard.top(GAME, "volume_usd", 10),
+                )
+            return result
+
+        winnings, volume = timed("incremental, top 10", args.queries, "query", query)
+        assert [v for _, v in winnings] == [v for _, v in expected[0]]
+        assert dict(volume) == dict(expected[1])
+
+        print(
+            f"{'log size before compaction':>28}: {os.path.getsize(path) / 1024:9.1f} KiB"
+        )
+        timed("compact", 1, "run", leaderboard.compact)
+        print(
+            f"{'log size after compaction':>28}: {os.path.getsize(path) / 1024:9.1f} KiB"
+        )
+        loaded = timed("load", 1, "run", lambda: Leaderboard(path).load())
+        assert loaded.top(PLAYER, "winnings", 10) == winnings
+
+        # Catching up from the EventStore after a restart with an empty log
+        store = EventStore(os.path.join(scratch, "events.db"))
+        store.add_events(events, events[-1]["blockNumber"], "0x00")
+        missed = timed(
+            "events_since (catch-up)",
+            len(events),
+            "event",
+            lambda: store.events_since(-1, -1, LEADERBOARD_EVENTS),
+        )
+        fresh = Leaderboard(None).load()
+        fresh._following = True
+        timed(
+            "apply catch-up", len(missed), "event", lambda: fresh.apply_events(missed)
+        )
+        assert fresh.top(PLAYER, "winnings", 10) == winnings
+
+
+if __name__ == "__main__":
+    main()
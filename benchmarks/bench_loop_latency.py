@@ -0,0 +1,81 @@
+"""
+Measures Discord event-loop lag while many /1v1 commands read nextMatchId at once.
+
+A ticker coroutine wakes every millisecond and records how late it woke up. With the
+old blocking `get_next_match_id()` the ticker stalls for every RPC round trip; with
+`fetch_next_match_id()` it should stay flat regardless of concurrency.
+
+Usage:
+    python benchmarks/bench_loop_latency.py --concurrency 50 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.rpc_stub import RPCStub
+
+BOT_DIR = os.path.join(os.path.dirname(__file__), "..", "one_v_one_bot", "bot")
+
+
+async def ticker(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def run(concurrency, blocking):
+    import lib
+
+    lags = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+
+    async def command():
+        if blocking:
+            return lib.get_next_match_id()
+        return await lib.fetch_next_match_id()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(command() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    return elapsed, lags
+
+
+def report(label, elapsed, lags):
+    lags = sorted(lags) or [0.0]
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+    print(
+        f"{label:>9}: wall {elapsed * 1000:8.1f} ms | loop lag "
+        f"median {statistics.median(lags) * 1000:7.2f} ms, "
+        f"p99 {p99 * 1000:7.2f} ms, max {lags[-1] * 1000:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    stub = RPCStub(latency=args.latency).start()
+    os.environ["WEB3_PROVIDER"] = stub.url
+    os.environ["CONTRACT_ABI_PATH"] = os.path.join(BOT_DIR, "contractABI.json")
+    sys.path.insert(0, BOT_DIR)
+
+    for label, blocking in (("blocking", True), ("async", False)):
+        elapsed, lags = asyncio.run(run(args.concurrency, blocking))
+        report(label, elapsed, lags)
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Lookup latency of MatchmakingIndex with tens of thousands of open challenges,
+against a linear scan of the same rows (what a query without the index does).
+
+Usage:
+    python benchmarks/bench_matchmaking.py --open 50000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "one_v_one_bot", "bot")
+)
+
+from matchmaking import STAKE_TOLERANCE, MatchmakingIndex, OpenMatch
+
+PLATFORMS = ["PS5", "PC"]
+GAMES = {
+    category: [f"{category} Game {i}" for i in range(20)]
+    for category in ("Sports", "Fighting", "Racing", "Shooter", "Strategy")
+}
+STAKES = [5, 10, 20, 25, 50, 75, 100, 200, 500]
+
+
+def random_match(rng, match_id):
+    category = rng.choice(list(GAMES))
+    return OpenMatch(
+        match_id,
+        match_id,
+        f"player{rng.randrange(10000)}",
+        rng.choice(PLATFORMS),
+        category,
+        rng.choice(GAMES[category]),
+        rng.choice(STAKES),
+    )
+
+
+def scan(matches, platform, category, game, amount, k=5):
+    low, high = amount * (1 - STAKE_TOLERANCE), amount * (1 + STAKE_TOLERANCE)
+    found = [
+        match
+        for match in matches
+        if match.platform == platform
+        and match.category == category
+        and (game is None or match.game == game)
+        and low <= match.amount <= high
+    ]
+    found.sort(key=lambda match: (abs(match.amount - amount), match.created_at))
+    return found[:k]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return [
+        samples[min(len(samples) - 1, int(len(samples) * p / 100))] * 1e6
+        for p in (50, 99)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--open", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    matches = [random_match(rng, i) for i in range(args.open)]
+    index = MatchmakingIndex()
+    start = time.perf_counter()
+    for match in matches:
+        index.add(match)
+    add = (time.perf_counter() - start) / args.open * 1e6
+
+    queries = []
+    for _ in range(args.queries):
+        category = rng.choice(list(GAMES))
+        game = rng.choice(GAMES[category] + [None])
+        queries.append((rng.choice(PLATFORMS), category, game, rng.choice(STAKES)))
+
+    for label, find in (
+        ("index", lambda q: index.find(*q)),
+        ("linear scan", lambda q: scan(matches, *q)),
+    ):
+        samples = {"game": [], "any game": []}
+        for query in queries:
+            start = time.perf_counter()
+            find(query)
+            samples["game" if query[2] else "any game"].append(
+                time.perf_counter() - start
+            )
+        for kind, values in samples.items():
+            p50, p99 = percentiles(values)
+            print(f"{label:>11} ({kind:>8}): p50 {p50:8.1f} us, p99 {p99:8.1f} us")
+
+    for query in queries[:200]:
+        assert [m.match_id for m in index.find(*query)] == [
+            m.match_id for m in scan(matches, *query)
+        ]
+
+    start = time.perf_counter()
+    for match in matches[: args.open // 2]:
+        index.remove(match.match_id)
+    remove = (time.perf_counter() - start) / (args.open // 2) * 1e6
+    print(f"add {add:.2f} us, remove {remove:.2f} us per challenge")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Channel messages sent directly (every call site awaits channel.send) versus through
+the Outbox, against fake Discord channels that enforce Discord's per-channel message
+limit and a global limit (429s wait for their slot, as in py-cord).
+
+- hot channel: `--hot` messages to one channel while `--quiet` other channels each get
+  the two messages of a command answer, all at once. Reports sends, rate-limited
+  calls, when the quiet channels' messages arrive and when the hot channel is done.
+- priority: a burst of `--notices` notices to distinct channels, then `--responses`
+  command answers. Reports when the answers arrive.
+
+Usage:
+    python benchmarks/bench_outbox.py --hot 20 --quiet 50 --notices 200 --responses 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.fake_discord import FakeChannel, FakeDiscord
+from bot_common.outbound import NOTICE, RESPONSE, Outbox
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] * 1000
+
+
+async def deliver(outbox, channel, content, priority):
+    """Seconds until `content` is in `channel`, sent directly or through `outbox`."""
+    started = time.perf_counter()
+    if outbox is None:
+        await channel.send(content)
+    else:
+        await outbox.send(channel, content, priority)
+    return time.perf_counter() - started
+
+
+async def hot_channel(args, outbox):
+    discord_api = FakeDiscord(
+        {"default": args.api_latency},
+        rate_limits={"send_message": (args.global_rate, 1.0)},
+        channel_rate_limit=(5, 5.0),
+    )
+    guild = discord_api.guild()
+    hot = FakeChannel(guild, "hot")
+    quiet = [FakeChannel(guild, f"quiet{i}") for i in range(args.quiet)]
+    hot_deliveries = [
+        deliver(outbox, hot, f"notice {i}", NOTICE) for i in range(args.hot)
+    ]
+    quiet_deliveries = [
+        deliver(outbox, channel, f"{part} of the answer", RESPONSE)
+        for channel in quiet
+        for part in ("first part", "second part")
+    ]
+    started = time.perf_counter()
+    hot_times, quiet_times = await asyncio.gather(
+        asyncio.gather(*hot_deliveries), asyncio.gather(*quiet_deliveries)
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"{'direct' if outbox is None else 'outbox':>8}: "
+        f"{discord_api.calls['send_message']:4d} sends, "
+        f"{sum(discord_api.rate_limited.values()):3d} rate-limited, "
+        f"quiet channels p50 {percentile(quiet_times, 50):7.1f} ms "
+        f"p95 {percentile(quiet_times, 95):7.1f} ms, "
+        f"hot channel done after {max(hot_times):5.2f}s, all after {elapsed:5.2f}s"
+    )
+
+
+async def priority(args, outbox):
+    discord_api = FakeDiscord(
+        {"default": args.api_latency},
+        rate_limits={"send_message": (args.global_rate, 1.0)},
+        channel_rate_limit=(5, 5.0),
+    )
+    guild = discord_api.guild()
+    notices = [
+        deliver(outbox, FakeChannel(guild, f"notice{i}"), "notice", NOTICE)
+        for i in range(args.notices)
+    ]
+    notice_tasks = [asyncio.ensure_future(notice) for notice in notices]
+    # The answers come in just behind the burst
+    await asyncio.sleep(0.01)
+    responses = await asyncio.gather(
+        *(
+            deliver(outbox, FakeChannel(guild, f"answer{i}"), "answer", RESPONSE)
+            for i in range(args.responses)
+        )
+    )
+    notice_times = await asyncio.gather(*notice_tasks)
+    print(
+        f"{'direct' if outbox is None else 'outbox':>8}: "
+        f"answers p50 {percentile(responses, 50):7.1f} ms "
+        f"p95 {percentile(responses, 95):7.1f} ms, "
+        f"notices done after {max(notice_times):5.2f}s, "
+        f"{sum(discord_api.rate_limited.values())} rate-limited"
+    )
+
+
+async def run(args):
+    logging.getLogger().setLevel(logging.ERROR)
+    print(f"hot channel: {args.hot} notices in one channel, {args.quiet} answers")
+    await hot_channel(args, None)
+    await hot_channel(args, Outbox())
+    print(f"priority: {args.notices} notices, then {args.responses} answers")
+    await priority(args, None)
+    await priority(args, Outbox())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hot", type=int, default=20)
+    parser.add_argument("--quiet", type=int, default=50)
+    parser.add_argument("--notices", type=int, default=200)
+    parser.add_argument("--responses", type=int, default=20)
+    parser.add_argument("--global-rate", type=int, default=50)
+    parser.add_argument("--api-latency", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Restart cost of 50k open Accept buttons: replaying the ViewSnapshot against
+registering one persistent view per button with py-cord's bot.add_view, plus the
+per-click routing cost.
+
+Usage:
+    python benchmarks/bench_persistent_views.py --views 50000 --add-view-sample 5000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import discord
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bot_common.persistent_views import PersistentViewRouter, ViewSnapshot
+
+PREFIX = "accept_1v1:"
+
+
+def state(match_id):
+    return {
+        "challenge_creator_id": 10**17 + match_id,
+        "channel_id": 2 * 10**17 + match_id,
+        "transaction_data": {
+            "match_id": str(match_id),
+            "channel_id": str(2 * 10**17 + match_id),
+            "player1_name": f"player{match_id}",
+            "player2_name": None,
+            "match_amount_usd": 20,
+            "category": "Fighting",
+            "platform": "PC",
+            "game": "Tekken 8",
+        },
+    }
+
+
+class FakeButton:
+    clicks = 0
+
+    def __init__(self, key, state):
+        self.key = key
+
+    async def callback(self, interaction):
+        FakeButton.clicks += 1
+
+
+class FakeInteraction:
+    type = discord.InteractionType.component
+
+    def __init__(self, custom_id):
+        self.data = {"custom_id": custom_id}
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--views", type=int, default=50_000)
+    parser.add_argument("--add-view-sample", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "views.snapshot")
+        snapshot = ViewSnapshot(path).load()
+        for match_id in range(args.views):
+            snapshot.put(f"{PREFIX}{match_id}", state(match_id))
+        for match_id in range(0, args.views, 10):
+            snapshot.remove(f"{PREFIX}{match_id}")
+        size = os.path.getsize(path)
+
+        start = time.perf_counter()
+        restored = ViewSnapshot(path).load()
+        elapsed = time.perf_counter() - start
+        print(
+            f"snapshot: {len(restored)} live views restored in {elapsed:.2f}s "
+            f"({size / 1e6:.1f} MB log, {os.path.getsize(path) / 1e6:.1f} MB compacted)"
+        )
+
+        router = PersistentViewRouter(restored)
+        router.register(PREFIX, FakeButton)
+        await router.load()
+        interactions = [
+            FakeInteraction(f"{PREFIX}{match_id}")
+            for match_id in range(1, args.views, 10)
+        ]
+        start = time.perf_counter()
+        for interaction in interactions:
+            await router.route(interaction)
+        elapsed = time.perf_counter() - start
+        print(f"  route: {elapsed / len(interactions) * 1e6:.1f} us per click")
+
+    bot = discord.Bot()
+    start = time.perf_counter()
+    for match_id in range(args.add_view_sample):
+        view = discord.ui.View(timeout=None)
+        view.add_item(discord.ui.Button(custom_id=f"{PREFIX}{match_id}"))
+        bot.add_view(view)
+    elapsed = time.perf_counter() - start
+    print(
+        f"add_view: {args.add_view_sample} views in {elapsed:.2f}s "
+        "(each add_view rescans every view already registered)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
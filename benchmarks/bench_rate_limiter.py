@@ -0,0 +1,92 @@
+"""
+Memory footprint and checks per second of RateLimiter against the old APICounter
+dict-of-dicts layout, for millions of distinct user IDs.
+
+Usage:
+    python benchmarks/bench_rate_limiter.py --users 2000000
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bot_common.rate_limiter import SLIDING_WINDOW, TOKEN_BUCKET, RateLimiter
+
+
+class LegacyAPICounter:
+    """The pre-RateLimiter APICounter, kept here for comparison."""
+
+    def __init__(self, max_requests_per_day):
+        self.max_requests_per_day = int(max_requests_per_day)
+        self.requests = {}
+
+    def check_limit(self, user_id):
+        today = datetime.date.today()
+        if user_id not in self.requests:
+            self.requests[user_id] = {"date": today, "count": 0}
+        elif self.requests[user_id]["date"] != today:
+            self.requests[user_id]["date"] = today
+            self.requests[user_id]["count"] = 0
+        if self.requests[user_id]["count"] < self.max_requests_per_day:
+            self.requests[user_id]["count"] += 1
+            return True
+        return False
+
+
+def measure(label, make, users):
+    # Discord snowflakes are large ints
+    user_ids = range(10**17, 10**17 + users)
+
+    check = make()
+    start = time.perf_counter()
+    for user_id in user_ids:
+        check(user_id)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for user_id in user_ids:
+        check(user_id)
+    repeat = time.perf_counter() - start
+    del check
+
+    tracemalloc.start()
+    check = make()
+    for user_id in user_ids:
+        check(user_id)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:>15}: {current / users:6.1f} B/user, "
+        f"{users / first / 1e6:5.2f} M new-user checks/s, "
+        f"{users / repeat / 1e6:5.2f} M repeat checks/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    measure("legacy", lambda: LegacyAPICounter(5).check_limit, args.users)
+    for mode in (SLIDING_WINDOW, TOKEN_BUCKET):
+        measure(mode, lambda: RateLimiter(5, 86400, mode).check, args.users)
+
+    # Idle users are reclaimed as checks sweep past them
+    clock = [0.0]
+    limiter = RateLimiter(5, 60, clock=lambda: clock[0])
+    for user_id in range(args.users):
+        limiter.check(user_id)
+    clock[0] = 10_000.0
+    for user_id in range(args.users):
+        limiter.check(-1 - user_id % 1000)
+    print(
+        f"after idle sweep: {len(limiter)} tracked users, {limiter.evictions} evicted"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Interaction throughput of the 1v1 bot run as 1, 2, 4... shard workers, each a separate
+process driving /1v1 + Accept flows against fake Discord objects. The workers share
+the local JSON-RPC and PostgREST stubs and allocate match IDs from one
+SharedIdCounter, and the benchmark checks that no ID was handed out twice.
+
+Throughput can only scale up to the number of cores the machine has; the report
+shows the core count next to each result. On a single core the workers only share
+it, so the run shows the coordination overhead of sharding, not its speedup; the
+numbers say nothing about scaling until the run has at least as many cores as
+workers.
+
+Usage:
+    python benchmarks/bench_sharding.py --workers 1,2,4 --commands 2000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks.bench_end_to_end import last_custom_id, run_concurrently
+from benchmarks.fake_discord import FakeContext, FakeDiscord, FakeInteraction
+from benchmarks.postgrest_stub import PostgRESTStub
+from benchmarks.rpc_stub import RPCStub
+
+BOT_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "one_v_one_bot", "bot")
+)
+
+
+async def worker(commands, concurrency):
+    import logging
+
+    import main
+    from bot_common.services import warm_up
+
+    logging.getLogger().setLevel(logging.WARNING)
+    guild = FakeDiscord().guild()
+    main.get_write_queue().start()
+    await asyncio.gather(main.view_router.load(), warm_up())
+    main.channel_pool.start([guild])
+    category = main.game_catalog.categories()[0]
+    game = main.game_catalog.search(category, "PC", "")[0]
+
+    match_ids = []
+    reserve = main.match_allocator.reserve
+
+    async def recorded_reserve(*args, **kwargs):
+        match_id = await reserve(*args, **kwargs)
+        match_ids.append(match_id)
+        return match_id
+
+    main.match_allocator.reserve = recorded_reserve
+
+    async def command(i):
+        ctx = FakeContext(guild, guild.member(f"player{i}"))
+        await main.one_v_one.callback(ctx, "PC", category, game, 10)
+        custom_id = last_custom_id(ctx)
+        interaction = FakeInteraction(guild, guild.member(f"rival{i}"), custom_id)
+        await main.view_router.route(interaction)
+
+    # Everything is imported and connected: wait for the parent's go
+    print("ready", flush=True)
+    await asyncio.to_thread(sys.stdin.readline)
+    started = time.time()
+    await run_concurrently(commands, concurrency, command)
+    finished = time.time()
+    await main.outbox.flush()
+    await main.get_write_queue().flush()
+    print(
+        json.dumps({"started": started, "finished": finished, "match_ids": match_ids}),
+        flush=True,
+    )
+
+
+def run(workers, args, env):
+    sys.path.insert(0, BOT_DIR)
+    from bot_common.sharding import worker_env
+
+    shards = max(workers, args.shards)
+    with tempfile.TemporaryDirectory() as scratch:
+        processes = [
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    __file__,
+                    "--worker",
+                    "--commands",
+                    str(args.commands // workers),
+                    "--concurrency",
+                    str(args.concurrency),
+                ],
+                env=worker_env(index, workers, shards, env),
+                cwd=scratch,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for index in range(workers)
+        ]
+        for process in processes:
+            while process.stdout.readline().strip() != "ready":
+                pass
+        for process in processes:
+            process.stdin.write("go\n")
+            process.stdin.flush()
+        results = [json.loads(process.stdout.readline()) for process in processes]
+        for process in processes:
+            process.wait()
+
+    elapsed = max(r["finished"] for r in results) - min(r["started"] for r in results)
+    match_ids = [match_id for r in results for match_id in r["match_ids"]]
+    return len(match_ids) / elapsed, len(match_ids) - len(set(match_ids))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--worker", action="store_true")
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, BOT_DIR)
+        asyncio.run(worker(args.commands, args.concurrency))
+        return
+
+    rpc = RPCStub().start()
+    postgrest = PostgRESTStub().start()
+    env = dict(
+        os.environ,
+        WEB3_PROVIDER=rpc.url,
+        SUPABASE_URL=postgrest.url,
+        SUPABASE_KEY="bench",
+        CONTRACT_ABI_PATH=os.path.join(BOT_DIR, "contractABI.json"),
+        GAME_CATALOG_PATH=os.path.join(BOT_DIR, "games.json"),
+        CHANNEL_POOL_CREATE_INTERVAL="0",
+        WRITE_QUEUE_FLUSH_INTERVAL="0.01",
+        METRICS_PORT="0",
+    )
+    cores = os.cpu_count() or 1
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(",")]:
+        # Each run allocates from the same chain counter: start from empty tables
+        postgrest.tables.clear()
+        throughput, duplicates = run(workers, args, env)
+        baseline = baseline or throughput
+        print(
+            f"{workers} worker(s) on {cores} core(s): {throughput:8.1f} commands/s "
+            f"({throughput / baseline:.2f}x), {duplicates} duplicate match IDs"
+        )
+        if workers > cores:
+            print("  more workers than cores: this run cannot show scaling")
+    rpc.stop()
+    postgrest.stop()
+
+
+if __name__ == "__main__":
+    main()
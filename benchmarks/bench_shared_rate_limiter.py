@@ -0,0 +1,92 @@
+"""
+Per-check latency of SharedRateLimiter, and whether the limit still holds exactly when
+several processes hammer the same users through one SQLite database.
+
+Usage:
+    python benchmarks/bench_shared_rate_limiter.py --processes 4 --checks 20000
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bot_common.rate_limiter import SLIDING_WINDOW, TOKEN_BUCKET, SharedRateLimiter
+
+LIMIT = 5
+USERS = 1000
+
+
+def worker(path, mode, checks, start, results):
+    limiter = SharedRateLimiter(path, LIMIT, 86400, mode)
+    start.wait()
+    allowed = 0
+    began = time.perf_counter()
+    for i in range(checks):
+        allowed += limiter.check(10**17 + i % USERS)
+    results.put((allowed, time.perf_counter() - began))
+    limiter.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--checks", type=int, default=20_000)
+    args = parser.parse_args()
+
+    for mode in (SLIDING_WINDOW, TOKEN_BUCKET):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "rate_limits.sqlite3")
+
+            limiter = SharedRateLimiter(path, LIMIT, 86400, mode)
+            began = time.perf_counter()
+            for i in range(args.checks):
+                limiter.check(i)
+            elapsed = time.perf_counter() - began
+            limiter.close()
+            print(
+                f"{mode:>14}: {elapsed / args.checks * 1e6:6.1f} us/check "
+                "in a single process"
+            )
+
+            # Restarting the limiter keeps the counts: every one of these users is
+            # already over the limit
+            limiter = SharedRateLimiter(path, LIMIT, 86400, mode)
+            for _ in range(LIMIT):
+                limiter.check("restart")
+            limiter.close()
+            limiter = SharedRateLimiter(path, LIMIT, 86400, mode)
+            survived = not limiter.check("restart")
+            limiter.close()
+
+            start = multiprocessing.Event()
+            results = multiprocessing.Queue()
+            workers = [
+                multiprocessing.Process(
+                    target=worker,
+                    args=(path + ".shared", mode, args.checks, start, results),
+                )
+                for _ in range(args.processes)
+            ]
+            for process in workers:
+                process.start()
+            time.sleep(0.5)
+            start.set()
+            outcomes = [results.get() for _ in workers]
+            for process in workers:
+                process.join()
+            allowed = sum(allowed for allowed, _ in outcomes)
+            latency = max(elapsed for _, elapsed in outcomes) / args.checks * 1e6
+            print(
+                f"{'':>14}  {latency:6.1f} us/check with {args.processes} processes, "
+                f"{allowed} allowed (expected {LIMIT * USERS}), "
+                f"counts survive restart: {survived}"
+            )
+
+
+if __name__ == "__main__":
+    main()
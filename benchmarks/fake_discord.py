@@ -0,0 +1,215 @@
+"""
+Minimal stand-ins for the py-cord objects the command handlers touch: guilds, channels,
+members, application contexts and component interactions. Every call that would hit
+the Discord API sleeps for `latency` seconds (per call type) and is counted. Calls
+over an optional rate limit, per call type or per channel for messages, wait for their
+slot, as py-cord does after a 429, and are counted in `rate_limited`.
+
+Usage:
+    discord_api = FakeDiscord(latency={"create_channel": 0.5, "default": 0.1})
+    guild = discord_api.guild()
+    ctx = FakeContext(guild, guild.member("alice"))
+"""
+
+import asyncio
+import itertools
+from collections import Counter, deque
+
+import discord
+
+_ids = itertools.count(10**17)
+
+
+class FakeDiscord:
+    def __init__(self, latency=None, rate_limits=None, channel_rate_limit=None):
+        self.latency = dict(latency or {})
+        # call -> (requests, seconds)
+        self.rate_limits = dict(rate_limits or {})
+        # (requests, seconds) of send_message in each channel
+        self.channel_rate_limit = channel_rate_limit
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self._recent = {}
+
+    async def _throttle(self, call, limit, window):
+        recent = self._recent.setdefault(call, deque())
+        loop = asyncio.get_running_loop()
+        limited = False
+        while True:
+            now = loop.time()
+            while recent and recent[0] <= now - window:
+                recent.popleft()
+            if len(recent) < limit:
+                recent.append(now)
+                return
+            if not limited:
+                limited = True
+                self.rate_limited[call] += 1
+            await asyncio.sleep(recent[0] + window - now)
+
+    async def api(self, call, channel_id=None):
+        self.calls[call] += 1
+        if channel_id is not None and self.channel_rate_limit:
+            await self._throttle((call, channel_id), *self.channel_rate_limit)
+        if call in self.rate_limits:
+            await self._throttle(call, *self.rate_limits[call])
+        delay = self.latency.get(call, self.latency.get("default", 0.0))
+        if delay:
+            await asyncio.sleep(delay)
+
+    def guild(self):
+        return FakeGuild(self)
+
+
+class FakeRole:
+    def __init__(self, name):
+        self.id = next(_ids)
+        self.name = name
+
+
+class FakeMember:
+    def __init__(self, name):
+        self.id = next(_ids)
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{self.id}>"
+
+
+class FakeMessage:
+    def __init__(self, channel, content, view=None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+        self.view = view
+
+
+class FakeChannel:
+    def __init__(self, guild, name, category=None, overwrites=None):
+        self.id = next(_ids)
+        self.guild = guild
+        self.name = name
+        self.category = category
+        self.overwrites = overwrites or {}
+        self.text_channels = []
+        self.mention = f"<#{self.id}>"
+        self.messages = []
+
+    async def send(self, content=None, view=None, **kwargs):
+        await self.guild.discord.api("send_message", self.id)
+        message = FakeMessage(self, content, view)
+        self.messages.append(message)
+        return message
+
+    async def edit(self, name=None, overwrites=None, category=None, reason=None):
+        await self.guild.discord.api("edit_channel")
+        if name is not None:
+            self.name = name
+        if overwrites is not None:
+            self.overwrites = overwrites
+        self.category = category
+
+    async def delete(self, reason=None):
+        await self.guild.discord.api("delete_channel")
+        self.guild.channels.pop(self.id, None)
+
+
+class FakeGuild:
+    def __init__(self, discord_api):
+        self.discord = discord_api
+        self.id = next(_ids)
+        self.default_role = FakeRole("@everyone")
+        self.me = FakeMember("bot")
+        self.channels = {}
+        self.members = {}
+        self.categories = []
+
+    def member(self, name):
+        member = FakeMember(name)
+        self.members[member.id] = member
+        return member
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def create_category(self, name, overwrites=None):
+        await self.discord.api("create_channel")
+        category = FakeChannel(self, name, overwrites=overwrites)
+        self.channels[category.id] = category
+        self.categories.append(category)
+        return category
+
+    async def create_text_channel(
+        self, name, overwrites=None, category=None, reason=None
+    ):
+        await self.discord.api("create_channel")
+        channel = FakeChannel(self, name, category, overwrites)
+        self.channels[channel.id] = channel
+        if category is not None:
+            category.text_channels.append(channel)
+        return channel
+
+
+class FakeFollowup:
+    def __init__(self, channel):
+        self.channel = channel
+        self.messages = []
+
+    async def send(self, content=None, view=None, ephemeral=False, **kwargs):
+        await self.channel.guild.discord.api("followup")
+        message = FakeMessage(self.channel, content, view)
+        self.messages.append(message)
+        return message
+
+
+class FakeResponse:
+    def __init__(self, discord_api):
+        self.discord = discord_api
+        self.done = False
+
+    async def defer(self, ephemeral=False):
+        await self.discord.api("interaction_response")
+        self.done = True
+
+    async def send_message(self, content=None, view=None, ephemeral=False, **kwargs):
+        await self.discord.api("interaction_response")
+        self.done = True
+
+
+class FakeContext:
+    """ApplicationContext for a slash command invoked by `author` in `channel`."""
+
+    def __init__(self, guild, author, channel=None):
+        self.guild = guild
+        self.author = author
+        self.user = author
+        self.channel = channel or FakeChannel(guild, "general")
+        self.followup = FakeFollowup(self.channel)
+        self.deferred = False
+
+    async def defer(self, ephemeral=False):
+        await self.guild.discord.api("interaction_response")
+        self.deferred = True
+
+    async def respond(self, content=None, view=None, ephemeral=False, **kwargs):
+        if self.deferred:
+            return await self.followup.send(content, view=view, ephemeral=ephemeral)
+        await self.guild.discord.api("interaction_response")
+        self.deferred = True
+        return FakeMessage(self.channel, content, view)
+
+
+class FakeInteraction:
+    """Component interaction: `user` clicking the button with `custom_id`."""
+
+    type = discord.InteractionType.component
+
+    def __init__(self, guild, user, custom_id, channel=None):
+        self.guild = guild
+        self.user = user
+        self.data = {"custom_id": custom_id, "component_type": 2}
+        self.channel = channel or FakeChannel(guild, "general")
+        self.response = FakeResponse(guild.discord)
+        self.followup = FakeFollowup(self.channel)
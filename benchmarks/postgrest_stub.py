@@ -0,0 +1,184 @@
+"""
+Local stand-in for the Supabase PostgREST endpoint used by the bots.
+
+Keeps every table in memory and answers the requests postgrest-py sends for insert,
+upsert (on_conflict with merge-duplicates or ignore-duplicates), update and select with
+eq./in./is./gt. filters, order and limit, with an optional artificial delay per request. Inserts
+that repeat a table's unique key fail with 409 and SQLSTATE 23505, as in Postgres.
+
+Usage:
+    stub = PostgRESTStub(latency=0.02)
+    stub.start()
+    os.environ["SUPABASE_URL"] = stub.url
+"""
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# Unique keys of the bots' tables
+UNIQUE_KEYS = {
+    "matches": ["match_id"],
+    "tournaments": ["id"],
+    "tournament_entrants": ["tournament_id", "user_id"],
+    "tournament_channels": ["tournament_id", "channel_id"],
+}
+
+
+def _sort_key(value):
+    try:
+        return (0, float(value), "")
+    except (TypeError, ValueError):
+        return (1, 0.0, str(value))
+
+
+def _matches(row, filters):
+    for column, condition in filters:
+        operator, _, value = condition.partition(".")
+        if operator == "eq" and str(row.get(column)) != value:
+            return False
+        if operator == "in":
+            values = {v.strip('"') for v in value.strip("()").split(",")}
+            if str(row.get(column)) not in values:
+                return False
+        if operator == "is" and value == "null" and row.get(column) is not None:
+            return False
+        if operator == "gt" and _sort_key(row.get(column)) <= _sort_key(value):
+            return False
+    return True
+
+
+class PostgRESTStub:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.tables = {}
+        self.requests = 0
+        # TCP connections accepted: clients with a keep-alive pool reuse theirs
+        self.connections = 0
+        self._server = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _parse(self, path):
+        parts = urlsplit(path)
+        table = parts.path.rsplit("/", 1)[-1]
+        params = parse_qsl(parts.query)
+        options = {}
+        filters = []
+        for key, value in params:
+            if key in ("select", "limit", "on_conflict", "order", "columns"):
+                options[key] = value
+            else:
+                filters.append((key, value))
+        return table, options, filters
+
+    def handle(self, method, path, body, prefer):
+        table, options, filters = self._parse(path)
+        with self._lock:
+            self.requests += 1
+            rows = self.tables.setdefault(table, [])
+            if method == "GET":
+                found = [row for row in rows if _matches(row, filters)]
+                if "order" in options:
+                    column, _, direction = options["order"].partition(".")
+                    found.sort(
+                        key=lambda row: _sort_key(row.get(column)),
+                        reverse=direction.startswith("desc"),
+                    )
+                if "limit" in options:
+                    found = found[: int(options["limit"])]
+                if options.get("select", "*") != "*":
+                    columns = options["select"].split(",")
+                    found = [{c: row.get(c) for c in columns} for row in found]
+                return 200, found
+            if method == "PATCH":
+                found = [row for row in rows if _matches(row, filters)]
+                for row in found:
+                    row.update(body)
+                return 200, found
+            if method == "POST":
+                new_rows = body if isinstance(body, list) else [body]
+                keys = options.get("on_conflict", "").split(",")
+                if keys == [""]:
+                    keys = UNIQUE_KEYS.get(table)
+
+                def existing(new_row):
+                    if not keys:
+                        return None
+                    return next(
+                        (
+                            row
+                            for row in rows
+                            if all(str(row.get(k)) == str(new_row.get(k)) for k in keys)
+                        ),
+                        None,
+                    )
+
+                if "resolution" not in prefer and any(map(existing, new_rows)):
+                    # A plain insert is one statement: nothing is written
+                    return 409, {
+                        "code": "23505",
+                        "message": f"duplicate key value violates unique constraint on {table}",
+                        "details": None,
+                        "hint": None,
+                    }
+                written = []
+                for new_row in new_rows:
+                    row = existing(new_row)
+                    if row is None:
+                        rows.append(dict(new_row))
+                        written.append(rows[-1])
+                    elif "merge-duplicates" in prefer:
+                        row.update(new_row)
+                        written.append(row)
+                return 201, written
+        return 405, {"message": f"method {method} not supported"}
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with stub._lock:
+                    stub.connections += 1
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length)) if length else None
+                if stub.latency:
+                    time.sleep(stub.latency)
+                status, response = stub.handle(
+                    self.command, self.path, body, self.headers.get("Prefer", "")
+                )
+                data = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = _respond
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
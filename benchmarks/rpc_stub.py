@@ -0,0 +1,140 @@
+"""
+Local JSON-RPC stand-in for the Base Sepolia node used by the bots.
+
+Answers the handful of methods web3 needs to read contract views, with an optional
+artificial delay per request so benchmarks can model a slow remote node.
+
+Usage:
+    stub = RPCStub(latency=0.05)
+    stub.start()
+    os.environ["WEB3_PROVIDER"] = stub.url
+"""
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def encode_uint(value):
+    return "0x" + format(int(value), "064x")
+
+
+def encode_words(*values):
+    """ABI-encodes a tuple of static values (ints, bools and hex addresses)."""
+    words = []
+    for value in values:
+        if isinstance(value, str):
+            value = int(value, 16)
+        words.append(format(int(value), "064x"))
+    return "0x" + "".join(words)
+
+
+class RPCStub:
+    def __init__(
+        self,
+        latency=0.0,
+        next_id=1,
+        chain_id=84532,
+        block_number=1_000_000,
+        max_batch=None,
+    ):
+        self.latency = latency
+        self.max_batch = max_batch
+        self.next_id = next_id
+        self.chain_id = chain_id
+        self.block_number = block_number
+        self.requests = 0
+        # TCP connections accepted: clients with a keep-alive pool reuse theirs
+        self.connections = 0
+        # 4-byte selector (0x-prefixed) -> callable(calldata) returning the hex result
+        self.call_results = {}
+        self._server = None
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def handle(self, payload):
+        method = payload.get("method")
+        params = payload.get("params", [])
+        if method == "eth_chainId":
+            result = hex(self.chain_id)
+        elif method == "net_version":
+            result = str(self.chain_id)
+        elif method == "web3_clientVersion":
+            result = "rpc-stub/0.1"
+        elif method == "eth_blockNumber":
+            result = hex(self.block_number)
+        elif method == "eth_call":
+            data = params[0].get("data") or params[0].get("input") or "0x"
+            selector = data[:10]
+            if selector in self.call_results:
+                result = self.call_results[selector](data)
+            else:
+                result = encode_uint(self.next_id)
+        elif method == "eth_getLogs":
+            result = []
+        else:
+            return {
+                "jsonrpc": "2.0",
+                "id": payload.get("id"),
+                "error": {"code": -32601, "message": f"method {method} not found"},
+            }
+        return {"jsonrpc": "2.0", "id": payload.get("id"), "result": result}
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                payload = json.loads(body)
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if (
+                    isinstance(payload, list)
+                    and stub.max_batch
+                    and len(payload) > stub.max_batch
+                ):
+                    response = {
+                        "jsonrpc": "2.0",
+                        "id": None,
+                        "error": {"code": -32600, "message": "batch too large"},
+                    }
+                elif isinstance(payload, list):
+                    response = [stub.handle(item) for item in payload]
+                else:
+                    response = stub.handle(payload)
+                data = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
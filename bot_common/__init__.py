@@ -0,0 +1,6 @@
+"""
+The infrastructure both bots run on: Supabase and chain clients, the event indexer,
+write-behind queue, ID allocation, channel pool, persistent buttons, leaderboard,
+rate limiting and outbound message scheduling. `services` builds the process-wide
+instances. Each bot adds the repository root to sys.path before importing it.
+"""
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+from collections import deque
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_POOL_SIZE = int(os.getenv("CHANNEL_POOL_SIZE", "5"))
+CHANNEL_POOL_CATEGORY = os.getenv("CHANNEL_POOL_CATEGORY", "channel-pool")
+# Seconds between two background channel creations, to stay well inside Discord's
+# channel creation rate limit
+CHANNEL_POOL_CREATE_INTERVAL = float(os.getenv("CHANNEL_POOL_CREATE_INTERVAL", "2"))
+CHANNEL_POOL_PREFIX = "pool-"
+
+
+class ChannelPool:
+    """
+    ChannelPool keeps `size` hidden text channels pre-created in a category of each
+    guild, so commands get a channel with a single edit call instead of a
+    create_text_channel call, one of Discord's slowest and most tightly rate-limited
+    endpoints.
+
+    `acquire` renames a pooled channel, applies the overwrites and moves it out of the
+    pool category in one PATCH. A background task per guild tops the pool back up,
+    creating at most one channel every `create_interval` seconds. When the pool is empty
+    `acquire` falls back to creating the channel directly.
+
+    Discord allows two renames of a channel per ten minutes, and py-cord waits out
+    that bucket instead of failing. A pooled channel is therefore renamed exactly once,
+    when it is handed out: `release` deletes it rather than renaming it back, and the
+    pool is refilled with a fresh channel.
+
+    Pooled channels are only visible to the bot. Channels left in the pool category
+    are picked up again after a restart.
+
+    Args:
+        size (int): Channels kept ready per guild. 0 disables pooling.
+        category_name (str): Name of the category holding the pooled channels.
+        create_interval (float): Seconds between background channel creations.
+
+    Usage:
+        pool = ChannelPool()
+        channel = await pool.acquire(ctx.guild, "1v1-alice", overwrites)
+    """
+
+    def __init__(
+        self,
+        size=CHANNEL_POOL_SIZE,
+        category_name=CHANNEL_POOL_CATEGORY,
+        create_interval=CHANNEL_POOL_CREATE_INTERVAL,
+    ):
+        self.size = size
+        self.category_name = category_name
+        self.create_interval = create_interval
+
+        self.hits = 0
+        self.misses = 0
+        # guild id -> deque of pooled channel ids
+        self._channels = {}
+        self._categories = {}
+        self._wanted = {}
+        self._tasks = {}
+        self._counter = 0
+
+    def _hidden_overwrites(self, guild):
+        return {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            guild.me: discord.PermissionOverwrite(read_messages=True),
+        }
+
+    async def _category(self, guild):
+        category = guild.get_channel(self._categories.get(guild.id, 0))
+        if category is None:
+            category = discord.utils.get(guild.categories, name=self.category_name)
+        if category is None:
+            category = await guild.create_category(
+                self.category_name, overwrites=self._hidden_overwrites(guild)
+            )
+        self._categories[guild.id] = category.id
+        return category
+
+    async def _load(self, guild):
+        category = await self._category(guild)
+        channels = self._channels.setdefault(guild.id, deque())
+        known = set(channels)
+        for channel in category.text_channels:
+            if channel.name.startswith(CHANNEL_POOL_PREFIX) and channel.id not in known:
+                channels.append(channel.id)
+        logger.info(f"Channel pool for guild {guild.id}: {len(channels)} ready")
+
+    async def _create(self, guild):
+        category = await self._category(guild)
+        self._counter += 1
+        channel = await guild.create_text_channel(
+            f"{CHANNEL_POOL_PREFIX}{self._counter}",
+            category=category,
+            overwrites=self._hidden_overwrites(guild),
+            reason="Channel pool refill",
+        )
+        self._channels[guild.id].append(channel.id)
+
+    async def _refill(self, guild):
+        wanted = self._wanted[guild.id]
+        try:
+            await self._load(guild)
+        except discord.HTTPException as e:
+            logger.error(f"Failed to load channel pool for guild {guild.id}: {e}")
+        while True:
+            await wanted.wait()
+            wanted.clear()
+            while len(self._channels[guild.id]) < self.size:
+                try:
+                    await self._create(guild)
+                except discord.HTTPException as e:
+                    logger.error(f"Failed to refill channel pool for {guild.id}: {e}")
+                await asyncio.sleep(self.create_interval)
+
+    def ensure(self, guild):
+        """Starts the refill task for `guild` if it isn't running yet."""
+        if self.size <= 0:
+            return
+        if guild.id not in self._tasks:
+            self._channels.setdefault(guild.id, deque())
+            self._wanted[guild.id] = asyncio.Event()
+            self._wanted[guild.id].set()
+            self._tasks[guild.id] = asyncio.create_task(self._refill(guild))
+
+    def start(self, guilds):
+        for guild in guilds:
+            self.ensure(guild)
+
+    def _pop(self, guild):
+        channels = self._channels.get(guild.id)
+        while channels:
+            channel = guild.get_channel(channels.popleft())
+            if channel is not None:
+                return channel
+        return None
+
+    async def acquire(self, guild, name, overwrites=None, category=None):
+        """
+        Returns a text channel named `name` with `overwrites` (default: none, so it is
+        visible like a freshly created channel) under `category` (default: top level).
+        """
+        overwrites = overwrites or {}
+        self.ensure(guild)
+        channel = self._pop(guild)
+        if guild.id in self._wanted:
+            self._wanted[guild.id].set()
+        while channel is not None:
+            try:
+                await channel.edit(
+                    name=name,
+                    overwrites=overwrites,
+                    category=category,
+                    reason="Channel pool handout",
+                )
+                self.hits += 1
+                return channel
+            except discord.NotFound:
+                channel = self._pop(guild)
+            except discord.HTTPException as e:
+                logger.error(f"Failed to hand out pooled channel {channel.id}: {e}")
+                break
+
+        self.misses += 1
+        return await guild.create_text_channel(
+            name, overwrites=overwrites, category=category
+        )
+
+    async def release(self, channel):
+        """
+        Deletes a channel handed out by `acquire` that ended up unused and tops the
+        pool back up. It is not renamed back into the pool: that would be its second
+        rename, and a third one on its next handout would wait for Discord's
+        ten-minute rename window.
+        """
+        guild = channel.guild
+        try:
+            await channel.delete(reason="Channel pool release")
+        except discord.NotFound:
+            pass
+        if guild.id in self._wanted:
+            self._wanted[guild.id].set()
+
+    def stats(self):
+        return {
+            "ready": sum(len(channels) for channels in self._channels.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
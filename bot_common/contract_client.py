@@ -0,0 +1,303 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import requests
+from eth_abi import decode as abi_decode, encode as abi_encode
+from eth_abi.exceptions import DecodingError
+from eth_utils import function_abi_to_4byte_selector
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+
+from .view_cache import ViewCache
+
+logger = logging.getLogger(__name__)
+
+WEB3_PROVIDER = os.getenv("WEB3_PROVIDER", "https://sepolia.base.org")
+CONTRACT_ADDRESS = os.getenv(
+    "CONTRACT_ADDRESS", "0xA4dd8C402331721f7912AFA26793e00bBA3458B7"
+)
+CONTRACT_ABI_PATH = os.getenv("CONTRACT_ABI_PATH", "contractABI.json")
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "10"))
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", "10"))
+RPC_BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", "100"))
+# Calls in a batch that fail for any reason but a revert (rate limits, node errors)
+# are sent again this many times before batch_call gives up
+RPC_BATCH_RETRIES = int(os.getenv("RPC_BATCH_RETRIES", "3"))
+RPC_BATCH_BACKOFF = float(os.getenv("RPC_BATCH_BACKOFF", "0.5"))
+VIEW_CACHE_ENABLED = os.getenv("VIEW_CACHE_ENABLED", "1") == "1"
+
+
+class BatchCallError(RuntimeError):
+    """Raised when calls in a batch still fail, other than by reverting, after retries."""
+
+
+def is_revert(error):
+    """Whether a JSON-RPC error object reports that the call itself reverted."""
+    return error.get("code") == 3 or "revert" in str(error.get("message", "")).lower()
+
+
+def load_contract_abi(path=CONTRACT_ABI_PATH):
+    with open(path, "r") as abi_file:
+        return json.load(abi_file)
+
+
+class ContractClient:
+    """
+    Process-wide handle on the InsertCoin contract.
+
+    The ABI is parsed once, the contract object is built once, and all RPC traffic goes
+    through one requests.Session whose connection pool keeps TCP/TLS connections to the
+    node alive between calls. Health is tracked passively from the outcome of real calls
+    instead of probing `is_connected()` before each one.
+
+    Attributes:
+        web3 (Web3): The Web3 instance bound to the pooled session.
+        contract: The contract instance built from the cached ABI.
+        healthy (bool | None): None until the first call, then whether the last call succeeded.
+        last_success (float | None): time.time() of the last successful call.
+        last_error (str | None): Message of the last failed call.
+        consecutive_failures (int): Failed calls since the last success.
+    """
+
+    def __init__(
+        self,
+        provider_url=WEB3_PROVIDER,
+        contract_address=CONTRACT_ADDRESS,
+        abi_path=CONTRACT_ABI_PATH,
+        timeout=RPC_TIMEOUT,
+        pool_size=RPC_POOL_SIZE,
+        batch_size=RPC_BATCH_SIZE,
+        cache=VIEW_CACHE_ENABLED,
+    ):
+        self.provider_url = provider_url
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.web3 = Web3(
+            Web3.HTTPProvider(
+                provider_url,
+                request_kwargs={"timeout": timeout},
+                session=self.session,
+                # eth_chainId is re-validated on every call otherwise
+                cache_allowed_requests=True,
+            )
+        )
+        self.abi = load_contract_abi(abi_path)
+        self.contract = self.web3.eth.contract(
+            address=Web3.to_checksum_address(contract_address), abi=self.abi
+        )
+
+        # function name -> (selector, input types, outputs) for batch_call encoding
+        self.views = {
+            entry["name"]: (
+                function_abi_to_4byte_selector(entry),
+                [i["type"] for i in entry["inputs"]],
+                entry["outputs"],
+            )
+            for entry in self.abi
+            if entry.get("type") == "function" and entry["stateMutability"] == "view"
+        }
+
+        self.cache = ViewCache(self._block_number) if cache else None
+
+        self.healthy = None
+        self.last_success = None
+        self.last_error = None
+        self.consecutive_failures = 0
+        self.calls = 0
+
+    def call(self, function_name, *args, block_identifier="latest"):
+        """
+        Calls a view function on the contract and records the outcome for health reporting.
+        Reads of the latest state go through the view cache when it is enabled.
+        Exceptions from the node are re-raised to the caller.
+        """
+        if self.cache is not None and block_identifier == "latest":
+            return self.cache.get_or_load(
+                function_name,
+                args,
+                lambda: self._call(function_name, args, block_identifier),
+            )
+        return self._call(function_name, args, block_identifier)
+
+    def _call(self, function_name, args, block_identifier):
+        self.calls += 1
+        try:
+            function = getattr(self.contract.functions, function_name)
+            result = function(*args).call(block_identifier=block_identifier)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self._record_success()
+        return result
+
+    def _block_number(self):
+        self.calls += 1
+        try:
+            block_number = self.web3.eth.block_number
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self._record_success()
+        return block_number
+
+    def _record_success(self):
+        self.healthy = True
+        self.last_success = time.time()
+        self.consecutive_failures = 0
+
+    def _record_failure(self, error):
+        self.healthy = False
+        self.last_error = str(error)
+        self.consecutive_failures += 1
+
+    def batch_call(self, calls, block_identifier=None):
+        """
+        Calls many view functions in as few round trips as possible.
+
+        `calls` is a list of (function_name, args) tuples. All calls are sent as JSON-RPC
+        batches of `eth_call`s pinned to one block, so the results are consistent with
+        each other; by default the current head is read once and used for every batch.
+        If the node rejects a batch as too large, the batch size is halved for this and
+        every later call.
+
+        Returns a list in the same order as `calls`. Functions with one output return the
+        value, functions with several named outputs return a dict, and calls that
+        reverted return None. Calls that failed any other way, e.g. rate limited, are
+        sent again with backoff; if some still fail, BatchCallError is raised.
+        """
+        if block_identifier is None:
+            block_identifier = (
+                self.cache.head_block()
+                if self.cache is not None
+                else self._block_number()
+            )
+        block = (
+            hex(block_identifier)
+            if isinstance(block_identifier, int)
+            else block_identifier
+        )
+        outputs, payload = [], []
+        for i, (function_name, args) in enumerate(calls):
+            selector, input_types, function_outputs = self.views[function_name]
+            outputs.append(function_outputs)
+            data = selector + abi_encode(input_types, args)
+            payload.append(
+                {
+                    "jsonrpc": "2.0",
+                    "id": i,
+                    "method": "eth_call",
+                    "params": [
+                        {"to": self.contract.address, "data": "0x" + data.hex()},
+                        block,
+                    ],
+                }
+            )
+
+        results = [None] * len(payload)
+        pending = payload
+        for attempt in range(RPC_BATCH_RETRIES + 1):
+            if attempt:
+                time.sleep(RPC_BATCH_BACKOFF * 2 ** (attempt - 1))
+            failed = []
+            start = 0
+            while start < len(pending):
+                chunk = pending[start : start + self.batch_size]
+                responses = self._post_batch(chunk)
+                if responses is None:
+                    if self.batch_size == 1:
+                        raise RuntimeError("RPC node rejected a single-call batch")
+                    self.batch_size = max(1, self.batch_size // 2)
+                    logger.info(
+                        f"RPC batch too large, batch size now {self.batch_size}"
+                    )
+                    continue
+                for response in responses:
+                    i = response["id"]
+                    error = response.get("error")
+                    if "result" in response:
+                        try:
+                            results[i] = self._decode(outputs[i], response["result"])
+                        except DecodingError as e:
+                            # e.g. "0x" from a call that hit no code
+                            logger.warning(f"Undecodable result for {calls[i][0]}: {e}")
+                    elif error is None or not is_revert(error):
+                        failed.append((payload[i], error))
+                start += len(chunk)
+            if not failed:
+                return results
+            pending = [request for request, _ in failed]
+        error = BatchCallError(
+            f"{len(failed)} of {len(calls)} calls failed, e.g. "
+            f"{calls[failed[0][0]['id']][0]}: {failed[0][1]}"
+        )
+        self._record_failure(error)
+        raise error
+
+    def _post_batch(self, chunk):
+        """Returns the batch responses, or None if the node refused the batch size."""
+        self.calls += 1
+        try:
+            response = self.session.post(
+                self.provider_url, json=chunk, timeout=self.timeout
+            )
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        if response.status_code in (400, 413):
+            return None
+        response.raise_for_status()
+        body = response.json()
+        # Providers with a batch limit answer with a single error object
+        if not isinstance(body, list) or len(body) != len(chunk):
+            return None
+        self._record_success()
+        return body
+
+    def _decode(self, outputs, result):
+        values = [
+            Web3.to_checksum_address(v) if o["type"] == "address" else v
+            for o, v in zip(
+                outputs,
+                abi_decode([o["type"] for o in outputs], bytes.fromhex(result[2:])),
+            )
+        ]
+        if len(outputs) == 1:
+            return values[0]
+        if all(o["name"] for o in outputs):
+            return {o["name"]: v for o, v in zip(outputs, values)}
+        return values
+
+    def health(self):
+        return {
+            "healthy": self.healthy,
+            "last_success": self.last_success,
+            "last_error": self.last_error,
+            "consecutive_failures": self.consecutive_failures,
+            "calls": self.calls,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_contract_client():
+    """Returns the shared ContractClient, building it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ContractClient()
+    return _client
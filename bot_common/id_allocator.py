@@ -0,0 +1,383 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Set when several bot processes (shard workers) must hand out disjoint IDs
+ID_ALLOCATOR_DB_PATH = os.getenv("ID_ALLOCATOR_DB_PATH")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS id_counters (
+    name TEXT PRIMARY KEY,
+    next INTEGER NOT NULL
+);
+"""
+
+
+class Reservation:
+    __slots__ = ("id", "owner", "head_block", "reserved_at")
+
+    def __init__(self, id, owner, head_block, reserved_at):
+        self.id = id
+        self.owner = owner
+        self.head_block = head_block
+        self.reserved_at = reserved_at
+
+
+class SharedIdCounter:
+    """
+    High-water mark for an IdAllocator kept in SQLite, shared by every process that
+    opens the same database, so allocators in different shard workers never hand out
+    the same ID.
+
+    Each update runs in a BEGIN IMMEDIATE transaction, which serialises the processes
+    on the database's write lock; in WAL mode with synchronous=NORMAL that costs tens
+    of microseconds, but waiting for a busy lock can take up to the 10 s timeout, so
+    IdAllocator calls it from a worker thread.
+
+    Args:
+        path (str): SQLite database path.
+        name (str): Counter name, e.g. "match" or "tournament".
+    """
+
+    def __init__(self, path, name):
+        self.path = path
+        self.name = name
+        # Autocommit mode so BEGIN IMMEDIATE controls the transactions
+        self._db = sqlite3.connect(
+            path, timeout=10, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _advance(self, floor, count):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT next FROM id_counters WHERE name = ?", (self.name,)
+                ).fetchone()
+                value = max(row[0] if row else 0, int(floor))
+                self._db.execute(
+                    "INSERT INTO id_counters (name, next) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET next = excluded.next",
+                    (self.name, value + count),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return value
+
+    def take(self, floor=0):
+        """Returns the next free ID, at least `floor`, and moves the mark past it."""
+        return self._advance(floor, 1)
+
+    def raise_to(self, floor):
+        """Moves the mark up to `floor` if it is lower; returns the mark."""
+        return self._advance(floor, 0)
+
+    def give_back(self, value):
+        """Moves the mark back to `value` if `value` is the last ID taken; returns True if so."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE id_counters SET next = ? WHERE name = ? AND next = ?",
+                (value, self.name, value + 1),
+            )
+        return cursor.rowcount == 1
+
+
+def shared_id_counter(name, path=ID_ALLOCATOR_DB_PATH):
+    """SharedIdCounter for `name` when ID_ALLOCATOR_DB_PATH is set, otherwise None."""
+    return SharedIdCounter(path, name) if path else None
+
+
+class IdAllocator:
+    """
+    IdAllocator hands out predicted on-chain IDs (match or tournament) from an in-process
+    counter, so commands no longer read `nextMatchId()`/`nextTournamentId()` and two
+    concurrent commands can never receive the same ID.
+
+    The counter is reconciled in the background against the chain value and the
+    `MatchStarted`/`TournamentCreated` events:
+        - If the chain counter moved past ours (someone used the frontend directly), the
+          counter jumps forward.
+        - If ours ran ahead of the chain and no pending reservation is at or above the
+          chain value (the commands that took those IDs failed), it moves back down, so
+          later predictions match the chain again.
+        - A pending reservation is confirmed when its ID shows up in an event.
+        - If the event for a pending ID was mined at or before the chain head when the ID
+          was handed out, the chain already owned that ID: it is a collision. The
+          reservation is repaired by handing out a fresh ID, once the counter has caught
+          up with the chain, and calling `on_collision`.
+
+    `release` gives an ID back when it is still the last one handed out.
+
+    The head is read with `read_head_block` as each ID is handed out, without holding up
+    the command, and IDs handed out while a read is in flight share it. The events' own
+    head comes from the indexer and lags the chain, so it is only used when that read
+    fails.
+
+    The high-water mark and the pending reservations are written to `state_path`, in a
+    worker thread, before `reserve` returns, so a restart never re-issues IDs that were
+    handed out but not yet used on chain. With a SharedIdCounter the mark is kept there
+    instead, and every ID is taken from it, so several processes can allocate at once;
+    each one reconciles only the reservations it handed out. Since no process knows the
+    others' reservations, the shared mark never moves down except through `release`.
+
+    Args:
+        name (str): Label used in logs, e.g. "match" or "tournament".
+        read_chain_next_id (coroutine function): Returns the contract's next ID, or None.
+        read_events (coroutine function): Called as read_events(from_block) and returns
+            (head_block, [(id, block_number), ...]) for events mined since from_block, or
+            None on failure. from_block is None on the first call, which only reads the head.
+        read_head_block (coroutine function, optional): Returns the chain's current block
+            number, or None.
+        on_collision (coroutine function, optional): Called as on_collision(old_id, new_id, owner).
+        state_path (str, optional): File used to persist the high-water mark.
+        pending_ttl (float): Seconds after which an unconfirmed reservation is forgotten.
+        counter (SharedIdCounter, optional): Cross-process high-water mark.
+    """
+
+    def __init__(
+        self,
+        name,
+        read_chain_next_id,
+        read_events=None,
+        on_collision=None,
+        state_path=None,
+        pending_ttl=24 * 3600,
+        counter=None,
+        read_head_block=None,
+    ):
+        self.name = name
+        self.read_chain_next_id = read_chain_next_id
+        self.read_events = read_events
+        self.on_collision = on_collision
+        self.state_path = state_path
+        self.pending_ttl = pending_ttl
+        self.counter = counter
+        self.read_head_block = read_head_block
+
+        self.pending = {}
+        self.collisions = 0
+        self._next = None
+        self._head_block = 0
+        self._events_from_block = None
+        self._lock = asyncio.Lock()
+        self._task = None
+        # Reservations waiting for the head read in flight
+        self._head_waiting = []
+        self._head_read = None
+        # Bumped on every change to the counter or the reservations
+        self._changes = 0
+        self._saved_changes = 0
+        self._save_lock = asyncio.Lock()
+
+    def _load_high_water_mark(self):
+        """Returns the saved (next ID, [[reserved ID, reserved_at], ...])."""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return 0, []
+        try:
+            with open(self.state_path, "r") as state_file:
+                state = json.load(state_file)
+            return int(state["next"]), state.get("pending", [])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable {self.name} allocator state: {e}")
+            return 0, []
+
+    def _write_high_water_mark(self, state):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as state_file:
+            json.dump(state, state_file)
+        os.replace(tmp_path, self.state_path)
+
+    async def _save_high_water_mark(self):
+        if not self.state_path or self.counter is not None:
+            return
+        target = self._changes
+        # One write at a time, in order; callers queued behind a write that already
+        # covered their change return without writing again
+        async with self._save_lock:
+            if self._saved_changes >= target:
+                return
+            changes = self._changes
+            state = {
+                "next": self._next,
+                "pending": [[r.id, r.reserved_at] for r in self.pending.values()],
+            }
+            await asyncio.to_thread(self._write_high_water_mark, state)
+            self._saved_changes = changes
+
+    async def _seed(self):
+        chain_next = await self.read_chain_next_id()
+        if chain_next is None:
+            return False
+        saved_next, saved_pending = self._load_high_water_mark()
+        self._next = max(int(chain_next), saved_next)
+        for reserved_id, reserved_at in saved_pending:
+            # Their head is unknown, so their events are taken as confirmations
+            self.pending.setdefault(
+                reserved_id, Reservation(reserved_id, None, 0, reserved_at)
+            )
+        if self.counter is not None:
+            self._next = await asyncio.to_thread(self.counter.raise_to, self._next)
+        if self.read_events is not None and self._events_from_block is None:
+            result = await self.read_events(None)
+            if result is not None:
+                self._head_block = result[0]
+                self._events_from_block = result[0] + 1
+        logger.info(f"{self.name} allocator seeded at {self._next}")
+        return True
+
+    async def reserve(self, owner=None):
+        """
+        Returns the next predicted ID, or None if the allocator has never been able to
+        read the chain counter. Only the very first call pays for an RPC round trip.
+        """
+        async with self._lock:
+            if self._next is None and not await self._seed():
+                return None
+            new_id = await self._issue(owner)
+        await self._save_high_water_mark()
+        return new_id
+
+    async def _issue(self, owner):
+        if self.counter is not None:
+            # BEGIN IMMEDIATE may wait up to 10 s for another process's write lock
+            new_id = await asyncio.to_thread(self.counter.take, self._next)
+        else:
+            new_id = self._next
+        self._next = new_id + 1
+        self._changes += 1
+        reservation = Reservation(new_id, owner, self._head_block, time.time())
+        self.pending[new_id] = reservation
+        if self.read_head_block is not None:
+            self._head_waiting.append(reservation)
+            if self._head_read is None:
+                self._head_read = asyncio.ensure_future(self._read_head())
+        return new_id
+
+    async def _read_head(self):
+        # Reservations issued while a read is in flight share it: its head is at most
+        # one round trip older than theirs
+        try:
+            head_block = await self.read_head_block()
+        except Exception as e:
+            logger.warning(f"Failed to read the head block for {self.name} IDs: {e}")
+            head_block = None
+        finally:
+            self._head_read = None
+            waiting, self._head_waiting = self._head_waiting, []
+        if head_block is not None:
+            for reservation in waiting:
+                reservation.head_block = max(reservation.head_block, int(head_block))
+
+    async def release(self, reserved_id):
+        """
+        Forgets a reservation whose command failed before the ID was published, and
+        gives the ID back if no later one was handed out since.
+        """
+        async with self._lock:
+            if self.pending.pop(reserved_id, None) is None:
+                return
+            self._changes += 1
+            if self._next == reserved_id + 1 and (
+                self.counter is None
+                or await asyncio.to_thread(self.counter.give_back, reserved_id)
+            ):
+                self._next = reserved_id
+        await self._save_high_water_mark()
+
+    async def reconcile(self):
+        collisions = []
+        async with self._lock:
+            if self._next is None and not await self._seed():
+                return
+            collided = []
+            if self.read_events is not None:
+                # Every reservation must know its head before its event is judged
+                if self._head_read is not None:
+                    await self._head_read
+                result = await self.read_events(self._events_from_block)
+                if result is not None:
+                    head_block, events = result
+                    for event_id, block_number in events:
+                        reservation = self.pending.pop(event_id, None)
+                        if reservation is None:
+                            continue
+                        if block_number <= reservation.head_block:
+                            collided.append(reservation)
+                    self._head_block = max(self._head_block, head_block)
+                    self._events_from_block = head_block + 1
+
+            cutoff = time.time() - self.pending_ttl
+            for stale_id in [
+                i for i, r in self.pending.items() if r.reserved_at < cutoff
+            ]:
+                del self.pending[stale_id]
+
+            chain_next = await self.read_chain_next_id()
+            if chain_next is not None:
+                chain_next = int(chain_next)
+                if chain_next > self._next:
+                    logger.info(
+                        f"{self.name} allocator behind chain, moving {self._next} -> {chain_next}"
+                    )
+                    self._next = chain_next
+                    if self.counter is not None:
+                        self._next = await asyncio.to_thread(
+                            self.counter.raise_to, self._next
+                        )
+                elif (
+                    chain_next < self._next
+                    and self.counter is None
+                    and all(reserved_id < chain_next for reserved_id in self.pending)
+                ):
+                    # The IDs in between were never used: predict the chain's again
+                    logger.info(
+                        f"{self.name} allocator ahead of chain, moving {self._next} -> {chain_next}"
+                    )
+                    self._next = chain_next
+
+            # Only now that the counter is at least the chain's can a fresh ID not
+            # collide again
+            for reservation in collided:
+                collisions.append((reservation, await self._issue(reservation.owner)))
+            self._changes += 1
+
+        await self._save_high_water_mark()
+        for reservation, new_id in collisions:
+            self.collisions += 1
+            logger.warning(
+                f"{self.name} ID {reservation.id} collided with an on-chain {self.name}, "
+                f"reassigned to {new_id}"
+            )
+            if self.on_collision is not None:
+                try:
+                    await self.on_collision(reservation.id, new_id, reservation.owner)
+                except Exception as e:
+                    logger.error(
+                        f"Failed to repair {self.name} ID {reservation.id}: {e}"
+                    )
+
+    async def run(self, interval=15):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"{self.name} allocator reconcile failed: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval=15):
+        """Starts the background reconcile loop once; safe to call from every on_ready."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(interval))
+        return self._task
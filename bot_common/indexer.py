@@ -0,0 +1,560 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from eth_abi import decode as abi_decode
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+
+logger = logging.getLogger(__name__)
+
+INDEXER_DB_PATH = os.getenv("INDEXER_DB_PATH", "events.sqlite3")
+INDEXER_CONFIRMATIONS = int(os.getenv("INDEXER_CONFIRMATIONS", "12"))
+# First block to index on an empty store; set it to the contract's deployment block.
+# Unset, indexing starts at the current safe block and earlier events are never indexed.
+INDEXER_START_BLOCK = os.getenv("INDEXER_START_BLOCK")
+INDEXER_POLL_INTERVAL = float(os.getenv("INDEXER_POLL_INTERVAL", "5"))
+INDEXER_MIN_RANGE = 1
+INDEXER_MAX_RANGE = int(os.getenv("INDEXER_MAX_RANGE", "10000"))
+# Grow the block range while a response stays below this many logs
+INDEXER_TARGET_LOGS = 2000
+
+MATCH_EVENTS = ("MatchStarted", "MatchJoined", "MatchClosed", "MatchDonation")
+TOURNAMENT_EVENTS = (
+    "TournamentCreated",
+    "TournamentJoined",
+    "TournamentStarted",
+    "TournamentEnded",
+)
+# SQLite's default limit on the variables of one statement is 999
+SQL_CHUNK = 500
+
+INDEXED_EVENTS = (
+    "MatchStarted",
+    "MatchJoined",
+    "MatchClosed",
+    "MatchDonation",
+    "TournamentCreated",
+    "TournamentJoined",
+    "TournamentStarted",
+    "TournamentEnded",
+    "MatchingPoolFilled",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    tx_hash TEXT NOT NULL,
+    event TEXT NOT NULL,
+    args TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_by_name ON events (event, block_number);
+CREATE TABLE IF NOT EXISTS matches (
+    match_id INTEGER PRIMARY KEY,
+    player1 TEXT,
+    player2 TEXT,
+    match_amount TEXT,
+    winner TEXT,
+    winner_amount TEXT,
+    donations TEXT NOT NULL DEFAULT '0',
+    closed INTEGER NOT NULL DEFAULT 0,
+    started_block INTEGER
+);
+CREATE TABLE IF NOT EXISTS tournaments (
+    tournament_id INTEGER PRIMARY KEY,
+    num_entrants INTEGER,
+    winners_percentage INTEGER,
+    multisig_percentage INTEGER,
+    status TEXT NOT NULL DEFAULT 'open',
+    winners TEXT,
+    created_block INTEGER
+);
+CREATE TABLE IF NOT EXISTS tournament_entrants (
+    tournament_id INTEGER NOT NULL,
+    entrant TEXT NOT NULL,
+    PRIMARY KEY (tournament_id, entrant)
+);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL
+);
+"""
+
+
+def to_hex(value):
+    return value if isinstance(value, str) else "0x" + bytes(value).hex()
+
+
+STATIC_TYPES = {"address", "bool", "uint8", "uint64", "uint256"}
+
+
+@functools.lru_cache(maxsize=65536)
+def _checksum(address):
+    return to_checksum_address(address)
+
+
+def _decode_word(abi_type, word):
+    if abi_type == "address":
+        return _checksum("0x" + word[12:].hex())
+    if abi_type == "bool":
+        return word[-1] == 1
+    if abi_type in STATIC_TYPES:
+        return int.from_bytes(word, "big")
+    return abi_decode([abi_type], word)[0]
+
+
+def _jsonable(value):
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, int) and not isinstance(value, bool) and value > 2**53:
+        # uint256 amounts don't survive a round trip through JSON numbers everywhere
+        return str(value)
+    return value
+
+
+class EventStore:
+    """
+    SQLite store of decoded contract events plus the match and tournament state derived
+    from them. Derived tables are projections of the `events` table, so a reorg rewind
+    only has to delete the events from the fork block on and rebuild the matches and
+    tournaments those events touched, from their own events.
+
+    The indexer thread writes through one connection and the reads go through a second
+    one, each behind its own lock, so a read on the event loop never shares a
+    connection with a write in progress; WAL mode keeps it from waiting on the write.
+    """
+
+    def __init__(self, path=INDEXER_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._read_lock = threading.Lock()
+        if path == ":memory:":
+            # A second connection would open a different, empty database
+            self._reader, self._read_lock = self._db, self._lock
+        else:
+            self._reader = sqlite3.connect(path, check_same_thread=False)
+            self._reader.row_factory = sqlite3.Row
+            self._reader.execute("PRAGMA query_only=ON")
+
+    def _read(self, sql, params=()):
+        with self._read_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    # Writes
+
+    def add_events(self, events, checkpoint_block, checkpoint_hash):
+        """Stores decoded events and advances the checkpoint in one transaction."""
+        with self._lock, self._db:
+            for event in events:
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        event["blockNumber"],
+                        event["logIndex"],
+                        to_hex(event["blockHash"]),
+                        to_hex(event["transactionHash"]),
+                        event["event"],
+                        json.dumps(_jsonable(dict(event["args"]))),
+                    ),
+                )
+                if cursor.rowcount:
+                    self._apply(event["event"], event["args"], event["blockNumber"])
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoint VALUES (0, ?, ?)",
+                (checkpoint_block, checkpoint_hash),
+            )
+
+    def _apply(self, name, args, block_number):
+        db = self._db
+        if name == "MatchStarted":
+            db.execute(
+                "INSERT OR REPLACE INTO matches (match_id, player1, match_amount, started_block) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    args["matchId"],
+                    args["player1"],
+                    str(args["matchAmount"]),
+                    block_number,
+                ),
+            )
+        elif name == "MatchJoined":
+            db.execute(
+                "UPDATE matches SET player2 = ? WHERE match_id = ?",
+                (args["player2"], args["matchId"]),
+            )
+        elif name == "MatchClosed":
+            db.execute(
+                "UPDATE matches SET closed = 1, winner = ?, winner_amount = ? WHERE match_id = ?",
+                (args["winner"], str(args["winnerAmount"]), args["matchId"]),
+            )
+        elif name == "MatchDonation":
+            row = db.execute(
+                "SELECT donations FROM matches WHERE match_id = ?", (args["matchId"],)
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE matches SET donations = ? WHERE match_id = ?",
+                    (str(int(row["donations"]) + int(args["amount"])), args["matchId"]),
+                )
+        elif name == "TournamentCreated":
+            db.execute(
+                "INSERT OR REPLACE INTO tournaments (tournament_id, num_entrants, "
+                "winners_percentage, multisig_percentage, created_block) VALUES (?, ?, ?, ?, ?)",
+                (
+                    args["tournamentId"],
+                    args["numEntrants"],
+                    args["winnersPercentage"],
+                    args["multisigPercentage"],
+                    block_number,
+                ),
+            )
+        elif name == "TournamentJoined":
+            db.execute(
+                "INSERT OR IGNORE INTO tournament_entrants VALUES (?, ?)",
+                (args["tournamentId"], args["entrant"]),
+            )
+        elif name == "TournamentStarted":
+            db.execute(
+                "UPDATE tournaments SET status = 'in-progress' WHERE tournament_id = ?",
+                (args["tournamentId"],),
+            )
+        elif name == "TournamentEnded":
+            db.execute(
+                "UPDATE tournaments SET status = 'closed', winners = ? WHERE tournament_id = ?",
+                (json.dumps(list(args["winners"])), args["tournamentId"]),
+            )
+
+    def _replay(self, events, id_field, ids):
+        ids = list(ids)
+        for i in range(0, len(ids), SQL_CHUNK):
+            chunk = ids[i : i + SQL_CHUNK]
+            rows = self._db.execute(
+                "SELECT block_number, event, args FROM events "
+                f"WHERE event IN ({','.join('?' * len(events))}) "
+                f"AND json_extract(args, '$.{id_field}') IN ({','.join('?' * len(chunk))}) "
+                "ORDER BY block_number, log_index",
+                (*events, *chunk),
+            ).fetchall()
+            for row in rows:
+                self._apply(row["event"], json.loads(row["args"]), row["block_number"])
+
+    def rewind(self, block_number):
+        """
+        Drops every event at or after block_number, rebuilds the matches and
+        tournaments they touched and returns the dropped events, in the shape
+        `events_since` returns.
+        """
+        with self._lock, self._db:
+            rows = self._db.execute(
+                "SELECT block_number, log_index, event, args FROM events "
+                "WHERE block_number >= ? ORDER BY block_number, log_index",
+                (block_number,),
+            ).fetchall()
+            removed = [
+                {
+                    "event": row["event"],
+                    "args": json.loads(row["args"]),
+                    "blockNumber": row["block_number"],
+                    "logIndex": row["log_index"],
+                }
+                for row in rows
+            ]
+            match_ids = {
+                e["args"]["matchId"] for e in removed if e["event"] in MATCH_EVENTS
+            }
+            tournament_ids = {
+                e["args"]["tournamentId"]
+                for e in removed
+                if e["event"] in TOURNAMENT_EVENTS
+            }
+            self._db.execute(
+                "DELETE FROM events WHERE block_number >= ?", (block_number,)
+            )
+            for table, column, ids in (
+                ("matches", "match_id", list(match_ids)),
+                ("tournaments", "tournament_id", list(tournament_ids)),
+                ("tournament_entrants", "tournament_id", list(tournament_ids)),
+            ):
+                for i in range(0, len(ids), SQL_CHUNK):
+                    chunk = ids[i : i + SQL_CHUNK]
+                    self._db.execute(
+                        f"DELETE FROM {table} WHERE {column} IN "
+                        f"({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+            self._replay(MATCH_EVENTS, "matchId", match_ids)
+            self._replay(TOURNAMENT_EVENTS, "tournamentId", tournament_ids)
+            self._db.execute("DELETE FROM checkpoint")
+        return removed
+
+    # Reads
+
+    def checkpoint(self):
+        rows = self._read(
+            "SELECT block_number, block_hash FROM checkpoint WHERE id = 0"
+        )
+        return (
+            (rows[0]["block_number"], rows[0]["block_hash"]) if rows else (None, None)
+        )
+
+    def get_match(self, match_id):
+        rows = self._read("SELECT * FROM matches WHERE match_id = ?", (match_id,))
+        return dict(rows[0]) if rows else None
+
+    def get_open_matches(self):
+        rows = self._read("SELECT * FROM matches WHERE player2 IS NULL AND closed = 0")
+        return [dict(row) for row in rows]
+
+    def get_tournament(self, tournament_id):
+        rows = self._read(
+            "SELECT * FROM tournaments WHERE tournament_id = ?", (tournament_id,)
+        )
+        return dict(rows[0]) if rows else None
+
+    def get_entrants(self, tournament_id):
+        rows = self._read(
+            "SELECT entrant FROM tournament_entrants WHERE tournament_id = ?",
+            (tournament_id,),
+        )
+        return [row["entrant"] for row in rows]
+
+    def events_since(self, block_number, log_index, event_names):
+        """
+        Returns the stored `event_names` events after (block_number, log_index), in
+        chain order and in the shape EventIndexer.decode produces.
+        """
+        rows = self._read(
+            "SELECT block_number, log_index, event, args FROM events "
+            f"WHERE event IN ({','.join('?' * len(event_names))}) "
+            "AND (block_number > ? OR (block_number = ? AND log_index > ?)) "
+            "ORDER BY block_number, log_index",
+            (*event_names, block_number, block_number, log_index),
+        )
+        return [
+            {
+                "event": row["event"],
+                "args": json.loads(row["args"]),
+                "blockNumber": row["block_number"],
+                "logIndex": row["log_index"],
+            }
+            for row in rows
+        ]
+
+    def event_ids(self, event_name, id_field, from_block):
+        """
+        Returns (indexed_block, [(id, block_number), ...]) for `event_name` events at or
+        after from_block, in the shape IdAllocator expects from its read_events callable.
+        """
+        indexed_block, _ = self.checkpoint()
+        if indexed_block is None:
+            return None
+        if from_block is None:
+            return indexed_block, []
+        rows = self._read(
+            "SELECT block_number, args FROM events WHERE event = ? AND block_number >= ?",
+            (event_name, from_block),
+        )
+        return indexed_block, [
+            (json.loads(row["args"])[id_field], row["block_number"]) for row in rows
+        ]
+
+
+class EventIndexer:
+    """
+    Incrementally indexes the contract's events into an EventStore.
+
+    Each poll fetches logs for every indexed event in one `eth_getLogs` call per block
+    range, up to `confirmations` blocks behind the head. The range halves whenever the
+    node rejects or times out a request and doubles while responses stay small. Before
+    moving on, the stored checkpoint hash is compared with the chain; on a mismatch the
+    store rewinds `confirmations` blocks and re-indexes them.
+
+    An empty store starts at `start_block` (INDEXER_START_BLOCK), which should be the
+    contract's deployment block. Without it the indexer starts at the current safe block
+    and never sees earlier events, so history-dependent consumers (the leaderboard
+    backfill, match lookups) only cover what happens after the first run.
+
+    Listeners registered with `add_listener` are called on the event loop with each
+    committed batch of decoded events. A listener that raises is logged and skipped;
+    it does not stop the other listeners or the next poll.
+    """
+
+    def __init__(
+        self,
+        web3,
+        contract,
+        store,
+        confirmations=INDEXER_CONFIRMATIONS,
+        start_block=INDEXER_START_BLOCK,
+        max_range=INDEXER_MAX_RANGE,
+    ):
+        self.web3 = web3
+        self.contract = contract
+        self.store = store
+        self.confirmations = confirmations
+        self.start_block = int(start_block) if start_block is not None else None
+        self.max_range = max_range
+        self.block_range = max_range
+        self.listeners = []
+        self.reorg_listeners = []
+        # Events removed by a reorg since the listeners were last told
+        self._reverted = []
+        # topic0 -> (event name, indexed inputs, data input names, data input types)
+        self.topics = {}
+        for entry in contract.abi:
+            if entry.get("type") == "event" and entry["name"] in INDEXED_EVENTS:
+                topic = "0x" + event_abi_to_log_topic(entry).hex()
+                indexed = [
+                    (i["name"], i["type"]) for i in entry["inputs"] if i["indexed"]
+                ]
+                data = [i for i in entry["inputs"] if not i["indexed"]]
+                self.topics[topic] = (
+                    entry["name"],
+                    indexed,
+                    [i["name"] for i in data],
+                    [i["type"] for i in data],
+                )
+        self._task = None
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def add_reorg_listener(self, callback):
+        """`callback(events)` gets the events a reorg removed, before the new ones."""
+        self.reorg_listeners.append(callback)
+
+    def _check_reorg(self):
+        block_number, block_hash = self.store.checkpoint()
+        if block_number is None:
+            return
+        if self._block_hash(block_number) != block_hash:
+            rewind_to = max(1, block_number - self.confirmations)
+            logger.warning(
+                f"Reorg detected at block {block_number}, rewinding to {rewind_to}"
+            )
+            self._reverted.extend(self.store.rewind(rewind_to))
+            self.store.add_events([], rewind_to - 1, self._block_hash(rewind_to - 1))
+
+    def _block_hash(self, block_number):
+        return to_hex(self.web3.eth.get_block(block_number)["hash"])
+
+    def decode(self, log):
+        """
+        Decodes a raw log without going through web3's per-event process_log, which does
+        the same work with several times the overhead and dominates large backfills.
+        """
+        topics = log["topics"]
+        spec = self.topics.get(to_hex(topics[0]))
+        if spec is None:
+            return None
+        name, indexed, data_names, data_types = spec
+        args = {}
+        for (arg_name, arg_type), topic in zip(indexed, topics[1:]):
+            args[arg_name] = _decode_word(arg_type, bytes(topic))
+        data = log["data"]
+        data = bytes.fromhex(data[2:]) if isinstance(data, str) else bytes(data)
+        if all(t in STATIC_TYPES for t in data_types):
+            for i, (arg_name, arg_type) in enumerate(zip(data_names, data_types)):
+                args[arg_name] = _decode_word(arg_type, data[32 * i : 32 * i + 32])
+        else:
+            for arg_name, value in zip(data_names, abi_decode(data_types, data)):
+                if isinstance(value, tuple) and value and isinstance(value[0], str):
+                    value = [_checksum(v) for v in value]
+                args[arg_name] = value
+        return {
+            "event": name,
+            "args": args,
+            "blockNumber": log["blockNumber"],
+            "logIndex": log["logIndex"],
+            "blockHash": log["blockHash"],
+            "transactionHash": log["transactionHash"],
+        }
+
+    def fetch_events(self, from_block, to_block):
+        """Decoded events of blocks from_block to to_block, fetched from the node."""
+        logs = self.web3.eth.get_logs(
+            {
+                "address": self.contract.address,
+                "fromBlock": from_block,
+                "toBlock": to_block,
+                "topics": [list(self.topics)],
+            }
+        )
+        return [event for event in map(self.decode, logs) if event is not None]
+
+    def poll_once(self):
+        """Indexes every confirmed block not yet stored and returns the new events."""
+        self._check_reorg()
+        safe_block = self.web3.eth.block_number - self.confirmations
+        indexed_block, _ = self.store.checkpoint()
+        if indexed_block is None:
+            if self.start_block is None:
+                logger.warning(
+                    f"INDEXER_START_BLOCK is not set, indexing from block {safe_block}; "
+                    "events before it will not be indexed"
+                )
+            indexed_block = (
+                self.start_block if self.start_block is not None else safe_block
+            ) - 1
+        new_events = []
+        from_block = indexed_block + 1
+        while from_block <= safe_block:
+            to_block = min(safe_block, from_block + self.block_range - 1)
+            try:
+                events = self.fetch_events(from_block, to_block)
+            except Exception as e:
+                if self.block_range == INDEXER_MIN_RANGE:
+                    raise
+                self.block_range = max(INDEXER_MIN_RANGE, self.block_range // 2)
+                logger.info(
+                    f"eth_getLogs failed ({e}), shrinking range to {self.block_range}"
+                )
+                continue
+            self.store.add_events(events, to_block, self._block_hash(to_block))
+            new_events.extend(events)
+            if len(events) < INDEXER_TARGET_LOGS:
+                self.block_range = min(self.max_range, self.block_range * 2)
+            from_block = to_block + 1
+        return new_events
+
+    async def run(self, interval=INDEXER_POLL_INTERVAL):
+        while True:
+            try:
+                events = await asyncio.to_thread(self.poll_once)
+            except Exception as e:
+                logger.error(f"Indexer poll failed: {e}")
+                events = []
+            reverted, self._reverted = self._reverted, []
+            if reverted:
+                self._notify(self.reorg_listeners, reverted)
+            if events:
+                self._notify(self.listeners, events)
+            await asyncio.sleep(interval)
+
+    @staticmethod
+    def _notify(listeners, events):
+        for listener in listeners:
+            try:
+                listener(events)
+            except Exception as e:
+                logger.error(f"Indexer listener {listener!r} failed: {e}")
+
+    def start(self, interval=INDEXER_POLL_INTERVAL):
+        """Starts the background indexing loop once; safe to call from every on_ready."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(interval))
+        return self._task
@@ -0,0 +1,315 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter, OrderedDict
+
+from .outbound import MAX_MESSAGE_LENGTH, RESPONSE
+
+logger = logging.getLogger(__name__)
+
+INTENTS = ("tournament", "1v1", "list", "delete", "unidentified")
+FALLBACK_INTENT = "unidentified"
+
+INTENT_LABELS_PATH = os.getenv(
+    "INTENT_LABELS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_labels.jsonl"),
+)
+# Inputs answered by the LLM are appended here and used on the next retrain
+INTENT_LABEL_LOG_PATH = os.getenv("INTENT_LABEL_LOG_PATH", "intent_label_log.jsonl")
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.75"))
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "10000"))
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "10"))
+
+_non_word = re.compile(r"[^0-9a-z]+")
+_mention = re.compile(r"<@!?&?\d+>")
+# Built on first use and shared by every call
+_openai_client = None
+
+PRIMER = """
+My only purpose is to categorise user input into 5 categories. 
+First category is for Tournaments. If I think given text can be classified as a tournament, my response will be
+one word "tournament".
+Second category is for 1v1. If I think given text can be classified as a profile description of a 
+player looking for a 1v1 match, my response will be one word: "1v1".
+Third category is for showing list of active 1v1 rounds. If I think given text can be classified as a 
+request to show list of user 1v1 posts or active tournaments or player profile descriptions, my response will be one 
+word: "list". This also applies if given text is user saying he wants to see something or asks what you have or if 
+you have. Fourth category is for deleting previously submitted post by user. If I think given text can be classified 
+as a request for deletion of user post, my response will be one word: "delete". 
+Fifth category is for unidentified. If I think given text can't be classified as neither of previous 2 categories, 
+my response will be one word: "unidentified".
+I only respond with one of following phrases: "tournament", "1v1", "list", "delete", "unidentified".
+
+GIVEN TEXT:
+"""
+
+PRIMER_MESSAGES = [{"role": "system", "content": PRIMER}]
+
+
+def normalize(text):
+    return _non_word.sub(" ", text.lower()).strip()
+
+
+def features(normalized):
+    words = normalized.split()
+    grams = list(words)
+    grams.extend(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return grams
+
+
+class NaiveBayesIntentModel:
+    """
+    Multinomial naive Bayes over word unigrams and bigrams. Training is a single pass
+    of counting and prediction is one dictionary lookup per n-gram, so a message is
+    classified in microseconds.
+    """
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+        self.label_counts = Counter()
+        self.gram_counts = {}
+        self.gram_totals = Counter()
+        self.vocabulary = set()
+
+    def fit(self, examples):
+        for text, label in examples:
+            grams = features(normalize(text))
+            self.label_counts[label] += 1
+            self.gram_counts.setdefault(label, Counter()).update(grams)
+            self.gram_totals[label] += len(grams)
+            self.vocabulary.update(grams)
+        return self
+
+    def predict(self, normalized):
+        """Returns (label, probability) for an already normalized text."""
+        if not self.label_counts:
+            return FALLBACK_INTENT, 0.0
+        grams = [gram for gram in features(normalized) if gram in self.vocabulary]
+        total = sum(self.label_counts.values())
+        vocabulary = len(self.vocabulary)
+        scores = {}
+        for label, count in self.label_counts.items():
+            counts = self.gram_counts[label]
+            denominator = self.gram_totals[label] + self.alpha * vocabulary
+            scores[label] = math.log(count / total) + sum(
+                math.log((counts[gram] + self.alpha) / denominator) for gram in grams
+            )
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        probability = 1 / sum(math.exp(score - top) for score in scores.values())
+        if not grams:
+            # Nothing the model has seen before: the prior alone is not a prediction
+            probability = 0.0
+        return best, probability
+
+
+def load_labels(*paths):
+    examples = []
+    for path in paths:
+        if not path or not os.path.exists(path):
+            continue
+        with open(path, "r") as labels_file:
+            for line in labels_file:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("label") in INTENTS:
+                    examples.append((record["text"], record["label"]))
+    return examples
+
+
+def get_openai_client():
+    """Returns the process-wide OpenAI client, so every call reuses its connections."""
+    global _openai_client
+    if _openai_client is None:
+        # Imported lazily so the bots run without the openai package when no key is set
+        from openai import AsyncOpenAI
+
+        _openai_client = AsyncOpenAI(timeout=OPENAI_TIMEOUT)
+    return _openai_client
+
+
+async def openai_classify(text):
+    """Asks the OpenAI chat model to classify `text` with the categorisation primer."""
+    response = await get_openai_client().chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=PRIMER_MESSAGES + [{"role": "user", "content": text}],
+        temperature=0,
+        max_tokens=5,
+    )
+    answer = normalize(response.choices[0].message.content or "")
+    return answer if answer in INTENTS else FALLBACK_INTENT
+
+
+class IntentClassifier:
+    """
+    Classifies user messages into the primer's categories ("tournament", "1v1", "list",
+    "delete", "unidentified") in three stages:
+        1. A cache keyed by normalized text, so repeated messages cost a dict lookup.
+        2. A local NaiveBayesIntentModel trained on the labeled examples in
+           `labels_path` plus every label the LLM has produced before.
+        3. The LLM (`llm`), only when the local model's confidence is below
+           `threshold`. Its answer is cached and appended to `label_log_path` so the
+           next `retrain` learns it.
+
+    If the LLM is unavailable (no OPENAI_API_KEY, openai not installed, or the call
+    fails) the local prediction is used as is.
+
+    Args:
+        llm (coroutine function, optional): Called as llm(text) and returns an intent.
+            Defaults to openai_classify when OPENAI_API_KEY is set.
+        threshold (float): Minimum local confidence to skip the LLM.
+        labels_path (str): Seed labeled examples, JSON lines of {"text", "label"}.
+        label_log_path (str, optional): Where LLM answers are logged as labels.
+        cache_size (int): Normalized texts kept in the result cache.
+
+    Usage:
+        classifier = IntentClassifier()
+        intent = await classifier.classify(message.content)
+    """
+
+    def __init__(
+        self,
+        llm=None,
+        threshold=INTENT_CONFIDENCE_THRESHOLD,
+        labels_path=INTENT_LABELS_PATH,
+        label_log_path=INTENT_LABEL_LOG_PATH,
+        cache_size=INTENT_CACHE_SIZE,
+    ):
+        if llm is None and os.getenv("OPENAI_API_KEY"):
+            llm = openai_classify
+        self.llm = llm
+        self.threshold = threshold
+        self.labels_path = labels_path
+        self.label_log_path = label_log_path
+        self.cache_size = cache_size
+
+        self.stats = Counter()
+        self._cache = OrderedDict()
+        self._pending = {}
+        self.model = None
+        self.retrain()
+
+    def retrain(self):
+        examples = load_labels(self.labels_path, self.label_log_path)
+        self.model = NaiveBayesIntentModel().fit(examples)
+        logger.info(f"Intent model trained on {len(examples)} examples")
+
+    def _remember(self, key, intent):
+        self._cache[key] = intent
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _write_label(self, text, intent):
+        try:
+            with open(self.label_log_path, "a") as log_file:
+                log_file.write(json.dumps({"text": text, "label": intent}) + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to log intent label: {e}")
+
+    async def _log_label(self, text, intent):
+        if self.label_log_path:
+            await asyncio.to_thread(self._write_label, text, intent)
+
+    async def _ask_llm(self, text, key, fallback):
+        try:
+            intent = await self.llm(text)
+        except Exception as e:
+            logger.error(f"Intent LLM fallback failed: {str(e)}")
+            self.stats["llm_errors"] += 1
+            return fallback
+        self._remember(key, intent)
+        await self._log_label(text, intent)
+        return intent
+
+    async def classify(self, text):
+        key = normalize(text)
+        intent = self._cache.get(key)
+        if intent is not None:
+            self._cache.move_to_end(key)
+            self.stats["cache"] += 1
+            return intent
+
+        intent, confidence = self.model.predict(key)
+        if confidence >= self.threshold or self.llm is None:
+            self.stats["local"] += 1
+            self._remember(key, intent)
+            return intent
+
+        self.stats["llm"] += 1
+        # Identical messages arriving together share one LLM call
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._ask_llm(text, key, intent))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(pending)
+
+
+class IntentRouter:
+    """
+    Answers the messages users send the bot, by intent. Only direct messages and
+    messages that mention the bot are classified; each bot registers a handler for the
+    intents it serves with `handle`, and a process hosting several bots shares one
+    router, so a message gets one reply whichever bots are loaded.
+
+    Handlers are coroutine functions called as handler(message) that return the reply
+    text, or None. The replies of every handler of the message's intent are sent
+    together through the outbox; when there are none, `fallback` is sent instead.
+
+    Usage:
+        router = get_intent_router()
+        router.handle("1v1", reply_1v1)
+        router.attach(bot)
+    """
+
+    def __init__(self, classifier, outbox):
+        self.classifier = classifier
+        self.outbox = outbox
+        self.handlers = {}
+        self.fallback = None
+        self.client = None
+
+    def handle(self, intent, handler):
+        if intent not in INTENTS:
+            raise ValueError(f"Unknown intent: {intent}")
+        self.handlers.setdefault(intent, []).append(handler)
+
+    def attach(self, client):
+        """Listens to `client`'s messages (idempotent)."""
+        if self.client is not client:
+            self.client = client
+            client.add_listener(self.on_message)
+
+    async def on_message(self, message):
+        user = self.client.user
+        if message.author.bot or user is None:
+            return
+        if message.guild is not None and user not in message.mentions:
+            return
+        text = _mention.sub(" ", message.content).strip()
+        if not text:
+            return
+        intent = await self.classifier.classify(text)
+        replies = []
+        for handler in self.handlers.get(intent, []):
+            try:
+                reply = await handler(message)
+            except Exception as e:
+                logger.error(f"Intent handler for {intent} failed: {str(e)}")
+                continue
+            if reply:
+                replies.append(reply)
+        if not replies and self.fallback:
+            replies.append(self.fallback)
+        if replies:
+            self.outbox.send(
+                message.channel, "\n\n".join(replies)[:MAX_MESSAGE_LENGTH], RESPONSE
+            )
@@ -0,0 +1,473 @@
+import asyncio
+import bisect
+import heapq
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_PATH = os.getenv("LEADERBOARD_PATH", "leaderboard.log")
+# Entries kept ranked per board; larger top-k queries fall back to a full pass
+LEADERBOARD_CAPACITY = int(os.getenv("LEADERBOARD_CAPACITY", "100"))
+# Seconds between compactions of the delta log into a snapshot
+LEADERBOARD_COMPACT_INTERVAL = float(os.getenv("LEADERBOARD_COMPACT_INTERVAL", "300"))
+# Match rows read per request when a new log is backfilled from the matches table
+LEADERBOARD_BACKFILL_PAGE = int(os.getenv("LEADERBOARD_BACKFILL_PAGE", "1000"))
+MATCH_COLUMNS = "match_id,platform,category,game,match_amount_usd"
+
+# Dimensions
+PLAYER = "player"  # wallet address
+DONOR = "donor"  # wallet address
+GAME = "game"
+PLATFORM = "platform"
+CATEGORY = "category"
+TOTAL = "total"
+ALL = "all"
+
+LEADERBOARD_EVENTS = (
+    "MatchStarted",
+    "MatchJoined",
+    "MatchClosed",
+    "MatchDonation",
+    "TournamentEnded",
+)
+
+# Metrics counted in wei
+WEI_METRICS = {"winnings", "donated", "staked"}
+
+
+def format_entry(dimension, metric, key, value):
+    if dimension in (PLAYER, DONOR):
+        key = f"{key[:6]}...{key[-4:]}"
+    if metric in WEI_METRICS:
+        return f"{key}: {value / 10**18:.4f} ETH"
+    if metric == "volume_usd":
+        return f"{key}: ${value:,}"
+    return f"{key}: {value:,}"
+
+
+def describe(dimension, metric, entries):
+    """Numbered lines for the (key, value) pairs returned by Leaderboard.top."""
+    return "\n".join(
+        f"{place}. {format_entry(dimension, metric, key, value)}"
+        for place, (key, value) in enumerate(entries, 1)
+    )
+
+
+class TopBoard:
+    """
+    The `capacity` highest (key, value) pairs of one metric, kept sorted.
+
+    Counters only grow, so a key outside the board can only enter it through an update
+    of its own: `update` keeps the board exact in O(capacity) and `top(k)` is a slice.
+    A counter that shrinks (a reorg) needs a `rebuild`.
+    """
+
+    __slots__ = ("capacity", "entries", "members")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        # (-value, key), best first
+        self.entries = []
+        self.members = {}
+
+    def update(self, key, value):
+        old = self.members.get(key)
+        if old is not None:
+            del self.entries[bisect.bisect_left(self.entries, (-old, key))]
+            del self.members[key]
+        elif len(self.entries) >= self.capacity and (-value, key) >= self.entries[-1]:
+            return
+        bisect.insort(self.entries, (-value, key))
+        self.members[key] = value
+        if len(self.entries) > self.capacity:
+            _, dropped = self.entries.pop()
+            del self.members[dropped]
+
+    def rebuild(self, values):
+        """Re-ranks from `values` ({key: value}) in O(n log capacity)."""
+        best = heapq.nsmallest(
+            self.capacity, ((-value, key) for key, value in values.items())
+        )
+        self.entries = best
+        self.members = {key: -value for value, key in best}
+
+    def top(self, k):
+        return [(key, -value) for value, key in self.entries[:k]]
+
+
+class Leaderboard:
+    """
+    Player rankings, volume per game, platform and category, and donation totals,
+    maintained incrementally: every new match row and every indexed contract event is
+    applied as a delta to counters keyed by (dimension, key), so nothing is ever
+    recomputed from the full history.
+
+    Counters come from two places:
+    - `apply_match` takes a match row as the bot inserts it, adding matches and
+      volume_usd per game, platform and category.
+    - `apply_events` takes the indexer's MatchStarted/MatchJoined/MatchClosed/
+      MatchDonation/TournamentEnded events, adding matches, wins, winnings (wei) and
+      tournament wins per player address, donated (wei) per donor, and chain totals.
+      Events at or before the last applied (block, log index) are skipped, so batches
+      the indexer delivers twice are counted once. Events a reorg removes are handed
+      to `revert_events`, which subtracts them and moves the mark back before them.
+
+    Each (dimension, metric) has a TopBoard, so `top` answers in O(k) for k up to
+    `capacity` however long the history is.
+
+    The state is a JSONL log at `path`: a snapshot line followed by one line of deltas
+    per applied batch, so a crash loses at most a torn last line and never applies half
+    a batch. `compact` rewrites the log as a single snapshot; `start` loads it, catches
+    up on events indexed while the bot was down, follows the indexer and compacts every
+    LEADERBOARD_COMPACT_INTERVAL seconds. When there is no log yet, `start` first
+    backfills the match counters from the matches table, a page at a time, and logs
+    their sum as one record flagged `backfilled`: a crash midway leaves nothing of it
+    in the log, so it runs again, and it never runs twice.
+
+    Usage:
+        leaderboard = Leaderboard()
+        leaderboard.start(get_indexer(), get_repository())
+        leaderboard.top(PLAYER, "winnings", 10)
+    """
+
+    def __init__(self, path=LEADERBOARD_PATH, capacity=LEADERBOARD_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        # (dimension, key) -> {metric: value}
+        self.counters = {}
+        # (dimension, metric) -> TopBoard
+        self.boards = {}
+        # (block_number, log_index) of the last applied event
+        self.mark = (-1, -1)
+        self.loaded = False
+        self.backfilled = False
+        self._records = 0
+        self._file = None
+        # Match deltas received before the log was loaded
+        self._unloaded = []
+        # (handler, events) of indexer batches received before the catch-up finished
+        self._backlog = []
+        # Match IDs applied until the backfill is done, so it does not count them again
+        self._backfill_ids = set()
+        self._following = False
+        self._task = None
+
+    # Counters
+
+    def _add(self, dimension, key, deltas):
+        counters = self.counters.setdefault((dimension, key), {})
+        for metric, delta in deltas.items():
+            value = counters.get(metric, 0) + delta
+            counters[metric] = value
+            board = self.boards.get((dimension, metric))
+            if board is None:
+                board = self.boards[(dimension, metric)] = TopBoard(self.capacity)
+            board.update(key, value)
+
+    def _commit(self, deltas, mark=None):
+        if not self.loaded:
+            self._unloaded.append(deltas)
+            return
+        for dimension, key, metrics in deltas:
+            self._add(dimension, key, metrics)
+        record = {"deltas": deltas}
+        if mark is not None:
+            self.mark = mark
+            record["mark"] = list(mark)
+        self._append(record)
+
+    def apply_match(self, match):
+        """Adds a match row (platform, category, game, match_amount_usd) as it is inserted."""
+        if self._backfill_ids is not None:
+            self._backfill_ids.add(str(match["match_id"]))
+        self._commit(self._match_deltas(match))
+
+    def _match_deltas(self, match):
+        volume = {"matches": 1, "volume_usd": int(match["match_amount_usd"])}
+        return [
+            [GAME, match["game"], volume],
+            [PLATFORM, match["platform"], volume],
+            [CATEGORY, match["category"], volume],
+            [TOTAL, ALL, volume],
+        ]
+
+    def _event_deltas(self, name, args):
+        if name == "MatchStarted":
+            return [
+                [PLAYER, args["player1"], {"matches": 1}],
+                [TOTAL, ALL, {"chain_matches": 1, "staked": int(args["matchAmount"])}],
+            ]
+        if name == "MatchJoined":
+            return [[PLAYER, args["player2"], {"matches": 1}]]
+        if name == "MatchClosed":
+            return [
+                [
+                    PLAYER,
+                    args["winner"],
+                    {"wins": 1, "winnings": int(args["winnerAmount"])},
+                ]
+            ]
+        if name == "MatchDonation":
+            amount = int(args["amount"])
+            return [
+                [DONOR, args["donor"], {"donations": 1, "donated": amount}],
+                [TOTAL, ALL, {"donated": amount}],
+            ]
+        if name == "TournamentEnded":
+            deltas = [[TOTAL, ALL, {"tournaments": 1}]]
+            for place, winner in enumerate(args["winners"]):
+                metrics = {"tournament_podiums": 1}
+                if place == 0:
+                    metrics["tournament_wins"] = 1
+                deltas.append([PLAYER, winner, metrics])
+            return deltas
+        return []
+
+    def apply_events(self, events):
+        """Indexer listener: applies a batch of decoded events not applied yet."""
+        if not self._following:
+            # Replayed after the catch-up; the mark drops any overlap
+            self._backlog.append((self._apply_events, events))
+            return
+        self._apply_events(events)
+
+    def revert_events(self, events):
+        """Indexer reorg listener: subtracts the applied events a rewind removed."""
+        if not self._following:
+            self._backlog.append((self._revert_events, events))
+            return
+        self._revert_events(events)
+
+    def _revert_events(self, events):
+        if not events:
+            return
+        deltas = []
+        for event in events:
+            position = (event["blockNumber"], event["logIndex"])
+            if position > self.mark or event["event"] not in LEADERBOARD_EVENTS:
+                continue
+            for dimension, key, metrics in self._event_deltas(
+                event["event"], event["args"]
+            ):
+                negated = {metric: -delta for metric, delta in metrics.items()}
+                deltas.append([dimension, key, negated])
+        # The removed blocks are indexed again from their first block
+        first = min((event["blockNumber"], event["logIndex"]) for event in events)
+        mark = min(self.mark, (first[0], -1))
+        if not deltas and mark == self.mark:
+            return
+        self._commit(deltas, mark)
+        for board_key in {
+            (dimension, metric)
+            for dimension, _, metrics in deltas
+            for metric in metrics
+        }:
+            self.boards[board_key].rebuild(self._values(*board_key))
+
+    def _apply_events(self, events):
+        deltas = []
+        mark = self.mark
+        for event in events:
+            position = (event["blockNumber"], event["logIndex"])
+            if position <= mark or event["event"] not in LEADERBOARD_EVENTS:
+                continue
+            deltas.extend(self._event_deltas(event["event"], event["args"]))
+            mark = position
+        if mark != self.mark:
+            self._commit(deltas, mark)
+
+    # Reads
+
+    def top(self, dimension, metric, k=10):
+        """The k highest (key, value) pairs of `metric` across `dimension`."""
+        board = self.boards.get((dimension, metric))
+        if board is None:
+            return []
+        if k <= self.capacity:
+            return board.top(k)
+        return heapq.nlargest(
+            k, self._values(dimension, metric).items(), key=lambda item: item[1]
+        )
+
+    def _values(self, dimension, metric):
+        return {
+            key: counters[metric]
+            for (d, key), counters in self.counters.items()
+            if d == dimension and metric in counters
+        }
+
+    def stats(self, dimension, key):
+        return dict(self.counters.get((dimension, key), {}))
+
+    def rank(self, dimension, metric, key):
+        """1-based rank of `key` if it is on the board, else None."""
+        board = self.boards.get((dimension, metric))
+        if board is None or key not in board.members:
+            return None
+        value = board.members[key]
+        return bisect.bisect_left(board.entries, (-value, key)) + 1
+
+    # Persistence
+
+    def load(self):
+        if self.loaded:
+            return self
+        started = time.perf_counter()
+        existed = bool(self.path) and os.path.exists(self.path)
+        backfilled = None
+        if existed:
+            with open(self.path, "r") as log_file:
+                for line in log_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn last line after a crash
+                        continue
+                    for dimension, key, metrics in record.get("counters", ()):
+                        self.counters[(dimension, key)] = metrics
+                    for dimension, key, metrics in record.get("deltas", ()):
+                        counters = self.counters.setdefault((dimension, key), {})
+                        for metric, delta in metrics.items():
+                            counters[metric] = counters.get(metric, 0) + delta
+                    if "mark" in record:
+                        self.mark = tuple(record["mark"])
+                    if "backfilled" in record:
+                        backfilled = record["backfilled"]
+        # Logs written before backfills existed counted every match they saw
+        self.backfilled = existed if backfilled is None else backfilled
+        # (dimension, metric) -> {key: value}
+        values = {}
+        for (dimension, key), counters in self.counters.items():
+            for metric, value in counters.items():
+                values.setdefault((dimension, metric), {})[key] = value
+        self.boards = {}
+        for board_key, board_values in values.items():
+            board = self.boards[board_key] = TopBoard(self.capacity)
+            board.rebuild(board_values)
+        self.compact()
+        self.loaded = True
+        logger.info(
+            f"Loaded {len(self.counters)} leaderboard counters in "
+            f"{time.perf_counter() - started:.2f}s"
+        )
+        return self
+
+    def compact(self):
+        if not self.path:
+            return
+        if self._file is not None:
+            self._file.close()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as log_file:
+            log_file.write(
+                json.dumps(
+                    {
+                        "counters": [
+                            [dimension, key, counters]
+                            for (dimension, key), counters in self.counters.items()
+                        ],
+                        "mark": list(self.mark),
+                        "backfilled": self.backfilled,
+                    },
+                    separators=(",", ":"),
+                )
+                + "\n"
+            )
+        os.replace(tmp_path, self.path)
+        self._records = 0
+        self._file = open(self.path, "a")
+
+    def _append(self, record):
+        if self._file is None:
+            return
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._records += 1
+
+    async def _backfill(self, repository, page_size):
+        started = time.perf_counter()
+        count = 0
+        last = None
+        # (dimension, key) -> {metric: sum}
+        totals = {}
+        while True:
+            rows = await repository.get_matches_after(MATCH_COLUMNS, last, page_size)
+            for row in rows:
+                if str(row["match_id"]) in self._backfill_ids:
+                    continue
+                for dimension, key, metrics in self._match_deltas(row):
+                    sums = totals.setdefault((dimension, key), {})
+                    for metric, delta in metrics.items():
+                        sums[metric] = sums.get(metric, 0) + delta
+            count += len(rows)
+            if len(rows) < page_size:
+                break
+            last = rows[-1]["match_id"]
+        deltas = [[dimension, key, sums] for (dimension, key), sums in totals.items()]
+        for dimension, key, metrics in deltas:
+            self._add(dimension, key, metrics)
+        self.backfilled = True
+        self._append({"deltas": deltas, "backfilled": True})
+        self._backfill_ids = None
+        logger.info(
+            f"Backfilled the leaderboard from {count} matches in "
+            f"{time.perf_counter() - started:.2f}s"
+        )
+
+    async def _try_backfill(self, repository, page_size):
+        if repository is None:
+            return
+        try:
+            await self._backfill(repository, page_size)
+        except Exception as e:
+            # Retried at the next compaction; apply_match keeps tracking new rows
+            logger.error(f"Leaderboard backfill failed: {e!r}")
+            return
+        self.compact()
+
+    async def _run(self, indexer, repository, interval, page_size):
+        await asyncio.to_thread(self.load)
+        for deltas in self._unloaded:
+            self._commit(deltas)
+        self._unloaded = []
+        if self.backfilled or repository is None:
+            self._backfill_ids = None
+        else:
+            await self._try_backfill(repository, page_size)
+        # Events indexed while the bot was down
+        missed = await asyncio.to_thread(
+            indexer.store.events_since, *self.mark, LEADERBOARD_EVENTS
+        )
+        self._apply_events(missed)
+        for handler, events in self._backlog:
+            handler(events)
+        self._backlog = []
+        self._following = True
+        while True:
+            await asyncio.sleep(interval)
+            if not self.backfilled:
+                await self._try_backfill(repository, page_size)
+            if self._records:
+                self.compact()
+
+    def start(
+        self,
+        indexer,
+        repository=None,
+        interval=LEADERBOARD_COMPACT_INTERVAL,
+        page_size=LEADERBOARD_BACKFILL_PAGE,
+    ):
+        """
+        Loads, catches up and follows `indexer` once; safe to call from every on_ready.
+        `repository` backfills the match counters when there is no log yet.
+        """
+        if self._task is None:
+            indexer.add_listener(self.apply_events)
+            indexer.add_reorg_listener(self.revert_events)
+            self._task = asyncio.create_task(
+                self._run(indexer, repository, interval, page_size)
+            )
+        return self._task
@@ -0,0 +1,210 @@
+import asyncio
+import bisect
+import contextvars
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# 0 disables the endpoint
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+# Flows slower than this many seconds are candidates for the slow-request log
+SLOW_REQUEST_THRESHOLD = float(os.getenv("SLOW_REQUEST_THRESHOLD", "1.0"))
+# Fraction of slow flows that are actually logged
+SLOW_REQUEST_SAMPLE_RATE = float(os.getenv("SLOW_REQUEST_SAMPLE_RATE", "0.1"))
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_flow = contextvars.ContextVar("metrics_flow", default=None)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; observing is one bisect and three additions."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class _Flow:
+    __slots__ = ("name", "started", "stages")
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.stages = []
+
+
+class Metrics:
+    """
+    Per-stage latency histograms and error counters for the bot's command and button
+    flows, served in the Prometheus text format on a local endpoint.
+
+    A flow is one command or button click; its stages are the steps inside it. The
+    current flow is tracked in a context variable, so a stage anywhere under a flow
+    (including in helpers it calls) is attributed to it. Flows slower than
+    SLOW_REQUEST_THRESHOLD are logged with their stage breakdown, sampled at
+    SLOW_REQUEST_SAMPLE_RATE.
+
+    Usage:
+        with metrics.flow("1v1"):
+            with metrics.stage("channel"):
+                channel = await channel_pool.acquire(...)
+            if channel is None:
+                metrics.error("1v1", "no_channel")
+    """
+
+    def __init__(
+        self,
+        slow_threshold=SLOW_REQUEST_THRESHOLD,
+        slow_sample_rate=SLOW_REQUEST_SAMPLE_RATE,
+    ):
+        self.slow_threshold = slow_threshold
+        self.slow_sample_rate = slow_sample_rate
+        # flow -> Histogram
+        self.flows = {}
+        # (flow, stage) -> Histogram
+        self.stages = {}
+        # (flow, cause) -> count
+        self.errors = {}
+        self._server = None
+        self._task = None
+
+    @contextmanager
+    def flow(self, name):
+        current = _Flow(name)
+        token = _current_flow.set(current)
+        try:
+            yield current
+        except Exception as e:
+            self.error(name, type(e).__name__)
+            raise
+        finally:
+            _current_flow.reset(token)
+            elapsed = time.perf_counter() - current.started
+            histogram = self.flows.get(name)
+            if histogram is None:
+                histogram = self.flows[name] = Histogram()
+            histogram.observe(elapsed)
+            if (
+                elapsed >= self.slow_threshold
+                and random.random() < self.slow_sample_rate
+            ):
+                self._log_slow(current, elapsed)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            current = _current_flow.get()
+            flow_name = current.name if current is not None else ""
+            key = (flow_name, name)
+            histogram = self.stages.get(key)
+            if histogram is None:
+                histogram = self.stages[key] = Histogram()
+            histogram.observe(elapsed)
+            if current is not None:
+                current.stages.append((name, elapsed))
+
+    def error(self, flow, cause):
+        key = (flow, cause)
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+    def _log_slow(self, current, elapsed):
+        breakdown = [
+            f"{name} {seconds * 1000:.0f} ms" for name, seconds in current.stages
+        ]
+        other = elapsed - sum(seconds for _, seconds in current.stages)
+        breakdown.append(f"other {other * 1000:.0f} ms")
+        logger.warning(
+            f"Slow {current.name}: {elapsed * 1000:.0f} ms ({', '.join(breakdown)})"
+        )
+
+    def render(self):
+        lines = [
+            "# HELP bot_flow_seconds Latency of command and button flows.",
+            "# TYPE bot_flow_seconds histogram",
+        ]
+        for name, histogram in sorted(self.flows.items()):
+            lines.extend(histogram.render("bot_flow_seconds", f'flow="{name}"'))
+        lines += [
+            "# HELP bot_stage_seconds Latency of the stages inside each flow.",
+            "# TYPE bot_stage_seconds histogram",
+        ]
+        for (flow, stage), histogram in sorted(self.stages.items()):
+            lines.extend(
+                histogram.render("bot_stage_seconds", f'flow="{flow}",stage="{stage}"')
+            )
+        lines += [
+            "# HELP bot_errors_total Failed flows by cause.",
+            "# TYPE bot_errors_total counter",
+        ]
+        for (flow, cause), count in sorted(self.errors.items()):
+            lines.append(f'bot_errors_total{{flow="{flow}",cause="{cause}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (
+                b"\r\n",
+                b"\n",
+                b"",
+            ):
+                pass
+            parts = request.split()
+            if len(parts) > 1 and parts[1] == b"/metrics":
+                status, body = "200 OK", self.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve(self, host, port):
+        try:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        except OSError as e:
+            logger.warning(f"Metrics endpoint not started on {host}:{port}: {e}")
+            return
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+
+    def start(self, host=METRICS_HOST, port=METRICS_PORT):
+        """Starts the /metrics endpoint; safe to call repeatedly."""
+        if not port or self._task is not None:
+            return self._task
+        self._task = asyncio.create_task(self._serve(host, port))
+        return self._task
@@ -0,0 +1,199 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+
+from .rate_limiter import TOKEN_BUCKET, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# Seconds a channel's first queued message waits for others to merge with
+OUTBOX_WINDOW = float(os.getenv("OUTBOX_WINDOW", "0.05"))
+# Discord messages are capped at 2000 characters
+MAX_MESSAGE_LENGTH = 2000
+
+GLOBAL_ROUTE = "global"
+CHANNEL_ROUTE = "channel"
+MESSAGE_ROUTE = "message"
+# Discord buckets the bots pace themselves against: (requests, seconds).
+# Interaction responses and followups do not count against the global limit.
+ROUTE_LIMITS = {
+    # Discord allows 50 requests per second per bot; leave room for everything else.
+    # A quarter second's worth at most in one burst, so that the burst plus a second
+    # of refill stays under 50 in any one-second window.
+    GLOBAL_ROUTE: (
+        int(os.getenv("DISCORD_GLOBAL_RATE", os.getenv("JOIN_GLOBAL_RATE", "40"))) // 4,
+        0.25,
+    ),
+    # Channel creation and edits, per guild
+    CHANNEL_ROUTE: (
+        int(os.getenv("DISCORD_CHANNEL_RATE", os.getenv("JOIN_CHANNEL_RATE", "20"))),
+        1.0,
+    ),
+    # Messages, per channel
+    MESSAGE_ROUTE: (5, 5.0),
+}
+
+# Priorities for the global bucket, lowest first
+RESPONSE = 0  # messages that are part of a command's answer
+NOTICE = 1  # everything else
+
+
+class RouteBuckets:
+    """
+    Client-side token buckets for Discord routes, so a burst of work is spread under
+    the limits instead of running into 429s. `acquire` waits for a token in the
+    route's bucket for `key` (a guild or channel ID) and then in the global bucket.
+
+    Each route key waits on its own bucket, so a busy channel or guild only delays its
+    own requests. The global bucket is handed out in priority order: when it runs dry,
+    RESPONSE requests go before NOTICE requests that were waiting longer.
+
+    Args:
+        limits (dict): route -> (requests, seconds).
+    """
+
+    def __init__(self, limits=ROUTE_LIMITS):
+        self.limiters = {
+            route: RateLimiter(limit, window, mode=TOKEN_BUCKET)
+            for route, (limit, window) in limits.items()
+        }
+        self.waits = 0
+        # [priority, sequence, future] waiting for a global token
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._admitting = None
+
+    async def _take(self, route, key):
+        limiter = self.limiters[route]
+        while not limiter.check(key):
+            self.waits += 1
+            await asyncio.sleep(limiter.window / limiter.limit)
+
+    async def _admit(self):
+        limiter = self.limiters[GLOBAL_ROUTE]
+        try:
+            while self._waiting:
+                if limiter.check(None):
+                    _, _, future = heapq.heappop(self._waiting)
+                    if not future.done():
+                        future.set_result(None)
+                else:
+                    self.waits += 1
+                    await asyncio.sleep(limiter.window / limiter.limit)
+        finally:
+            self._admitting = None
+
+    async def _take_global(self, priority):
+        if not self._waiting and self.limiters[GLOBAL_ROUTE].check(None):
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, [priority, next(self._sequence), future])
+        if self._admitting is None:
+            self._admitting = asyncio.create_task(self._admit())
+        await future
+
+    async def acquire(self, route, key=None, priority=NOTICE):
+        if route != GLOBAL_ROUTE:
+            await self._take(route, key)
+        await self._take_global(priority)
+
+
+class Outbox:
+    """
+    Per-channel scheduler for the bots' channel messages.
+
+    `send` queues a message and returns right away. A channel's queue is drained by
+    its own task: it waits `window` seconds so that the other messages of the same
+    command can join, takes a token from the channel's message bucket and then the
+    global bucket, and sends the queued text as one message, joined with newlines. A
+    message with a view, embed or file is sent on its own, in order. Messages queued
+    while a channel waits for its bucket are merged into the same send. A hot channel
+    therefore only delays itself, and a burst in one channel becomes a few large
+    messages instead of a queue of 429s.
+
+    Interaction responses and followups never go through the outbox. They use the
+    interaction's own webhook, outside the global limit, so a command answers its user
+    without waiting behind channel messages. Channel messages that are part of a
+    command's answer are queued as RESPONSE and are admitted to the global bucket
+    before NOTICE messages.
+
+    The future returned by `send` resolves to the sent message, or to None if the send
+    failed; failures are logged.
+
+    Usage:
+        outbox = Outbox()
+        outbox.send(channel, "Your private match channel is ready!", RESPONSE)
+        await interaction.followup.send("Done!", ephemeral=True)
+    """
+
+    def __init__(self, buckets=None, window=OUTBOX_WINDOW):
+        self.buckets = buckets or RouteBuckets()
+        self.window = window
+        # channel ID -> [(content, kwargs, priority, future)]
+        self._queues = {}
+        # channel ID -> drain task
+        self._tasks = {}
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+
+    def send(self, channel, content=None, priority=NOTICE, **kwargs):
+        """Queues a message for `channel`; kwargs are passed on to channel.send."""
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(channel.id, []).append(
+            (content, kwargs, priority, future)
+        )
+        self.queued += 1
+        if channel.id not in self._tasks:
+            self._tasks[channel.id] = asyncio.create_task(self._drain(channel))
+        return future
+
+    def _next_batch(self, queue):
+        """Pops the messages that go out in the next send from the front of `queue`."""
+        if queue[0][1]:
+            return [queue.pop(0)]
+        batch = [queue.pop(0)]
+        length = len(batch[0][0] or "")
+        while queue and not queue[0][1]:
+            added = len(queue[0][0] or "") + 1
+            if length + added > MAX_MESSAGE_LENGTH:
+                break
+            length += added
+            batch.append(queue.pop(0))
+        return batch
+
+    async def _send(self, channel, batch):
+        content = "\n".join(message[0] for message in batch if message[0] is not None)
+        try:
+            message = await channel.send(content or None, **batch[0][1])
+            self.sent += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(
+                f"Failed to send {len(batch)} message(s) to channel {channel.id}: {e!r}"
+            )
+            message = None
+        for _, _, _, future in batch:
+            if not future.done():
+                future.set_result(message)
+
+    async def _drain(self, channel):
+        try:
+            await asyncio.sleep(self.window)
+            while self._queues.get(channel.id):
+                queue = self._queues[channel.id]
+                priority = min(message[2] for message in queue)
+                await self.buckets.acquire(MESSAGE_ROUTE, channel.id, priority)
+                # Messages queued while waiting for the bucket go out in this send too
+                await self._send(channel, self._next_batch(queue))
+        finally:
+            del self._tasks[channel.id]
+            if not self._queues.get(channel.id):
+                self._queues.pop(channel.id, None)
+
+    async def flush(self):
+        """Waits until every queued message has been sent."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+VIEW_SNAPSHOT_PATH = os.getenv("VIEW_SNAPSHOT_PATH", "views.snapshot")
+# Compact the snapshot once dead records outnumber live ones by this factor
+VIEW_SNAPSHOT_COMPACT_RATIO = 2
+
+
+class ViewSnapshot:
+    """
+    On-disk record of the buttons that must keep working across restarts, as a map
+    from custom_id to the JSON state needed to rebuild the button.
+
+    The file is a log of {"put": custom_id, "state": ...} and {"del": custom_id} lines,
+    so each change is one small append. `load` replays it and rewrites it with only the
+    live entries; the log is also rewritten when it grows to VIEW_SNAPSHOT_COMPACT_RATIO
+    times the live entries.
+
+    `load` may run in a worker thread: changes made before it finishes are queued and
+    applied once the file is read. On an event loop, compaction writes a copy of the
+    entries in a worker thread and appends the changes made meanwhile before swapping
+    the file in, so states must not be modified once they are put.
+
+    Args:
+        path (str): Snapshot file.
+    """
+
+    def __init__(self, path=VIEW_SNAPSHOT_PATH):
+        self.path = path
+        self.entries = {}
+        self.loaded = False
+        self._records = 0
+        self._file = None
+        # Records changed before `load` finished
+        self._pending = []
+        self._lock = threading.Lock()
+        # Records appended while a background compaction writes its copy
+        self._tail = None
+        self._compacting = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, custom_id):
+        return self.entries.get(custom_id)
+
+    def load(self):
+        if self.loaded:
+            return self
+        started = time.perf_counter()
+        entries = {}
+        if self.path and os.path.exists(self.path):
+            with open(self.path, "r") as snapshot_file:
+                for line in snapshot_file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn last line after a crash
+                        continue
+                    if "put" in record:
+                        entries[record["put"]] = record["state"]
+                    else:
+                        entries.pop(record.get("del"), None)
+        tmp_path = self._write(entries) if self.path else None
+        with self._lock:
+            self.entries = entries
+            if tmp_path is not None:
+                self._swap(tmp_path, len(entries))
+            for record in self._pending:
+                self._apply(record)
+            self._pending = []
+            self.loaded = True
+        logger.info(
+            f"Loaded {len(self.entries)} persistent views in "
+            f"{time.perf_counter() - started:.2f}s"
+        )
+        return self
+
+    def _write(self, entries):
+        """Writes `entries` to the temporary file; returns its path."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as snapshot_file:
+            for custom_id, state in entries.items():
+                snapshot_file.write(
+                    json.dumps(
+                        {"put": custom_id, "state": state}, separators=(",", ":")
+                    )
+                    + "\n"
+                )
+        return tmp_path
+
+    def _swap(self, tmp_path, records):
+        if self._file is not None:
+            self._file.close()
+        os.replace(tmp_path, self.path)
+        self._records = records
+        self._file = open(self.path, "a")
+
+    def compact(self):
+        if not self.path:
+            return
+        self._swap(self._write(self.entries), len(self.entries))
+
+    async def _compact_in_background(self):
+        entries = dict(self.entries)
+        self._tail = []
+        try:
+            tmp_path = await asyncio.to_thread(self._write, entries)
+            with open(tmp_path, "a") as snapshot_file:
+                for record in self._tail:
+                    snapshot_file.write(
+                        json.dumps(record, separators=(",", ":")) + "\n"
+                    )
+            self._swap(tmp_path, len(entries) + len(self._tail))
+        except Exception as e:
+            logger.error(f"Failed to compact the view snapshot: {e}")
+        finally:
+            self._tail = None
+            self._compacting = None
+
+    def _apply(self, record):
+        if "put" in record:
+            self.entries[record["put"]] = record["state"]
+        elif self.entries.pop(record["del"], None) is None:
+            return
+        if self._file is None:
+            return
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self._records += 1
+        if self._tail is not None:
+            self._tail.append(record)
+        if self._compacting is not None or self._records <= (
+            VIEW_SNAPSHOT_COMPACT_RATIO * max(len(self.entries), 1000)
+        ):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.compact()
+            return
+        self._compacting = loop.create_task(self._compact_in_background())
+
+    def _change(self, record):
+        with self._lock:
+            if not self.loaded:
+                self._pending.append(record)
+                return
+        self._apply(record)
+
+    def put(self, custom_id, state):
+        self._change({"put": custom_id, "state": state})
+
+    def remove(self, custom_id):
+        self._change({"del": custom_id})
+
+
+class PersistentViewRouter:
+    """
+    Routes button clicks to handlers by custom_id prefix, using the state saved in a
+    ViewSnapshot, so buttons sent before a restart keep working.
+
+    py-cord's own persistent views (`bot.add_view`) re-check every registered view on
+    each add_view and on each click, which makes registering tens of thousands of them
+    quadratic. Here a button's custom_id is "<prefix><key>", its state lives in the
+    snapshot, and `route` rebuilds the button from that state with the factory
+    registered for the prefix and runs its callback. A restart only has to read the
+    snapshot back.
+
+    Views sent with `send_view` are stopped right after sending, so py-cord stops
+    tracking them and every click goes through the router.
+
+    The snapshot is read by `load` in a worker thread after login; clicks arriving
+    before that wait for it. Several bots' command sets can share one router, each
+    registering its own prefixes: `attach` and `load` only act once.
+
+    Usage:
+        router = PersistentViewRouter(ViewSnapshot())
+        router.register("accept_1v1:", AcceptButton.from_state)
+        router.attach(bot)
+        await router.load()
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.factories = {}
+        self._bots = []
+        self._loading = None
+        self._loaded = asyncio.Event()
+
+    def attach(self, bot):
+        """Routes `bot`'s component interactions through this router."""
+        if any(attached is bot for attached in self._bots):
+            return
+        self._bots.append(bot)
+        bot.add_listener(self.route, "on_interaction")
+
+    async def load(self):
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(asyncio.to_thread(self.snapshot.load))
+        await self._loading
+        self._loaded.set()
+
+    def register(self, prefix, factory):
+        """`factory(key, state)` returns a discord.ui.Button whose callback handles the click."""
+        self.factories[prefix] = factory
+
+    def remember(self, custom_id, state):
+        self.snapshot.put(custom_id, state)
+
+    def forget(self, custom_id):
+        self.snapshot.remove(custom_id)
+
+    async def send_view(self, send, button, state, **kwargs):
+        """Sends `button` in a fresh view through `send` and saves its state."""
+        view = discord.ui.View(timeout=None)
+        view.add_item(button)
+        self.remember(button.custom_id, state)
+        message = await send(view=view, **kwargs)
+        view.stop()
+        # A first interaction response returns the Interaction, not the message
+        channel = getattr(message, "channel", None)
+        if not isinstance(message, discord.Interaction) and channel is not None:
+            # Where the button is, so `replace_view` can edit it later
+            self.remember(
+                button.custom_id, dict(state, message=[channel.id, message.id])
+            )
+        return message
+
+    async def replace_view(self, old_custom_id, button, state):
+        """
+        Moves the button saved as `old_custom_id` to `button`, e.g. when the ID in its
+        custom_id changed, and edits the message it was sent in. If the message cannot
+        be edited, clicks on the old button are routed with the new state.
+        """
+        location = (self.snapshot.get(old_custom_id) or {}).get("message")
+        if location is not None:
+            state = dict(state, message=location)
+        self.remember(button.custom_id, state)
+        if location is not None and self._bots:
+            view = discord.ui.View(timeout=None)
+            view.add_item(button)
+            try:
+                channel = self._bots[0].get_partial_messageable(location[0])
+                await channel.get_partial_message(location[1]).edit(view=view)
+                self.forget(old_custom_id)
+                return True
+            except Exception as e:
+                logger.error(f"Failed to edit the message of {old_custom_id}: {e}")
+            finally:
+                view.stop()
+        self.remember(old_custom_id, state)
+        return False
+
+    async def route(self, interaction):
+        if interaction.type != discord.InteractionType.component:
+            return
+        custom_id = (interaction.data or {}).get("custom_id", "")
+        for prefix, factory in self.factories.items():
+            if not custom_id.startswith(prefix):
+                continue
+            await self._loaded.wait()
+            state = self.snapshot.get(custom_id)
+            if state is None:
+                await interaction.response.send_message(
+                    "This button is no longer active.", ephemeral=True
+                )
+                return
+            button = factory(custom_id[len(prefix) :], state)
+            try:
+                await button.callback(interaction)
+            except Exception as e:
+                logger.error(f"Button {custom_id} failed: {str(e)}")
+            return
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+
+import httpx
+from postgrest import AsyncPostgrestClient
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+SUPABASE_MAX_CONCURRENCY = int(os.getenv("SUPABASE_MAX_CONCURRENCY", "10"))
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+
+
+def shared_transport(pool_size=SUPABASE_POOL_SIZE):
+    """Connection pool that the repositories of several Supabase projects can share."""
+    return httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size
+        )
+    )
+
+
+class Repository:
+    """
+    Async data access for the Supabase tables used by the bots: matches, tournaments,
+    tournament_entrants and tournament_channels.
+
+    One pooled httpx.AsyncClient backs every query, so connections to PostgREST are reused
+    across commands. At most `max_concurrency` queries are in flight at once and each one is
+    bounded by `timeout` seconds; a timed out query raises asyncio.TimeoutError.
+
+    Repositories of different projects can pass the same `transport` to share one
+    connection pool; each keeps its own URL, key and concurrency limit.
+
+    Args:
+        url (str): Supabase project URL.
+        key (str): Supabase API key.
+        timeout (float): Per-query timeout in seconds.
+        max_concurrency (int): Maximum number of queries in flight.
+        pool_size (int): Maximum number of pooled HTTP connections.
+        transport (httpx.AsyncHTTPTransport, optional): Shared connection pool, used
+            instead of one of `pool_size` connections.
+    """
+
+    def __init__(
+        self,
+        url,
+        key,
+        timeout=SUPABASE_TIMEOUT,
+        max_concurrency=SUPABASE_MAX_CONCURRENCY,
+        pool_size=SUPABASE_POOL_SIZE,
+        transport=None,
+    ):
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+        self._owns_transport = transport is None
+        self._http = httpx.AsyncClient(
+            headers=headers,
+            timeout=timeout,
+            transport=transport or shared_transport(pool_size),
+            follow_redirects=True,
+        )
+        self._client = AsyncPostgrestClient(
+            f"{url}/rest/v1", headers=headers, http_client=self._http
+        )
+
+    async def execute(self, query):
+        async with self._semaphore:
+            return await asyncio.wait_for(query.execute(), self.timeout)
+
+    def table(self, name):
+        return self._client.from_(name)
+
+    # Generic operations
+
+    async def insert(self, table, rows):
+        return await self.execute(self.table(table).insert(rows))
+
+    async def upsert(self, table, rows, on_conflict="", ignore_duplicates=False):
+        return await self.execute(
+            self.table(table).upsert(
+                rows, on_conflict=on_conflict, ignore_duplicates=ignore_duplicates
+            )
+        )
+
+    async def update(self, table, fields, column, value):
+        return await self.execute(self.table(table).update(fields).eq(column, value))
+
+    async def find(self, table, filters):
+        """Returns the rows of `table` whose columns equal `filters` ({column: value})."""
+        query = self.table(table).select("*")
+        for column, value in filters.items():
+            query = query.eq(column, value)
+        return (await self.execute(query)).data
+
+    async def select(self, table, columns, column, value, limit=None):
+        query = self.table(table).select(columns).eq(column, value)
+        if limit is not None:
+            query = query.limit(limit)
+        return await self.execute(query)
+
+    # matches
+
+    async def insert_match(self, match_data):
+        return await self.insert("matches", match_data)
+
+    async def update_match(self, match_id, fields):
+        return await self.update("matches", fields, "match_id", str(match_id))
+
+    async def get_match_channel_id(self, match_id):
+        response = await self.select(
+            "matches", "channel_id", "match_id", str(match_id), limit=1
+        )
+        if response.data:
+            return response.data[0]["channel_id"]
+        return None
+
+    async def get_match_channel_ids(self, match_ids):
+        """Returns {match_id: channel_id} for those of `match_ids` that exist."""
+        response = await self.execute(
+            self.table("matches")
+            .select("match_id,channel_id")
+            .in_("match_id", [str(match_id) for match_id in match_ids])
+        )
+        return {row["match_id"]: row["channel_id"] for row in response.data}
+
+    async def get_matches_after(self, columns, match_id, limit):
+        """Up to `limit` matches after `match_id` (None for the first page), in order."""
+        query = self.table("matches").select(columns).order("match_id").limit(limit)
+        if match_id is not None:
+            query = query.gt("match_id", match_id)
+        return (await self.execute(query)).data
+
+    async def get_open_matches(self, limit):
+        response = await self.execute(
+            self.table("matches")
+            .select(
+                "match_id,channel_id,player1_name,platform,category,game,"
+                "match_amount_usd"
+            )
+            .is_("player2_name", "null")
+            .limit(limit)
+        )
+        return response.data
+
+    async def get_match_games(self, limit):
+        """The category and game of the `limit` last matches by match_id."""
+        response = await self.execute(
+            self.table("matches")
+            .select("category,game")
+            .order("match_id", desc=True)
+            .limit(limit)
+        )
+        return response.data
+
+    # tournaments
+
+    async def insert_tournament(self, tournament_data):
+        return await self.insert("tournaments", tournament_data)
+
+    async def update_tournament(self, tournament_id, fields):
+        return await self.update("tournaments", fields, "id", tournament_id)
+
+    # tournament_entrants
+
+    async def insert_entrant(self, tournament_id, user_id):
+        return await self.insert(
+            "tournament_entrants", {"tournament_id": tournament_id, "user_id": user_id}
+        )
+
+    async def get_entrants(self, tournament_id):
+        response = await self.select(
+            "tournament_entrants", "user_id", "tournament_id", tournament_id
+        )
+        return [row["user_id"] for row in response.data]
+
+    # tournament_channels
+
+    async def insert_tournament_channel(self, tournament_id, channel_id):
+        return await self.insert(
+            "tournament_channels",
+            {"tournament_id": tournament_id, "channel_id": str(channel_id)},
+        )
+
+    async def close(self):
+        # A shared pool is closed by its owner
+        if self._owns_transport:
+            await self._http.aclose()
@@ -0,0 +1,218 @@
+import asyncio
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+from .write_queue import WriteBehindQueue
+from .metrics import Metrics
+from . import startup_profile
+
+# The process-wide clients both bots build on. A process hosting several bots
+# (combined_bot/main.py) imports this module once, so they all share one contract
+# client, event indexer, channel pool, button router, message intent router,
+# leaderboard and outbox, and pace their messages against the same Discord buckets.
+# Each bot keeps its own Supabase project: there is one repository and write-behind
+# queue per project, and the projects share one connection pool.
+#
+# contract_client (web3), indexer (eth_abi) and repository (httpx, postgrest) are
+# imported by the getters below on first use: together they cost about a second of
+# imports that should not delay the bot's login.
+
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "10"))
+WRITE_QUEUE_SPOOL_PATH = os.getenv("WRITE_QUEUE_SPOOL_PATH", "write_queue.spool")
+
+# (url, key) of each Supabase project -> its repository, once built
+_repositories = {}
+_write_queues = {}
+_supabase_transport = None
+_indexer = None
+_metrics = None
+_channel_pool = None
+_view_router = None
+_leaderboard = None
+_outbox = None
+_intent_router = None
+_services_task = None
+# The getters are also called from warm-up threads
+_init_lock = threading.RLock()
+
+
+def configure_repository(url, key):
+    """Registers a bot's Supabase project, so that warm_up builds its repository."""
+    with _init_lock:
+        _repositories.setdefault((url, key), None)
+
+
+def get_supabase_repository(url, key):
+    """Returns the repository of a Supabase project, building it on first use."""
+    global _supabase_transport
+    with _init_lock:
+        repository = _repositories.get((url, key))
+        if repository is None:
+            from .repository import Repository, shared_transport
+
+            if _supabase_transport is None:
+                _supabase_transport = shared_transport()
+            repository = Repository(url, key, transport=_supabase_transport)
+            _repositories[(url, key)] = repository
+    return repository
+
+
+def get_repositories():
+    """Builds the repository of every registered Supabase project."""
+    with _init_lock:
+        projects = list(_repositories)
+    return [get_supabase_repository(url, key) for url, key in projects]
+
+
+def get_contract_client():
+    """Returns the process-wide contract client, importing web3 on first use."""
+    from . import contract_client
+
+    return contract_client.get_contract_client()
+
+
+def spool_path_for(url):
+    """WRITE_QUEUE_SPOOL_PATH with the project's host in it, one file per project."""
+    root, extension = os.path.splitext(WRITE_QUEUE_SPOOL_PATH)
+    project = re.sub(r"[^A-Za-z0-9]+", "-", urlsplit(url).netloc).strip("-")
+    return f"{root}.{project}{extension}"
+
+
+def get_supabase_write_queue(url, key):
+    """Returns the write-behind queue of a Supabase project, building it on first use."""
+    with _init_lock:
+        write_queue = _write_queues.get((url, key))
+        if write_queue is None:
+            write_queue = WriteBehindQueue(
+                get_supabase_repository(url, key), spool_path=spool_path_for(url)
+            )
+            _write_queues[(url, key)] = write_queue
+    return write_queue
+
+
+def get_metrics():
+    """Returns the process-wide latency histograms and error counters."""
+    global _metrics
+    with _init_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+    return _metrics
+
+
+def get_indexer():
+    """Returns the process-wide event indexer, building it on first use."""
+    global _indexer
+    with _init_lock:
+        if _indexer is None:
+            from .indexer import EventIndexer, EventStore
+
+            client = get_contract_client()
+            _indexer = EventIndexer(client.web3, client.contract, EventStore())
+            if client.cache is not None:
+                # The cache reads the newest blocks' events itself: the indexer lags
+                client.cache.follow(_indexer.fetch_events)
+    return _indexer
+
+
+def get_channel_pool():
+    """Returns the process-wide pool of pre-created private channels."""
+    global _channel_pool
+    with _init_lock:
+        if _channel_pool is None:
+            from .channel_pool import ChannelPool
+
+            _channel_pool = ChannelPool()
+    return _channel_pool
+
+
+def get_view_router():
+    """Returns the process-wide router for persistent buttons and its snapshot."""
+    global _view_router
+    with _init_lock:
+        if _view_router is None:
+            from .persistent_views import PersistentViewRouter, ViewSnapshot
+
+            _view_router = PersistentViewRouter(ViewSnapshot())
+    return _view_router
+
+
+def get_leaderboard():
+    """Returns the process-wide incremental match and event statistics."""
+    global _leaderboard
+    with _init_lock:
+        if _leaderboard is None:
+            from .leaderboard import Leaderboard
+
+            _leaderboard = Leaderboard()
+    return _leaderboard
+
+
+def get_outbox():
+    """Returns the process-wide channel message scheduler and its Discord buckets."""
+    global _outbox
+    with _init_lock:
+        if _outbox is None:
+            from .outbound import Outbox
+
+            _outbox = Outbox()
+    return _outbox
+
+
+def get_intent_router():
+    """Returns the process-wide router that answers users' messages by intent."""
+    global _intent_router
+    with _init_lock:
+        if _intent_router is None:
+            from .intent_classifier import IntentClassifier, IntentRouter
+
+            _intent_router = IntentRouter(IntentClassifier(), get_outbox())
+    return _intent_router
+
+
+def get_head_block():
+    client = get_contract_client()
+    if client.cache is not None:
+        return client.cache.head_block()
+    return client.web3.eth.block_number
+
+
+async def warm_up():
+    """
+    Builds the chain, event store and Supabase clients and opens the RPC connection
+    concurrently in worker threads, so none of it runs at import time or on the loop.
+    """
+    return await startup_profile.warm_up(
+        {
+            "contract_client": get_contract_client,
+            "indexer": get_indexer,
+            "repository": get_repositories,
+            "rpc_head_block": get_head_block,
+        },
+        timeout=RPC_TIMEOUT,
+    )
+
+
+def start_services(guilds, get_repository=None):
+    """
+    Warms up the clients, then starts the process-wide services: button snapshot,
+    metrics, event indexer, channel pool and leaderboard. The leaderboard backfills
+    from the matches of `get_repository()`, called once the warm-up has built it.
+    Only the first call starts them and every call returns the same task, so a process
+    hosting several bots (combined_bot/main.py) calls it before the bots' own on_ready.
+    """
+    global _services_task
+    if _services_task is None:
+        _services_task = asyncio.ensure_future(_start_services(guilds, get_repository))
+    return _services_task
+
+
+async def _start_services(guilds, get_repository):
+    await asyncio.gather(
+        startup_profile.timed("view_snapshot", get_view_router().load()), warm_up()
+    )
+    get_metrics().start()
+    get_indexer().start()
+    get_channel_pool().start(guilds)
+    repository = get_repository() if get_repository is not None else None
+    get_leaderboard().start(get_indexer(), repository)
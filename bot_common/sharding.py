@@ -0,0 +1,158 @@
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+# Unset: one unsharded Bot. "auto": AutoShardedBot with Discord's recommended count.
+SHARD_COUNT = os.getenv("SHARD_COUNT")
+# Comma-separated shard IDs this process runs; set per worker by the launcher
+SHARD_IDS = os.getenv("SHARD_IDS")
+# Discord allows one IDENTIFY per this many seconds (max_concurrency 1)
+IDENTIFY_INTERVAL = 5
+# Seconds before a crashed worker is started again
+WORKER_RESTART_DELAY = 5
+
+# Files each worker must own: the launcher gives every worker its own copy
+PER_WORKER_PATHS = {
+    "WRITE_QUEUE_SPOOL_PATH": "write_queue.spool",
+    "VIEW_SNAPSHOT_PATH": "views.snapshot",
+    "INDEXER_DB_PATH": "events.sqlite3",
+    "INTENT_LABEL_LOG_PATH": "intent_label_log.jsonl",
+    "BRACKET_STORE_PATH": "brackets.log",
+    "LEADERBOARD_PATH": "leaderboard.log",
+}
+# Local HTTP endpoints: each worker serves on the base port plus its worker number
+PER_WORKER_PORTS = {
+    "METRICS_PORT": "9108",
+    "CHANNEL_INDEX_PORT": "9180",
+}
+# Cross-shard state: every worker opens the same SQLite database
+SHARED_PATHS = {
+    "ID_ALLOCATOR_DB_PATH": "id_allocator.sqlite3",
+    "RATE_LIMIT_DB_PATH": "rate_limits.sqlite3",
+}
+
+
+def create_bot(**options):
+    """
+    Returns a commands.Bot, or a commands.AutoShardedBot when SHARD_COUNT is set,
+    limited to SHARD_IDS when the launcher runs this process as one of its workers.
+    """
+    if not SHARD_COUNT:
+        return commands.Bot(**options)
+    if SHARD_COUNT != "auto":
+        options["shard_count"] = int(SHARD_COUNT)
+    if SHARD_IDS:
+        options["shard_ids"] = [int(shard_id) for shard_id in SHARD_IDS.split(",")]
+    return commands.AutoShardedBot(**options)
+
+
+def shard_ids_for(worker, workers, shard_count):
+    return list(range(worker, shard_count, workers))
+
+
+def worker_path(path, worker):
+    root, ext = os.path.splitext(path)
+    return f"{root}.{worker}{ext}"
+
+
+def worker_env(worker, workers, shard_count, base_env=None):
+    env = dict(os.environ if base_env is None else base_env)
+    env["SHARD_COUNT"] = str(shard_count)
+    env["SHARD_IDS"] = ",".join(
+        str(shard_id) for shard_id in shard_ids_for(worker, workers, shard_count)
+    )
+    env["SHARD_WORKER"] = str(worker)
+    for name, default in PER_WORKER_PATHS.items():
+        env[name] = worker_path(env.get(name, default), worker)
+    for name, default in SHARED_PATHS.items():
+        env.setdefault(name, default)
+    for name, default in PER_WORKER_PORTS.items():
+        port = int(env.get(name, default))
+        if port:
+            env[name] = str(port + worker)
+    return env
+
+
+class ShardLauncher:
+    """
+    Runs `script` in `workers` processes that split `shard_count` shards between them,
+    and restarts any worker that exits.
+
+    Each worker is an AutoShardedBot over its own shards (see create_bot) with its own
+    connection pools, caches, write-behind spool, view snapshot and event store; guilds
+    map to shards by ID, so a worker only ever sees its own guilds. Match and
+    tournament IDs and rate limits are shared through SQLite databases that every
+    worker opens (SHARED_PATHS).
+
+    Workers are started one after the other, IDENTIFY_INTERVAL seconds per shard
+    apart, to stay within Discord's IDENTIFY rate limit. Keep the shard and worker
+    counts stable: a guild's persistent buttons live in the snapshot of the worker
+    that ran its shard.
+
+    Usage:
+        python sharding.py --shards 8 --workers 4 main.py
+    """
+
+    def __init__(self, script, shard_count, workers):
+        self.script = script
+        self.shard_count = shard_count
+        self.workers = min(workers, shard_count)
+        self.processes = {}
+        self._stopping = False
+
+    def _spawn(self, worker):
+        env = worker_env(worker, self.workers, self.shard_count)
+        logger.info(f"Starting worker {worker} with shards {env['SHARD_IDS']}")
+        self.processes[worker] = subprocess.Popen(
+            [sys.executable, self.script], env=env
+        )
+
+    def stop(self, *args):
+        self._stopping = True
+        for process in self.processes.values():
+            if process.poll() is None:
+                process.terminate()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for worker in range(self.workers):
+            if self._stopping:
+                break
+            self._spawn(worker)
+            shards = len(shard_ids_for(worker, self.workers, self.shard_count))
+            time.sleep(IDENTIFY_INTERVAL * shards)
+        while not self._stopping:
+            for worker, process in list(self.processes.items()):
+                if process.poll() is not None and not self._stopping:
+                    logger.warning(
+                        f"Worker {worker} exited with {process.returncode}, restarting"
+                    )
+                    time.sleep(WORKER_RESTART_DELAY)
+                    self._spawn(worker)
+            time.sleep(1)
+        for process in self.processes.values():
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the bot as sharded workers.")
+    parser.add_argument("script", nargs="?", default="main.py")
+    parser.add_argument("--shards", type=int, required=True)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    ShardLauncher(args.script, args.shards, args.workers).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import asyncio
+import builtins
+import importlib.util
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "0") == "1"
+# Seconds from process start until the bot is ready to log in
+STARTUP_BUDGET = float(os.getenv("STARTUP_BUDGET", "1.0"))
+STARTUP_PROFILE_TOP = 15
+
+_started = time.perf_counter()
+_real_import = builtins.__import__
+_import_stack = []
+# module -> [cumulative seconds, seconds spent in nested imports]
+_imports = {}
+# (phase, seconds), in completion order
+phases = []
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    args = (name, globals, locals, fromlist, level)
+    if level == 0 and name in sys.modules:
+        return _real_import(*args)
+    if level:
+        package = (globals or {}).get("__package__") or ""
+        try:
+            name = importlib.util.resolve_name("." * level + name, package)
+        except (ImportError, ValueError):
+            pass
+        if fromlist and not args[0]:
+            # from . import submodule
+            name = f"{name}.{fromlist[0]}"
+    if name in _import_stack:
+        return _real_import(*args)
+    started = time.perf_counter()
+    _import_stack.append(name)
+    try:
+        return _real_import(*args)
+    finally:
+        _import_stack.pop()
+        elapsed = time.perf_counter() - started
+        timing = _imports.setdefault(name, [0.0, 0.0])
+        timing[0] += elapsed
+        if _import_stack:
+            _imports.setdefault(_import_stack[-1], [0.0, 0.0])[1] += elapsed
+
+
+def install():
+    """
+    Starts timing every import from here on when STARTUP_PROFILE=1. Call it before the
+    bot's other imports; it is a no-op otherwise.
+    """
+    global _started
+    if STARTUP_PROFILE and builtins.__import__ is not _timed_import:
+        _started = time.perf_counter()
+        builtins.__import__ = _timed_import
+
+
+def elapsed():
+    return time.perf_counter() - _started
+
+
+@contextmanager
+def phase(name):
+    """Times an initialization step."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases.append((name, time.perf_counter() - started))
+
+
+async def timed(name, awaitable):
+    """Awaits `awaitable` and records how long it took as a phase."""
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        phases.append((name, time.perf_counter() - started))
+
+
+async def warm_up(steps, timeout):
+    """
+    Runs the blocking `steps` ({name: callable}) concurrently in worker threads, each
+    bounded by `timeout` seconds, so a slow dependency can only delay itself. Returns
+    {name: result or None}.
+    """
+
+    async def run(name, step):
+        try:
+            return await timed(name, asyncio.wait_for(asyncio.to_thread(step), timeout))
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {e!r}")
+            return None
+
+    results = await asyncio.gather(*(run(name, step) for name, step in steps.items()))
+    return dict(zip(steps, results))
+
+
+def report(label):
+    """
+    Logs the time since start against STARTUP_BUDGET and, when profiling, the slowest
+    imports and every recorded phase.
+    """
+    total = elapsed()
+    over = total > STARTUP_BUDGET
+    log = logger.warning if over else logger.info
+    log(
+        f"Startup {label}: {total:.2f}s "
+        f"({'over' if over else 'within'} the {STARTUP_BUDGET:.2f}s budget)"
+    )
+    if not STARTUP_PROFILE:
+        return
+    slowest = sorted(_imports.items(), key=lambda item: item[1][0], reverse=True)
+    lines = [
+        f"  {name:<40} {cumulative * 1000:8.1f} ms  (self {(cumulative - nested) * 1000:7.1f} ms)"
+        for name, (cumulative, nested) in slowest[:STARTUP_PROFILE_TOP]
+    ]
+    lines.extend(
+        f"  phase {name:<34} {seconds * 1000:8.1f} ms" for name, seconds in phases
+    )
+    logger.info("Startup profile:\n" + "\n".join(lines))
@@ -0,0 +1,230 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+VIEW_CACHE_MAX_ENTRIES = int(os.getenv("VIEW_CACHE_MAX_ENTRIES", "10000"))
+VIEW_CACHE_IMMUTABLE_TTL = float(os.getenv("VIEW_CACHE_IMMUTABLE_TTL", "3600"))
+VIEW_CACHE_EVENT_TTL = float(os.getenv("VIEW_CACHE_EVENT_TTL", "30"))
+VIEW_CACHE_BLOCK_POLL_INTERVAL = float(os.getenv("VIEW_CACHE_BLOCK_POLL_INTERVAL", "2"))
+# New blocks scanned for events in one eth_getLogs call; a longer gap drops every
+# event-tracked entry instead
+VIEW_CACHE_MAX_SCAN = int(os.getenv("VIEW_CACHE_MAX_SCAN", "1000"))
+
+# Values that only change through rare admin calls
+IMMUTABLE_VIEWS = {"roundDuration", "multisigAddress", "owner"}
+
+# Views whose value only changes when one of the indexed events is emitted. They survive
+# new blocks in which none of those events was emitted. matchingPool and tournaments
+# (totalDonations) also change on donate(), so they are not in here.
+EVENT_TRACKED_VIEWS = {
+    "nextMatchId",
+    "nextTournamentId",
+    "matches",
+    "matchDonorContributions",
+    "tournamentEntrants",
+    "isEntrantInTournament",
+    "tournamentWinners",
+    "currentTournamentRound",
+}
+
+
+def _event_invalidations(name, args):
+    """
+    Maps a decoded event to the cached views it changes, as (function, first_arg)
+    pairs. first_arg None drops every cached call of that function.
+    """
+    if name == "MatchStarted":
+        return [("nextMatchId", None), ("matches", args["matchId"])]
+    if name in ("MatchJoined", "MatchClosed"):
+        return [("matches", args["matchId"]), ("matchingPool", None)]
+    if name == "MatchDonation":
+        return [
+            ("matches", args["matchId"]),
+            ("matchDonorContributions", args["donor"]),
+        ]
+    if name == "TournamentCreated":
+        return [("nextTournamentId", None), ("tournaments", args["tournamentId"])]
+    if name == "TournamentJoined":
+        return [
+            ("tournaments", args["tournamentId"]),
+            ("tournamentEntrants", args["tournamentId"]),
+            ("isEntrantInTournament", args["tournamentId"]),
+        ]
+    if name in ("TournamentStarted", "TournamentEnded"):
+        return [
+            ("tournaments", args["tournamentId"]),
+            ("currentTournamentRound", args["tournamentId"]),
+            ("tournamentWinners", args["tournamentId"]),
+            ("matchingPool", None),
+        ]
+    if name == "MatchingPoolFilled":
+        return [("matchingPool", None)]
+    return []
+
+
+class ViewCache:
+    """
+    Read-through cache for contract view calls, keyed by function name and arguments.
+
+    Entries are invalidated depending on the view:
+        - IMMUTABLE_VIEWS live for `immutable_ttl` seconds.
+        - Every other view is only valid for the block it was read at. The head block
+          number is re-read at most every `block_poll_interval` seconds, so a burst of
+          reads costs one eth_blockNumber call instead of one call per read.
+        - EVENT_TRACKED_VIEWS survive new blocks once the cache `follow`s the chain's
+          events: each time the head moves, the logs of the new blocks are fetched
+          and the views their events change are dropped, so they are stale for no
+          longer than the head poll. They still expire after `event_ttl` seconds.
+          Until then, or when a fetch fails, they are only valid for their block.
+
+    The cache holds at most `max_entries` entries and evicts the least recently used.
+
+    Args:
+        block_number (callable): Returns the current head block number.
+    """
+
+    def __init__(
+        self,
+        block_number,
+        max_entries=VIEW_CACHE_MAX_ENTRIES,
+        immutable_ttl=VIEW_CACHE_IMMUTABLE_TTL,
+        event_ttl=VIEW_CACHE_EVENT_TTL,
+        block_poll_interval=VIEW_CACHE_BLOCK_POLL_INTERVAL,
+    ):
+        self.block_number = block_number
+        self.max_entries = max_entries
+        self.immutable_ttl = immutable_ttl
+        self.event_ttl = event_ttl
+        self.block_poll_interval = block_poll_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._generation = 0
+        # (function, args) -> (value, block, expires_at)
+        self._entries = OrderedDict()
+        self._by_function = {}
+        self._lock = threading.Lock()
+        # Guards the head block; held across its refresh so only one thread polls
+        self._head_lock = threading.Lock()
+        self._head_block = None
+        self._head_checked_at = 0.0
+        self.read_events = None
+
+    def follow(self, read_events):
+        """
+        Keeps EVENT_TRACKED_VIEWS across blocks. `read_events(from_block, to_block)`
+        returns the decoded contract events of those blocks, as EventIndexer does.
+        """
+        self.read_events = read_events
+
+    def head_block(self):
+        with self._head_lock:
+            now = time.monotonic()
+            if (
+                self._head_block is None
+                or now - self._head_checked_at >= self.block_poll_interval
+            ):
+                head_block = self.block_number()
+                if self._head_block is not None and head_block > self._head_block:
+                    self._scan(self._head_block + 1, head_block)
+                self._head_block = head_block
+                self._head_checked_at = now
+            return self._head_block
+
+    def _scan(self, from_block, to_block):
+        if self.read_events is None:
+            return
+        if to_block - from_block < VIEW_CACHE_MAX_SCAN:
+            try:
+                self.invalidate_events(self.read_events(from_block, to_block))
+                return
+            except Exception as e:
+                logger.warning(
+                    f"Failed to read events of blocks {from_block}-{to_block}: {e}"
+                )
+        for function_name in EVENT_TRACKED_VIEWS:
+            self.invalidate(function_name)
+
+    def _expires_at(self, function_name, now):
+        if function_name in IMMUTABLE_VIEWS:
+            return now + self.immutable_ttl
+        if function_name in EVENT_TRACKED_VIEWS and self.read_events is not None:
+            return now + self.event_ttl
+        return None
+
+    def get_or_load(self, function_name, args, load):
+        key = (function_name, args)
+        now = time.monotonic()
+        # Read outside the lock: it may cost an RPC. For event-tracked views it also
+        # drops the entries changed in the blocks since the last read.
+        block = self.head_block() if function_name not in IMMUTABLE_VIEWS else None
+        expires_at = self._expires_at(function_name, now)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                _, entry_block, entry_expires_at = entry
+                if (
+                    now < entry_expires_at
+                    if entry_expires_at is not None
+                    else entry_block == block
+                ):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+            self.misses += 1
+            generation = self._generation
+
+        value = load()
+
+        with self._lock:
+            if generation != self._generation:
+                # Invalidated while loading, so the value may already be stale
+                return value
+            self._entries[key] = (value, block, expires_at)
+            self._entries.move_to_end(key)
+            self._by_function.setdefault(function_name, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._by_function[evicted[0]].discard(evicted)
+                self.evictions += 1
+        return value
+
+    def invalidate(self, function_name, first_arg=None):
+        with self._lock:
+            keys = self._by_function.get(function_name, set())
+            stale = [
+                key
+                for key in keys
+                if first_arg is None or (key[1] and key[1][0] == first_arg)
+            ]
+            for key in stale:
+                keys.discard(key)
+                del self._entries[key]
+            self.invalidations += len(stale)
+            self._generation += 1
+
+    def invalidate_events(self, events):
+        """Indexer listener: drops every cached view changed by these decoded events."""
+        for event in events:
+            for function_name, first_arg in _event_invalidations(
+                event["event"], event["args"]
+            ):
+                self.invalidate(function_name, first_arg)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,388 @@
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+WRITE_QUEUE_MAX_BATCH = int(os.getenv("WRITE_QUEUE_MAX_BATCH", "100"))
+WRITE_QUEUE_FLUSH_INTERVAL = float(os.getenv("WRITE_QUEUE_FLUSH_INTERVAL", "0.25"))
+WRITE_QUEUE_MAX_RETRIES = int(os.getenv("WRITE_QUEUE_MAX_RETRIES", "5"))
+WRITE_QUEUE_BACKOFF = float(os.getenv("WRITE_QUEUE_BACKOFF", "0.5"))
+# fsync the spool once per flush cycle, before the cycle's writes reach the database
+WRITE_QUEUE_FSYNC = os.getenv("WRITE_QUEUE_FSYNC", "1") == "1"
+
+INSERT = "insert"
+UPDATE = "update"
+
+# The columns identifying a table's rows: writes to the same key coalesce, updates
+# filter on them and replayed inserts skip rows that already exist
+CONFLICT_KEYS = {
+    "matches": "match_id",
+    "tournaments": "id",
+    "tournament_entrants": "tournament_id,user_id",
+    "tournament_channels": "tournament_id,channel_id",
+}
+# SQLSTATE classes of errors that reject the row itself: data exceptions, integrity
+# constraint violations (duplicate keys, NOT NULL) and undefined columns or tables
+PERMANENT_SQLSTATE_CLASSES = ("22", "23", "42")
+
+
+class MissingRow(Exception):
+    """An update matched no row."""
+
+
+class RowConflict(Exception):
+    """An insert's key is already taken by a different row."""
+
+
+def _is_permanent(error):
+    """True for errors a retry cannot fix."""
+    if isinstance(error, (MissingRow, RowConflict)):
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, str) and code[:2] in PERMANENT_SQLSTATE_CLASSES
+
+
+class PendingWrite:
+    __slots__ = ("op", "seqs", "row", "waiters", "replayed")
+
+    def __init__(self, op, seqs, row, replayed=False):
+        self.op = op
+        self.seqs = seqs
+        self.row = row
+        self.waiters = []
+        # Replayed from the spool, so it may already be stored
+        self.replayed = replayed
+
+
+class WriteBehindQueue:
+    """
+    WriteBehindQueue buffers Supabase inserts and updates per table and flushes them in
+    the background: inserts as bulk INSERTs, updates as one PATCH per row filtered on
+    the table's key.
+
+    An update of a row whose insert is still queued is merged into the insert, and
+    updates of the same row are merged into one. A second insert of a queued key fails
+    like a duplicate key would. A table is flushed as soon as it holds `max_batch`
+    rows, and every table is flushed at least every `flush_interval` seconds.
+
+    Errors that reject a row (duplicate key, NOT NULL, an update matching no row) are
+    not retried; a bulk insert rejected that way is retried row by row, so only the
+    offending rows fail. Other errors are retried with exponential backoff. After a
+    failure that may have reached the database (a timeout, say), inserts are retried
+    skipping existing keys, and a key that was skipped counts as stored only if the
+    stored row is the one being inserted.
+
+    Writes that still fail after `max_retries` attempts are given up: awaited writes
+    resolve to False and their callers handle the failure; fire-and-forget writes are
+    appended to the dead-letter file, `<spool_path>.dead`, and logged.
+
+    Each write is appended to `spool_path` before it is acknowledged, and marked done
+    once its batch succeeds or is given up. Unless WRITE_QUEUE_FSYNC=0, each flush
+    first fsyncs the spool in a worker thread, one fsync for every write since the last
+    one, so a host crash loses at most the fire-and-forget writes of the last
+    `flush_interval`; awaited writes resolve only once they are stored.
+    The spool is truncated only when no write is queued or in flight in any flush.
+    Writes still pending in the spool are replayed by `start()`, so queued writes survive
+    a crash; replayed inserts skip existing keys the same way.
+
+    Callers that need the row to exist before they continue use `await write(..., wait=True)`,
+    which starts a flush right away instead of waiting for the timer; everything else
+    returns immediately.
+    """
+
+    def __init__(
+        self,
+        repository,
+        spool_path=None,
+        max_batch=WRITE_QUEUE_MAX_BATCH,
+        flush_interval=WRITE_QUEUE_FLUSH_INTERVAL,
+        max_retries=WRITE_QUEUE_MAX_RETRIES,
+        backoff=WRITE_QUEUE_BACKOFF,
+        fsync=WRITE_QUEUE_FSYNC,
+    ):
+        self.repository = repository
+        self.spool_path = spool_path
+        self.dead_letter_path = f"{spool_path}.dead" if spool_path else None
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.fsync = fsync
+
+        # table -> {(op, key): PendingWrite}
+        self.buffers = {}
+        self.flushed_rows = 0
+        self.flushed_batches = 0
+        self.dead_letters = 0
+        self._seq = 0
+        # Flushes running; the spool is only truncated when none is
+        self._flushing = 0
+        self._spool = None
+        # Spooled writes not fsynced yet
+        self._unsynced = False
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def _key_columns(self, table):
+        return CONFLICT_KEYS[table].split(",")
+
+    def _key(self, table, row):
+        return tuple(str(row.get(column)) for column in self._key_columns(table))
+
+    def _spool_write(self, record):
+        if self._spool is not None:
+            self._spool.write(json.dumps(record) + "\n")
+            self._spool.flush()
+
+    async def _sync_spool(self):
+        if self._spool is None or not self.fsync or not self._unsynced:
+            return
+        self._unsynced = False
+        try:
+            await asyncio.to_thread(os.fsync, self._spool.fileno())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to fsync the write spool: {e}")
+
+    def _enqueue(self, op, table, row, seq, replayed=False):
+        """Buffers a write; returns its PendingWrite, or None if it is a duplicate insert."""
+        buffer = self.buffers.setdefault(table, {})
+        key = self._key(table, row)
+        if op == UPDATE:
+            pending = buffer.get((INSERT, key)) or buffer.get((UPDATE, key))
+            if pending is not None:
+                pending.seqs.append(seq)
+                pending.row.update(row)
+                return pending
+        elif (INSERT, key) in buffer:
+            return None
+        pending = buffer[(op, key)] = PendingWrite(op, [seq], dict(row), replayed)
+        if len(buffer) >= self.max_batch:
+            self._wakeup.set()
+        return pending
+
+    def _write(self, op, table, row, wait, replayed=False):
+        self._seq += 1
+        self._spool_write({"seq": self._seq, "table": table, "op": op, "row": row})
+        self._unsynced = self._spool is not None
+        pending = self._enqueue(op, table, row, self._seq, replayed)
+        future = asyncio.get_running_loop().create_future() if wait else None
+        if pending is None:
+            rejected = PendingWrite(op, [self._seq], row)
+            if future is not None:
+                rejected.waiters.append(future)
+            error = RowConflict(f"{table} {self._key(table, row)} is already queued")
+            self._give_up(table, [rejected], error)
+        elif future is not None:
+            pending.waiters.append(future)
+            # Someone is waiting on this row: flush now rather than on the timer
+            self._wakeup.set()
+        return future
+
+    def write(self, table, row, wait=False):
+        """
+        Queues a row for insert into `table`. Returns None, or with wait=True an awaitable
+        that resolves to True once the row is stored and False if it could not be.
+        """
+        return self._write(INSERT, table, row, wait)
+
+    def update(self, table, row, wait=False):
+        """
+        Queues an update of the row of `table` whose key columns match `row`'s, setting
+        the rest of `row`'s columns. Returns like `write`; an update of a row that does
+        not exist fails.
+        """
+        if len(self._key_columns(table)) != 1:
+            raise ValueError(f"Updates need a single-column key, and {table} has not")
+        return self._write(UPDATE, table, row, wait)
+
+    def _replay_spool(self):
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return []
+        writes, done = {}, set()
+        with open(self.spool_path, "r") as spool:
+            for line in spool:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write
+                    continue
+                if "done" in record:
+                    done.update(record["done"])
+                else:
+                    writes[record["seq"]] = record
+        return [record for seq, record in sorted(writes.items()) if seq not in done]
+
+    def start(self):
+        """Replays unflushed spooled writes and starts the flusher; safe to call repeatedly."""
+        if self._task is not None and not self._task.done():
+            return self._task
+        replay = self._replay_spool()
+        if self.spool_path:
+            self._spool = open(self.spool_path, "w")
+        for record in replay:
+            self._write(
+                record.get("op", INSERT),
+                record["table"],
+                record["row"],
+                wait=False,
+                replayed=True,
+            )
+        if replay:
+            logger.info(f"Replayed {len(replay)} spooled writes")
+        self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        # Take the buffers before yielding, so overlapping flushes never share a batch
+        taken = [(table, buffer) for table, buffer in self.buffers.items() if buffer]
+        for table, _ in taken:
+            del self.buffers[table]
+        self._flushing += 1
+        try:
+            await self._sync_spool()
+            await asyncio.gather(
+                *(self._flush_table(table, buffer) for table, buffer in taken)
+            )
+        finally:
+            self._flushing -= 1
+        if (
+            self._spool is not None
+            and not self._flushing
+            and not any(self.buffers.values())
+        ):
+            # Nothing is queued or in flight, so the spool can start over
+            self._spool.seek(0)
+            self._spool.truncate()
+
+    async def _flush_table(self, table, buffer):
+        # PostgREST bulk inserts need the same columns on every row
+        groups = {}
+        updates = []
+        for pending in buffer.values():
+            if pending.op == INSERT:
+                group = (pending.replayed, frozenset(pending.row))
+                groups.setdefault(group, []).append(pending)
+            else:
+                updates.append(pending)
+        for (replayed, _), batch in groups.items():
+            for start in range(0, len(batch), self.max_batch):
+                await self._flush_batch(
+                    table, INSERT, batch[start : start + self.max_batch], replayed
+                )
+        # Updates go after the inserts they may depend on
+        await asyncio.gather(
+            *(self._flush_batch(table, UPDATE, [pending]) for pending in updates)
+        )
+
+    async def _insert(self, table, rows, maybe_stored):
+        if not maybe_stored:
+            await self.repository.insert(table, rows)
+            return
+        response = await self.repository.upsert(
+            table, rows, on_conflict=CONFLICT_KEYS[table], ignore_duplicates=True
+        )
+        inserted = {self._key(table, row) for row in response.data}
+        for row in rows:
+            if self._key(table, row) in inserted:
+                continue
+            # Skipped as a duplicate: fine if it is this row, stored by an earlier try
+            columns = self._key_columns(table)
+            existing = await self.repository.find(
+                table, {column: row[column] for column in columns}
+            )
+            if not existing or any(
+                str(existing[0].get(column)) != str(value)
+                for column, value in row.items()
+            ):
+                raise RowConflict(f"{table} {self._key(table, row)} is already taken")
+
+    async def _update(self, table, row):
+        column = self._key_columns(table)[0]
+        fields = {name: value for name, value in row.items() if name != column}
+        response = await self.repository.update(table, fields, column, row[column])
+        if not response.data:
+            raise MissingRow(f"{table} has no row with {column} = {row[column]}")
+
+    async def _flush_batch(self, table, op, batch, maybe_stored=False):
+        rows = [pending.row for pending in batch]
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                if op == INSERT:
+                    await self._insert(table, rows, maybe_stored)
+                else:
+                    await self._update(table, rows[0])
+                break
+            except Exception as e:
+                if _is_permanent(e):
+                    if len(batch) > 1:
+                        # Find the rejected rows; the rest go through
+                        await asyncio.gather(
+                            *(
+                                self._flush_batch(table, op, [pending], maybe_stored)
+                                for pending in batch
+                            )
+                        )
+                    else:
+                        self._give_up(table, batch, e)
+                    return
+                logger.warning(
+                    f"Flushing {len(rows)} {op}s to {table} failed (attempt {attempt}): {e}"
+                )
+                # The failed request may still have been applied
+                maybe_stored = True
+                error = e
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+        else:
+            self._give_up(table, batch, error)
+            return
+
+        self.flushed_rows += len(rows)
+        self.flushed_batches += 1
+        self._spool_write({"done": [seq for p in batch for seq in p.seqs]})
+        for pending in batch:
+            self._resolve(pending, True)
+
+    def _give_up(self, table, batch, error):
+        logger.error(f"Giving up on {len(batch)} {batch[0].op}s for {table}: {error}")
+        for pending in batch:
+            if pending.waiters:
+                # The caller sees the failure and handles it
+                self._resolve(pending, False)
+            else:
+                self._dead_letter(table, pending, error)
+        self._spool_write({"done": [seq for p in batch for seq in p.seqs]})
+
+    def _dead_letter(self, table, pending, error):
+        self.dead_letters += 1
+        if not self.dead_letter_path:
+            logger.error(f"Dropped {pending.op} of {table} row {pending.row}")
+            return
+        with open(self.dead_letter_path, "a") as dead_letters:
+            dead_letters.write(
+                json.dumps(
+                    {
+                        "table": table,
+                        "op": pending.op,
+                        "row": pending.row,
+                        "error": str(error),
+                    }
+                )
+                + "\n"
+            )
+
+    def _resolve(self, pending, result):
+        for future in pending.waiters:
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,91 @@
+import importlib
+import logging
+import os
+import sys
+
+import discord
+from dotenv import load_dotenv
+
+# Settings are read from the environment when the bot modules are imported
+load_dotenv()
+
+logger = logging.getLogger("combined_bot")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Bot name -> directory of its main.py, in load order
+BOT_DIRS = {
+    "one_v_one": os.path.join(ROOT, "one_v_one_bot", "bot"),
+    "tournament": os.path.join(ROOT, "tournament_bot", "bot"),
+}
+
+DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+# The bot whose Supabase project holds the matches the leaderboard backfills from
+MATCHES_BOT = "one_v_one"
+
+
+def load_bots(bot_dirs=BOT_DIRS):
+    """
+    Imports every bot's main module into this process and returns {name: module}.
+
+    The infrastructure the bots share is the bot_common package: it is imported once,
+    so every bot gets the same clients, pools and caches from bot_common.services. The
+    bots' own modules (main, lib, ...) share names across the flat bot directories, so
+    each is imported once per bot and kept in sys.modules as "<bot>.<module>".
+    """
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    modules = {}
+    for name, bot_dir in bot_dirs.items():
+        bot_dir = os.path.abspath(bot_dir)
+        # This bot's own modules come first
+        if bot_dir in sys.path:
+            sys.path.remove(bot_dir)
+        sys.path.insert(0, bot_dir)
+        before = set(sys.modules)
+        modules[name] = importlib.import_module("main")
+        for module_name in set(sys.modules) - before:
+            path = getattr(sys.modules[module_name], "__file__", None)
+            if path is not None and os.path.dirname(os.path.abspath(path)) == bot_dir:
+                sys.modules[f"{name}.{module_name}"] = sys.modules.pop(module_name)
+    return modules
+
+
+def create_combined_bot(bot_dirs=BOT_DIRS):
+    """
+    Returns one bot with every bot's commands on it, and the loaded main modules. Each
+    main module's setup() adds its commands and on_ready warm-up, as a py-cord
+    extension would; one gateway connection and one HTTP client serve all of them.
+
+    The shared services are started here, by an on_ready added before the bots' own.
+    Listeners run in the order they were added, so it is the first to call
+    start_services and the leaderboard gets the matches repository whichever bot
+    would have been ready first; the bots' on_ready await the same start.
+    """
+    modules = load_bots(bot_dirs)
+    from bot_common.services import start_services
+    from bot_common.sharding import create_bot
+
+    intents = discord.Intents.none()
+    for module in modules.values():
+        intents.value |= module.intents.value
+    bot = create_bot(command_prefix="!", intents=intents)
+
+    async def on_ready():
+        matches_bot = modules.get(MATCHES_BOT)
+        await start_services(
+            bot.guilds, matches_bot.get_repository if matches_bot else None
+        )
+
+    bot.add_listener(on_ready)
+    for name, module in modules.items():
+        module.setup(bot)
+        logger.info(f"Loaded {name} commands")
+    return bot, modules
+
+
+if __name__ == "__main__":
+    bot, modules = create_combined_bot()
+    from bot_common import startup_profile
+
+    startup_profile.report("ready to log in")
+    bot.run(DISCORD_TOKEN)
@@ -1,20 +1,29 @@
-import datetime
+from bot_common.rate_limiter import (
+    RATE_LIMIT_DB_PATH,
+    SLIDING_WINDOW,
+    RateLimiter,
+    SharedRateLimiter,
+)
+
+SECONDS_PER_DAY = 24 * 60 * 60
 
 
 class APICounter:
     """
     APICounter is a Python class that implements a simple counter system to track and limit the number of requests
-    allowed per day for each user.
+    allowed per day for each user. It is a thin wrapper around RateLimiter, so the day is a rolling 24 hour window
+    and users who stay idle are evicted instead of being kept forever. With a database path (or RATE_LIMIT_DB_PATH set)
+    the counts live in SQLite instead, shared by every bot process on the host and kept across restarts.
 
     Attributes:
         max_requests_per_day (int): The maximum number of requests allowed per day.
-        requests (dict): A dictionary that stores the request count for each user, keyed by user ID.
+        requests (RateLimiter | SharedRateLimiter): The limiter that stores the request state for each user, keyed by user ID.
     Methods:
-        __init__(self, max_requests_per_day):
+        __init__(self, max_requests_per_day, mode=SLIDING_WINDOW, db_path=RATE_LIMIT_DB_PATH):
             Initializes a new instance of the APICounter class with the specified maximum limit of requests per day.
 
         check_limit(self, user_id):
-            Checks if the user has exceeded the maximum number of requests allowed per day based on the current date.
+            Checks if the user has exceeded the maximum number of requests allowed in the last 24 hours.
             If the user has not exceeded the limit, updates the request count for the user and returns True. If the user
             has exceeded the limit, returns False.
 
@@ -31,19 +40,35 @@ class APICounter:
             print("API request limit exceeded.")
     """
 
-    def __init__(self, max_requests_per_day):
+    def __init__(
+        self, max_requests_per_day, mode=SLIDING_WINDOW, db_path=RATE_LIMIT_DB_PATH
+    ):
         """
         Initializes a new instance of the APICounter class with the specified maximum limit of requests per day.
 
         Args:
             max_requests_per_day (int): The maximum number of requests allowed per day.
+            mode (str): The RateLimiter mode, sliding_window or token_bucket.
+            db_path (str, optional): SQLite database to share the counts through. If None, the counts are kept in
+                this process's memory.
         """
         self.max_requests_per_day = int(max_requests_per_day)
-        self.requests = {}
+        if db_path:
+            self.requests = SharedRateLimiter(
+                db_path,
+                self.max_requests_per_day,
+                SECONDS_PER_DAY,
+                mode,
+                namespace="api_counter",
+            )
+        else:
+            self.requests = RateLimiter(
+                self.max_requests_per_day, SECONDS_PER_DAY, mode
+            )
 
     def check_limit(self, user_id):
         """
-        Checks if the user has exceeded the maximum number of requests allowed per day based on the current date.
+        Checks if the user has exceeded the maximum number of requests allowed in the last 24 hours.
         If the user has not exceeded the limit, updates the request count for the user and returns True. If the user
         has exceeded the limit, returns False.
 
@@ -53,15 +78,4 @@ class APICounter:
         Returns:
             bool: True if the user has not exceeded the request limit, False otherwise.
         """
-        today = datetime.date.today()
-        if user_id not in self.requests:
-            self.requests[user_id] = {"date": today, "count": 0}
-        elif self.requests[user_id]["date"] != today:
-            self.requests[user_id]["date"] = today
-            self.requests[user_id]["count"] = 0
-
-        if self.requests[user_id]["count"] < self.max_requests_per_day:
-            self.requests[user_id]["count"] += 1
-            return True
-        else:
-            return False
+        return self.requests.check(user_id)
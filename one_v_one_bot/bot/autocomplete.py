@@ -0,0 +1,324 @@
+import asyncio
+import bisect
+import heapq
+import json
+import logging
+import os
+import re
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Next to this module, so the catalog is found whatever the working directory is
+GAME_CATALOG_PATH = os.getenv(
+    "GAME_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "games.json"),
+)
+GAME_CATALOG_REFRESH_INTERVAL = float(os.getenv("GAME_CATALOG_REFRESH_INTERVAL", "60"))
+# Most recent matches, by match_id, read to seed popularity at startup
+GAME_POPULARITY_SAMPLE = int(os.getenv("GAME_POPULARITY_SAMPLE", "10000"))
+# Discord accepts at most 25 autocomplete choices
+MAX_CHOICES = 25
+RESULT_CACHE_SIZE = 1024
+# Share of the query's trigrams a title must contain to count as a fuzzy match
+FUZZY_MIN_OVERLAP = 0.4
+
+# Match tiers, best first
+TITLE_PREFIX = 0
+WORD_PREFIX = 1
+FUZZY = 2
+
+_non_alnum = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text):
+    return _non_alnum.sub(" ", text.lower()).strip()
+
+
+def trigrams(normalized):
+    padded = f"  {normalized} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class Game:
+    __slots__ = ("title", "key", "platforms", "trigrams")
+
+    def __init__(self, title, platforms):
+        self.title = title
+        self.key = normalize(title)
+        # None means every platform
+        self.platforms = frozenset(platforms) if platforms else None
+        self.trigrams = trigrams(self.key)
+
+    def on(self, platform):
+        return self.platforms is None or platform is None or platform in self.platforms
+
+
+class GameIndex:
+    """
+    Search index over the games of one category.
+
+    Prefix lookups use a sorted array of (suffix, key) pairs holding the normalized title
+    and each of its word suffixes ("street fighter 6", "fighter 6", "6"), so both
+    "stre" and "fight" are one bisect plus a scan of the matching range. Typos fall
+    back to a trigram index. Adding or removing a title only touches that title's
+    entries.
+    """
+
+    def __init__(self):
+        self.games = {}
+        self._prefixes = []
+        self._trigrams = {}
+
+    def __len__(self):
+        return len(self.games)
+
+    def _suffixes(self, game):
+        words = game.key.split(" ")
+        return [(" ".join(words[i:]), game.key) for i in range(len(words))]
+
+    def extend(self, entries):
+        """Bulk add of (title, platforms) pairs: one sort instead of an insort each."""
+        for title, platforms in entries:
+            game = Game(title, platforms)
+            if game.key in self.games:
+                self.remove(title)
+            self.games[game.key] = game
+            self._prefixes.extend(self._suffixes(game))
+            for trigram in game.trigrams:
+                self._trigrams.setdefault(trigram, set()).add(game.key)
+        self._prefixes.sort()
+
+    def add(self, title, platforms=None):
+        game = Game(title, platforms)
+        if game.key in self.games:
+            self.remove(title)
+        self.games[game.key] = game
+        for entry in self._suffixes(game):
+            bisect.insort(self._prefixes, entry)
+        for trigram in game.trigrams:
+            self._trigrams.setdefault(trigram, set()).add(game.key)
+
+    def remove(self, title):
+        game = self.games.pop(normalize(title), None)
+        if game is None:
+            return
+        for entry in self._suffixes(game):
+            i = bisect.bisect_left(self._prefixes, entry)
+            if i < len(self._prefixes) and self._prefixes[i] == entry:
+                del self._prefixes[i]
+        for trigram in game.trigrams:
+            keys = self._trigrams[trigram]
+            keys.discard(game.key)
+            if not keys:
+                del self._trigrams[trigram]
+
+    def search(self, query, platform, popularity, limit=MAX_CHOICES):
+        """
+        Returns up to `limit` titles matching `query` on `platform`, ranked by match
+        tier and then by popularity (a Counter keyed by normalized title).
+        """
+        query = normalize(query)
+        if not query:
+            return [
+                game.title
+                for game in heapq.nsmallest(
+                    limit,
+                    (game for game in self.games.values() if game.on(platform)),
+                    key=lambda game: (-popularity[game.key], game.key),
+                )
+            ]
+
+        # key -> (tier, -shared trigrams)
+        tiers = {}
+        i = bisect.bisect_left(self._prefixes, (query,))
+        while i < len(self._prefixes) and self._prefixes[i][0].startswith(query):
+            suffix, key = self._prefixes[i]
+            tier = (TITLE_PREFIX if suffix == key else WORD_PREFIX, 0)
+            if tiers.get(key, (FUZZY,)) > tier and self.games[key].on(platform):
+                tiers[key] = tier
+            i += 1
+
+        if len(tiers) < limit:
+            query_trigrams = trigrams(query)
+            shared = Counter()
+            for trigram in query_trigrams:
+                shared.update(self._trigrams.get(trigram, ()))
+            needed = FUZZY_MIN_OVERLAP * len(query_trigrams)
+            for key, count in shared.items():
+                if (
+                    count >= needed
+                    and key not in tiers
+                    and self.games[key].on(platform)
+                ):
+                    tiers[key] = (FUZZY, -count)
+
+        ranked = heapq.nsmallest(
+            limit,
+            tiers,
+            key=lambda key: (tiers[key], -popularity[key], key),
+        )
+        return [self.games[key].title for key in ranked]
+
+
+class GameCatalog:
+    """
+    GameCatalog serves game autocomplete from a catalog file, with one GameIndex per
+    category and results ranked by how often each game was played.
+
+    The catalog file maps category names to titles. A title is either a string
+    (playable on every platform) or {"title": ..., "platforms": [...]}. `refresh`
+    re-reads the file when it changes and applies only the added and removed titles.
+    The file is read once on construction, which raises if it is missing or invalid:
+    the slash commands take their category choices from it.
+
+    Popularity is seeded from the most recent matches by `load_popularity` and bumped by
+    `record_match`. Results are cached per (category, platform, query) and the cache
+    of a category is dropped whenever its titles or popularity change.
+
+    Args:
+        path (str): Catalog JSON file.
+
+    Usage:
+        catalog = GameCatalog()
+        catalog.search("Fighting", "PC", "tek")
+    """
+
+    def __init__(self, path=GAME_CATALOG_PATH):
+        self.path = path
+        self.indexes = {}
+        self.popularity = {}
+        self._catalog = {}
+        self._mtime = None
+        self._results = {}
+        self._task = None
+        try:
+            self._apply(os.stat(self.path).st_mtime_ns, self._read())
+        except (OSError, ValueError, KeyError) as e:
+            raise RuntimeError(f"Cannot load game catalog {self.path}: {e}") from e
+
+    def categories(self):
+        return list(self.indexes)
+
+    def _invalidate(self, category):
+        self._results.pop(category, None)
+
+    def _read(self):
+        with open(self.path, "r") as catalog_file:
+            raw = json.load(catalog_file)
+        catalog = {}
+        for category, titles in raw.items():
+            entries = {}
+            for entry in titles:
+                if isinstance(entry, str):
+                    entry = {"title": entry}
+                platforms = tuple(sorted(entry.get("platforms") or ()))
+                entries[entry["title"]] = platforms
+            catalog[category] = entries
+        return catalog
+
+    def _read_if_changed(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return None
+            return mtime, self._read()
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to load game catalog {self.path}: {e}")
+            return None
+
+    def _apply(self, mtime, catalog):
+        self._mtime = mtime
+        added = removed = 0
+        for category in self._catalog.keys() - catalog.keys():
+            for title in self._catalog[category]:
+                self.remove_game(category, title)
+                removed += 1
+            self.indexes.pop(category, None)
+        for category, entries in catalog.items():
+            if category not in self.indexes:
+                self.indexes[category] = GameIndex()
+                self.indexes[category].extend(entries.items())
+                self.popularity.setdefault(category, Counter())
+                added += len(entries)
+                continue
+            old = self._catalog.get(category, {})
+            for title in old.keys() - entries.keys():
+                self.remove_game(category, title)
+                removed += 1
+            for title, platforms in entries.items():
+                if old.get(title) != platforms:
+                    self.add_game(category, title, platforms)
+                    added += 1
+        self._catalog = catalog
+        logger.info(f"Game catalog loaded: {added} titles added, {removed} removed")
+
+    def refresh(self):
+        """Re-reads the catalog file if it changed. Returns True if it was reloaded."""
+        changed = self._read_if_changed()
+        if changed is None:
+            return False
+        self._apply(*changed)
+        return True
+
+    def add_game(self, category, title, platforms=None):
+        self.indexes.setdefault(category, GameIndex()).add(title, platforms)
+        self.popularity.setdefault(category, Counter())
+        self._invalidate(category)
+
+    def remove_game(self, category, title):
+        index = self.indexes.get(category)
+        if index is not None:
+            index.remove(title)
+            self._invalidate(category)
+
+    def record_match(self, category, game):
+        key = normalize(game)
+        index = self.indexes.get(category)
+        if index is None or key not in index.games:
+            return
+        self.popularity[category][key] += 1
+        self._invalidate(category)
+
+    def search(self, category, platform, query, limit=MAX_CHOICES):
+        index = self.indexes.get(category)
+        if index is None:
+            return []
+        cache = self._results.setdefault(category, OrderedDict())
+        cache_key = (platform, normalize(query or ""), limit)
+        results = cache.get(cache_key)
+        if results is None:
+            results = index.search(
+                query or "", platform, self.popularity[category], limit
+            )
+            cache[cache_key] = results
+            if len(cache) > RESULT_CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(cache_key)
+        return results
+
+    async def load_popularity(self, repository, limit=GAME_POPULARITY_SAMPLE):
+        try:
+            rows = await repository.get_match_games(limit)
+        except Exception as e:
+            logger.error(f"Failed to load game popularity: {str(e)}")
+            return
+        for row in rows:
+            self.record_match(row.get("category"), row.get("game") or "")
+        logger.info(f"Game popularity seeded from {len(rows)} matches")
+
+    async def run(self, repository, interval=GAME_CATALOG_REFRESH_INTERVAL):
+        await self.load_popularity(repository)
+        while True:
+            await asyncio.sleep(interval)
+            # Parsing a large catalog would stall the event loop
+            changed = await asyncio.to_thread(self._read_if_changed)
+            if changed is not None:
+                self._apply(*changed)
+
+    def start(self, repository, interval=GAME_CATALOG_REFRESH_INTERVAL):
+        """Seeds popularity and starts watching the catalog file (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(repository, interval))
+        return self._task
@@ -0,0 +1,232 @@
+import asyncio
+import hmac
+import json
+import logging
+import os
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Most recently used matches kept in memory
+CHANNEL_INDEX_SIZE = int(os.getenv("CHANNEL_INDEX_SIZE", "100000"))
+# Match IDs per database query; they all go in the query string
+CHANNEL_INDEX_BATCH_SIZE = int(os.getenv("CHANNEL_INDEX_BATCH_SIZE", "100"))
+# Address the endpoint binds to; anything but loopback requires CHANNEL_INDEX_TOKEN
+CHANNEL_INDEX_HOST = os.getenv("CHANNEL_INDEX_HOST", "127.0.0.1")
+# Shared secret clients send as "Authorization: Bearer <token>"; unset, none is checked
+CHANNEL_INDEX_TOKEN = os.getenv("CHANNEL_INDEX_TOKEN")
+# 0 disables the endpoint
+CHANNEL_INDEX_PORT = int(os.getenv("CHANNEL_INDEX_PORT", "9180"))
+# Match IDs accepted per HTTP request
+CHANNEL_INDEX_MAX_IDS = 1000
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+
+class ChannelIndex:
+    """
+    In-process map between match IDs and their private channel IDs, in front of the
+    matches table.
+
+    The /1v1 command adds each match as it is created and the index drops a channel's
+    match when the channel is deleted. Lookups of matches it does not hold are loaded
+    with `fetch(match_ids)` (one query per CHANNEL_INDEX_BATCH_SIZE IDs), and
+    concurrent lookups of the same match share one load. At most `size` matches are
+    kept; the least recently used are evicted first. Matches that do not exist are
+    not remembered.
+
+    `start` serves GET /channels?match_ids=1,2,3 as {"channels": {"1": "<channel ID>",
+    ...}, "missing": [...]}, so a frontend route can resolve many matches in one call.
+    Channel IDs are strings, as they do not fit in a JavaScript number. When `token`
+    (CHANNEL_INDEX_TOKEN) is set, requests without "Authorization: Bearer <token>" get
+    401; the endpoint only binds to a non-loopback `host` when it is.
+
+    Args:
+        fetch: async callable(match_ids) returning {match_id: channel_id} for the
+            matches that exist.
+        size (int): Maximum number of matches kept.
+        batch_size (int): Maximum number of match IDs per fetch.
+    """
+
+    def __init__(
+        self, fetch, size=CHANNEL_INDEX_SIZE, batch_size=CHANNEL_INDEX_BATCH_SIZE
+    ):
+        self.fetch = fetch
+        self.size = size
+        self.batch_size = batch_size
+        # match ID -> channel ID, least recently used first
+        self._channels = OrderedDict()
+        # channel ID -> match ID
+        self._matches = {}
+        # match ID -> future of an in-flight load
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self._task = None
+        self._token = None
+
+    def __len__(self):
+        return len(self._channels)
+
+    def put(self, match_id, channel_id):
+        """Records that `match_id` plays in `channel_id`, replacing either's old pairing."""
+        match_id, channel_id = str(match_id), int(channel_id)
+        self.discard_match(match_id)
+        self.discard_channel(channel_id)
+        self._channels[match_id] = channel_id
+        self._matches[channel_id] = match_id
+        while len(self._channels) > self.size:
+            _, evicted = self._channels.popitem(last=False)
+            del self._matches[evicted]
+
+    def discard_match(self, match_id):
+        channel_id = self._channels.pop(str(match_id), None)
+        if channel_id is not None:
+            del self._matches[channel_id]
+
+    def discard_channel(self, channel_id):
+        """Forgets the match held by a deleted channel."""
+        match_id = self._matches.pop(int(channel_id), None)
+        if match_id is not None:
+            del self._channels[match_id]
+
+    def match_id(self, channel_id):
+        """Returns the match in `channel_id` if it is held, without a database query."""
+        return self._matches.get(int(channel_id))
+
+    async def _load(self, match_ids):
+        self.loads += 1
+        try:
+            found = await self.fetch(match_ids)
+            for match_id, channel_id in found.items():
+                if channel_id is not None:
+                    self.put(match_id, channel_id)
+        except Exception as e:
+            logger.error(f"Failed to load channels for {len(match_ids)} matches: {e}")
+        finally:
+            # Whatever happened, nobody may wait on these again
+            for match_id in match_ids:
+                future = self._loading.pop(match_id, None)
+                if future is not None and not future.done():
+                    future.set_result(None)
+
+    async def get_many(self, match_ids):
+        """Returns {match_id: channel_id} for those of `match_ids` that have a channel."""
+        match_ids = list(dict.fromkeys(str(match_id) for match_id in match_ids))
+        missing = []
+        waits = []
+        for match_id in match_ids:
+            if match_id in self._channels:
+                self.hits += 1
+                self._channels.move_to_end(match_id)
+            elif match_id in self._loading:
+                waits.append(self._loading[match_id])
+            else:
+                self.misses += 1
+                missing.append(match_id)
+                self._loading[match_id] = asyncio.get_running_loop().create_future()
+        for i in range(0, len(missing), self.batch_size):
+            waits.append(
+                asyncio.ensure_future(self._load(missing[i : i + self.batch_size]))
+            )
+        if waits:
+            # Loads are shared with other callers: cancelling this one must not
+            # cancel them
+            await asyncio.shield(asyncio.gather(*waits))
+        return {
+            match_id: self._channels[match_id]
+            for match_id in match_ids
+            if match_id in self._channels
+        }
+
+    async def get(self, match_id):
+        return (await self.get_many([match_id])).get(str(match_id))
+
+    async def _respond(self, target):
+        url = urlsplit(target)
+        if url.path != "/channels":
+            return "404 Not Found", {"error": "not found"}
+        match_ids = [
+            match_id
+            for value in parse_qs(url.query).get("match_ids", [])
+            for match_id in value.split(",")
+            if match_id
+        ]
+        if not match_ids:
+            return "400 Bad Request", {"error": "missing match_ids"}
+        if len(match_ids) > CHANNEL_INDEX_MAX_IDS:
+            return "400 Bad Request", {
+                "error": f"at most {CHANNEL_INDEX_MAX_IDS} match_ids per request"
+            }
+        channels = await self.get_many(match_ids)
+        return "200 OK", {
+            "channels": {
+                match_id: str(channel_id) for match_id, channel_id in channels.items()
+            },
+            "missing": [match_id for match_id in match_ids if match_id not in channels],
+        }
+
+    def _authorized(self, headers):
+        if not self._token:
+            return True
+        return hmac.compare_digest(
+            headers.get("authorization", ""), f"Bearer {self._token}"
+        )
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5)
+            headers = {}
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 5)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            parts = request.decode("latin-1").split()
+            if not self._authorized(headers):
+                status, payload = "401 Unauthorized", {"error": "unauthorized"}
+            elif len(parts) > 1 and parts[0] == "GET":
+                status, payload = await self._respond(parts[1])
+            else:
+                status, payload = "405 Method Not Allowed", {"error": "use GET"}
+            body = json.dumps(payload).encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve(self, host, port):
+        try:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        except OSError as e:
+            logger.warning(f"Channel index endpoint not started on {host}:{port}: {e}")
+            return
+        logger.info(f"Serving match channels on http://{host}:{port}/channels")
+
+    def start(
+        self,
+        host=CHANNEL_INDEX_HOST,
+        port=CHANNEL_INDEX_PORT,
+        token=CHANNEL_INDEX_TOKEN,
+    ):
+        """Starts the /channels endpoint; safe to call repeatedly."""
+        if not port or self._task is not None:
+            return self._task
+        if not token and host not in LOOPBACK_HOSTS:
+            logger.warning(
+                f"Channel index endpoint not started on {host}: "
+                "set CHANNEL_INDEX_TOKEN to serve it beyond loopback"
+            )
+            return None
+        self._token = token
+        self._task = asyncio.create_task(self._serve(host, port))
+        return self._task
@@ -1,54 +1,132 @@
-import logging
 import os
+import sys
+from dotenv import load_dotenv
+
+# bot_common, the package both bots share, lives at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# The bot modules read their settings from the environment when imported
+load_dotenv()
+
+from bot_common import startup_profile
+
+startup_profile.install()
+
+import logging
 import discord
 from discord import Option
-from discord.ext import commands
-from dotenv import load_dotenv
 from lib import (
-    get_next_match_id,
-    initialize_supabase,
+    get_repository,
+    get_write_queue,
+    fetch_next_match_id,
+    fetch_head_block,
+    fetch_match_started_events,
     insert_match_data,
+    update_match_id,
+    update_match_player2,
     get_channel_id_by_match_id,
+    fetch_match_channel_ids,
 )
+from bot_common.services import (
+    get_channel_pool,
+    get_indexer,
+    get_intent_router,
+    get_leaderboard,
+    get_metrics,
+    get_outbox,
+    get_view_router,
+    start_services,
+)
+from bot_common.id_allocator import IdAllocator, shared_id_counter
+from bot_common.sharding import create_bot
+from autocomplete import GameCatalog
+from matchmaking import MatchmakingIndex, OpenMatch
+from channel_index import ChannelIndex
+from bot_common.outbound import RESPONSE
+from bot_common.leaderboard import CATEGORY, DONOR, GAME, PLATFORM, PLAYER, describe
+from config_strings import unidentified_prompt_message
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("iscoin_gpt")
 
-load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 
 intents = discord.Intents.default()
 intents.messages = True
 intents.guilds = True
 intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
-
-supabase = initialize_supabase()
-
-game_choices = {
-    "Sports": ["FIFA 23", "NBA 2K23", "Madden NFL 23"],
-    "Fighting": [
-        "Street Fighter 6",
-        "Tekken 8",
-        "Mortal Kombat 12",
-        "Guilty Gear Strive",
-        "DNF Duel",
-        "Dragon Ball FighterZ",
-    ],
-    "Racing": [
-        "Forza Motorsport",
-        "Gran Turismo 7",
-        "Need for Speed Unbound",
-        "F1 23",
-        "Dirt 5",
-    ],
+# Set by setup(), standalone or in a combined runtime
+bot = None
+
+channel_pool = get_channel_pool()
+metrics = get_metrics()
+leaderboard = get_leaderboard()
+outbox = get_outbox()
+intent_router = get_intent_router()
+# Open challenges listed in answer to a message
+MAX_LISTED_MATCHES = 10
+
+# /leaderboard choice -> (dimension, metric)
+LEADERBOARDS = {
+    "Top earners": (PLAYER, "winnings"),
+    "Most wins": (PLAYER, "wins"),
+    "Most matches": (PLAYER, "matches"),
+    "Top donors": (DONOR, "donated"),
+    "Games by volume": (GAME, "volume_usd"),
+    "Platforms by volume": (PLATFORM, "volume_usd"),
+    "Categories by volume": (CATEGORY, "volume_usd"),
 }
 
 
+async def repair_match_id(old_match_id, new_match_id, channel_id):
+    # Writes still queued under the old ID go first, then the row is moved
+    await get_write_queue().flush()
+    await update_match_id(get_repository(), old_match_id, new_match_id)
+    channel_index.discard_match(old_match_id)
+    channel_index.put(new_match_id, channel_id)
+    matchmaking.rename(old_match_id, new_match_id)
+    old_custom_id = f"{ACCEPT_1V1_PREFIX}{old_match_id}"
+    state = view_router.snapshot.get(old_custom_id)
+    if state is not None:
+        transaction_data = dict(state["transaction_data"], match_id=str(new_match_id))
+        button = AcceptButton.from_state(
+            new_match_id, dict(state, transaction_data=transaction_data)
+        )
+        await view_router.replace_view(old_custom_id, button, button.state())
+    channel = bot.get_channel(channel_id)
+    if channel is not None:
+        outbox.send(
+            channel,
+            f"Match ID {old_match_id} was already taken on chain. "
+            f"This match now uses Match ID: {new_match_id}",
+        )
+
+
+match_allocator = IdAllocator(
+    "match",
+    fetch_next_match_id,
+    fetch_match_started_events,
+    on_collision=repair_match_id,
+    state_path=os.getenv("MATCH_ID_STATE_PATH", "match_id_allocator.json"),
+    counter=shared_id_counter("match"),
+    read_head_block=fetch_head_block,
+)
+
+game_catalog = GameCatalog()
+matchmaking = MatchmakingIndex()
+channel_index = ChannelIndex(fetch_match_channel_ids)
+
+
 async def get_game_choices(ctx: discord.AutocompleteContext):
-    category = ctx.options["category"]
-    return game_choices.get(category, [])
+    return game_catalog.search(
+        ctx.options.get("category"), ctx.options.get("platform"), ctx.value
+    )
+
+
+ACCEPT_1V1_PREFIX = "accept_1v1:"
 
 
 class AcceptButton(discord.ui.Button):
@@ -56,145 +134,302 @@ class AcceptButton(discord.ui.Button):
         super().__init__(
             label="Accept Challenge",
             style=discord.ButtonStyle.green,
-            custom_id="accept_1v1",
+            custom_id=f"{ACCEPT_1V1_PREFIX}{transaction_data['match_id']}",
         )
         self.challenge_creator_id = challenge_creator_id
         self.channel_id = channel_id
         self.transaction_data = transaction_data
 
-    async def callback(self, interaction: discord.Interaction):
-        await interaction.response.defer(ephemeral=True)
-
-        guild = interaction.guild
-        challenge_creator = guild.get_member(self.challenge_creator_id)
-        channel = guild.get_channel(self.channel_id)
+    @classmethod
+    def from_state(cls, match_id, state):
+        return cls(
+            state["challenge_creator_id"],
+            state["channel_id"],
+            state["transaction_data"],
+        )
 
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(read_messages=False),
-            guild.me: discord.PermissionOverwrite(read_messages=True),
-            challenge_creator: discord.PermissionOverwrite(read_messages=True),
-            interaction.user: discord.PermissionOverwrite(read_messages=True),
+    def state(self):
+        return {
+            "challenge_creator_id": self.challenge_creator_id,
+            "channel_id": self.channel_id,
+            "transaction_data": self.transaction_data,
         }
 
-        await channel.edit(overwrites=overwrites)
-        await channel.send(
-            f"{challenge_creator.mention} and {interaction.user.mention}, your private match channel is ready!"
-        )
+    async def callback(self, interaction: discord.Interaction):
+        with metrics.flow("accept_1v1"):
+            with metrics.stage("defer"):
+                await interaction.response.defer(ephemeral=True)
+
+            guild = interaction.guild
+            challenge_creator = guild.get_member(self.challenge_creator_id)
+            channel = guild.get_channel(self.channel_id)
+
+            overwrites = {
+                guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                guild.me: discord.PermissionOverwrite(read_messages=True),
+                challenge_creator: discord.PermissionOverwrite(read_messages=True),
+                interaction.user: discord.PermissionOverwrite(read_messages=True),
+            }
+
+            with metrics.stage("channel_edit"):
+                await channel.edit(overwrites=overwrites)
+            # The challenge is taken; the button stops working from here on
+            view_router.forget(self.custom_id)
+            # Both channel messages go out as one send; the user's answer doesn't wait
+            outbox.send(
+                channel,
+                f"{challenge_creator.mention} and {interaction.user.mention}, your private match channel is ready!",
+                RESPONSE,
+            )
 
-        self.transaction_data["player2_name"] = str(interaction.user.display_name)
+            self.transaction_data["player2_name"] = str(interaction.user.display_name)
+            matchmaking.remove(self.transaction_data["match_id"])
 
-        # Update the database with player2 information
-        supabase = initialize_supabase()
-        try:
-            update_response = (
-                supabase.table("matches")
-                .update({"player2_name": self.transaction_data["player2_name"]})
-                .eq("match_id", self.transaction_data["match_id"])
-                .execute()
+            # Queue the player2 update; nothing below depends on it being stored yet
+            update_match_player2(
+                get_write_queue(),
+                self.transaction_data["match_id"],
+                self.transaction_data["player2_name"],
             )
-
-            logger.info(f"Update response: {update_response}")
-            if update_response.data:
-                await channel.send(
-                    f"{challenge_creator.mention}, please start the match on the 1v1 frontpage."
-                )
-            else:
-                logger.error(f"Error updating player2 information: No data returned")
-                await channel.send(
-                    "There was an error updating the match information. Please contact an administrator."
-                )
-        except Exception as e:
-            logger.error(f"Exception when updating player2 information: {str(e)}")
-            await channel.send(
-                "An unexpected error occurred. Please contact an administrator."
+            outbox.send(
+                channel,
+                f"{challenge_creator.mention}, please start the match on the 1v1 frontpage.",
+                RESPONSE,
             )
+            with metrics.stage("send"):
+                await interaction.followup.send(
+                    f"Your private match channel {channel.mention} is ready!",
+                    ephemeral=True,
+                )
 
-        await interaction.followup.send(
-            f"Your private match channel {channel.mention} is ready!", ephemeral=True
-        )
+
+# Accept buttons survive restarts: their state is kept in the view snapshot
+view_router = get_view_router()
+view_router.register(ACCEPT_1V1_PREFIX, AcceptButton.from_state)
 
 
-@bot.slash_command(name="1v1", description="Start a 1v1 challenge.")
+@discord.slash_command(name="1v1", description="Start a 1v1 challenge.")
 async def one_v_one(
     ctx,
     platform: Option(str, "Choose your platform", choices=["PS5", "PC"], required=True),
     category: Option(
         str,
         "Choose the game category",
-        choices=["Sports", "Fighting", "Racing"],
+        choices=game_catalog.categories(),
         required=True,
     ),
     game: Option(str, "Choose the game", autocomplete=get_game_choices, required=True),
     match_amount_usd: Option(int, "Enter the match amount in USD", required=True),
 ):
-    await ctx.defer()
+    with metrics.flow("1v1"):
+        with metrics.stage("defer"):
+            await ctx.defer()
 
-    channel = await ctx.guild.create_text_channel(
-        name=f"1v1-{ctx.author.display_name}-{platform}-{game}"
-    )
+        with metrics.stage("channel"):
+            channel = await channel_pool.acquire(
+                ctx.guild, f"1v1-{ctx.author.display_name}-{platform}-{game}"
+            )
 
-    match_id = get_next_match_id()
-    logger.info(f"Received match_id: {match_id}")
+        with metrics.stage("match_id"):
+            match_id = await match_allocator.reserve(owner=channel.id)
+        logger.info(f"Received match_id: {match_id}")
 
-    if match_id is None:
-        await ctx.followup.send(
-            "There was an error getting the match ID. Please try again later."
+        if match_id is None:
+            metrics.error("1v1", "match_id")
+            await ctx.followup.send(
+                "There was an error getting the match ID. Please try again later."
+            )
+            await channel_pool.release(channel)
+            return
+
+        transaction_data = {
+            "match_id": str(match_id),  # Convert to string for database insertion
+            "channel_id": str(channel.id),
+            "player1_name": str(ctx.author.display_name),
+            "player2_name": None,
+            "match_amount_usd": int(match_amount_usd),
+            "category": category,
+            "platform": platform,
+            "game": game,
+        }
+
+        with metrics.stage("db_insert"):
+            insert_result = await insert_match_data(get_write_queue(), transaction_data)
+        if insert_result is None:
+            metrics.error("1v1", "db_insert")
+            logger.error(f"Failed to insert match data for match_id: {match_id}")
+            await match_allocator.release(match_id)
+            await ctx.followup.send(
+                "There was an error creating the match. Please try again later."
+            )
+            await channel_pool.release(channel)
+            return
+
+        logger.info(f"Successfully inserted match data for match_id: {match_id}")
+        game_catalog.record_match(category, game)
+        leaderboard.apply_match(transaction_data)
+        channel_index.put(match_id, channel.id)
+        matchmaking.add(
+            OpenMatch(
+                match_id,
+                channel.id,
+                transaction_data["player1_name"],
+                platform,
+                category,
+                game,
+                transaction_data["match_amount_usd"],
+            )
         )
-        await channel.delete()
-        return
-
-    transaction_data = {
-        "match_id": str(match_id),  # Convert to string for database insertion
-        "channel_id": str(channel.id),
-        "player1_name": str(ctx.author.display_name),
-        "player2_name": None,
-        "match_amount_usd": int(match_amount_usd),
-        "category": category,
-        "platform": platform,
-        "game": game,
-    }
-
-    supabase = initialize_supabase()
-    insert_result = insert_match_data(supabase, transaction_data)
-    if insert_result is None:
-        logger.error(f"Failed to insert match data for match_id: {match_id}")
-        await ctx.followup.send(
-            "There was an error creating the match. Please try again later."
+
+        frontpage_link = "https://1v1-three.vercel.app/"
+
+        outbox.send(
+            channel,
+            f"1v1 Match Parameters:\n"
+            f"Match ID: {match_id}\n"
+            f"Platform: {platform}\n"
+            f"Category: {category}\n"
+            f"Game: {game}\n"
+            f"Match Amount: ${match_amount_usd}\n\n"
+            f"{ctx.author.mention}, please start the match\n"
+            f"1v1 Frontpage: {frontpage_link}",
+            RESPONSE,
         )
-        await channel.delete()
-        return
-
-    logger.info(f"Successfully inserted match data for match_id: {match_id}")
-
-    frontpage_link = "https://1v1-three.vercel.app/"
-
-    await channel.send(
-        f"1v1 Match Parameters:\n"
-        f"Match ID: {match_id}\n"
-        f"Platform: {platform}\n"
-        f"Category: {category}\n"
-        f"Game: {game}\n"
-        f"Match Amount: ${match_amount_usd}\n\n"
-        f"{ctx.author.mention}, please start the match\n"
-        f"1v1 Frontpage: {frontpage_link}"
+
+        with metrics.stage("send"):
+            button = AcceptButton(ctx.author.id, channel.id, transaction_data)
+            await view_router.send_view(
+                ctx.followup.send,
+                button,
+                button.state(),
+                content=f"{ctx.author.mention} has initiated a 1v1 challenge (ID: {match_id}) for {game} ({category}) on {platform} with a match amount of ${match_amount_usd}. Waiting for an opponent!",
+            )
+
+
+def describe_match(match):
+    return (
+        f"Match ID {match.match_id}: {match.player1_name} - {match.game} "
+        f"for ${match.amount} in <#{match.channel_id}>"
     )
 
-    view = discord.ui.View()
-    button = AcceptButton(ctx.author.id, channel.id, transaction_data)
-    view.add_item(button)
 
-    await ctx.followup.send(
-        f"{ctx.author.mention} has initiated a 1v1 challenge (ID: {match_id}) for {game} ({category}) on {platform} with a match amount of ${match_amount_usd}. Waiting for an opponent!",
-        view=view,
+@discord.slash_command(name="find_1v1", description="Find open 1v1 challenges.")
+async def find_1v1(
+    ctx,
+    platform: Option(str, "Choose your platform", choices=["PS5", "PC"], required=True),
+    category: Option(
+        str,
+        "Choose the game category",
+        choices=game_catalog.categories(),
+        required=True,
+    ),
+    match_amount_usd: Option(int, "Enter the match amount in USD", required=True),
+    game: Option(
+        str, "Choose the game", autocomplete=get_game_choices, required=False
+    ) = None,
+):
+    with metrics.flow("find_1v1"):
+        matches = matchmaking.find(
+            platform,
+            category,
+            game,
+            match_amount_usd,
+            exclude_player=str(ctx.author.display_name),
+        )
+        if not matches:
+            await ctx.respond(
+                "No open 1v1 challenges match your search right now.", ephemeral=True
+            )
+            return
+
+        await ctx.respond(
+            "Open 1v1 challenges for you:\n" + "\n".join(map(describe_match, matches)),
+            ephemeral=True,
+        )
+
+
+@discord.slash_command(name="leaderboard", description="Show the 1v1 leaderboards.")
+async def show_leaderboard(
+    ctx,
+    board: Option(
+        str,
+        "Choose the leaderboard",
+        choices=list(LEADERBOARDS),
+        required=False,
+    ) = "Top earners",
+):
+    with metrics.flow("leaderboard"):
+        dimension, metric = LEADERBOARDS[board]
+        entries = leaderboard.top(dimension, metric, 10)
+        if not entries:
+            await ctx.respond(f"No entries for {board} yet.", ephemeral=True)
+            return
+        await ctx.respond(
+            f"{board}:\n" + describe(dimension, metric, entries), ephemeral=True
+        )
+
+
+async def answer_1v1(message):
+    return (
+        "To find a 1v1 opponent, use /find_1v1 to see the open challenges for your "
+        "platform and game, or /1v1 to post your own."
     )
 
 
-@bot.event
+async def answer_list(message):
+    matches = matchmaking.newest(MAX_LISTED_MATCHES)
+    if not matches:
+        return "There are no open 1v1 challenges right now. Use /1v1 to post one."
+    return "Latest open 1v1 challenges:\n" + "\n".join(map(describe_match, matches))
+
+
+async def answer_delete(message):
+    return "1v1 challenges are recorded on chain, so they can't be deleted from chat."
+
+
+async def on_guild_channel_delete(channel):
+    channel_index.discard_channel(channel.id)
+
+
 async def on_ready():
+    # Commands may queue writes while the warm-up runs: flush them from the start
+    get_write_queue().start()
+    # Nothing heavy happens before login; clients are built here, concurrently.
+    # The leaderboard backfills from this bot's matches.
+    await start_services(bot.guilds, get_repository)
+    match_allocator.start()
+    game_catalog.start(get_repository())
+    matchmaking.start(get_repository(), get_indexer())
+    channel_index.start()
+    startup_profile.report("warm-up finished")
     print(f"Logged in as {bot.user}!")
     print("Registered commands:")
     for cmd in bot.application_commands:
         print(cmd.name)
 
 
-bot.run(DISCORD_TOKEN)
+def setup(client):
+    """
+    Adds the 1v1 commands, button routing and warm-up to `client`. This is the
+    extension entry point: main.py runs it on its own bot, combined_bot/main.py on a
+    bot shared with the tournament commands.
+    """
+    global bot
+    bot = client
+    bot.add_application_command(one_v_one)
+    bot.add_application_command(find_1v1)
+    bot.add_application_command(show_leaderboard)
+    view_router.attach(bot)
+    intent_router.handle("1v1", answer_1v1)
+    intent_router.handle("list", answer_list)
+    intent_router.handle("delete", answer_delete)
+    intent_router.fallback = unidentified_prompt_message
+    intent_router.attach(bot)
+    bot.add_listener(on_guild_channel_delete)
+    bot.add_listener(on_ready)
+
+
+if __name__ == "__main__":
+    setup(create_bot(command_prefix="!", intents=intents))
+    startup_profile.report("ready to log in")
+    bot.run(DISCORD_TOKEN)
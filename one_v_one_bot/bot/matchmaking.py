@@ -0,0 +1,228 @@
+import asyncio
+import bisect
+import heapq
+import logging
+import os
+import time
+from itertools import islice
+
+logger = logging.getLogger(__name__)
+
+MATCHMAKING_LOAD_LIMIT = int(os.getenv("MATCHMAKING_LOAD_LIMIT", "50000"))
+# Default accepted stake difference, as a fraction of the requested stake
+STAKE_TOLERANCE = 0.25
+# Game slot of the per-category entries that answer "any game" lookups
+ANY_GAME = "*"
+
+
+def _game_key(game):
+    return " ".join(game.lower().split()) if game else None
+
+
+class OpenMatch:
+    __slots__ = (
+        "match_id",
+        "channel_id",
+        "player1_name",
+        "platform",
+        "category",
+        "game",
+        "amount",
+        "created_at",
+    )
+
+    def __init__(
+        self,
+        match_id,
+        channel_id,
+        player1_name,
+        platform,
+        category,
+        game,
+        amount,
+        created_at=None,
+    ):
+        self.match_id = str(match_id)
+        self.channel_id = channel_id
+        self.player1_name = player1_name
+        self.platform = platform
+        self.category = category
+        self.game = game
+        self.amount = amount
+        self.created_at = created_at if created_at is not None else time.time()
+
+    def keys(self):
+        return (
+            (self.platform, self.category, _game_key(self.game)),
+            (self.platform, self.category, ANY_GAME),
+        )
+
+
+class MatchmakingIndex:
+    """
+    In-memory inverted index of open 1v1 challenges (matches rows whose player2_name is
+    still null), keyed by (platform, category, game) and by (platform, category) for
+    lookups across every game.
+
+    Under each key the challenges are bucketed by stake: one bucket per distinct
+    match_amount_usd, oldest challenge first, plus a sorted list of the stakes present.
+    A lookup bisects to the requested stake and walks outwards bucket by bucket until
+    it has `k` challenges or leaves the tolerance range, so its cost depends on `k` and
+    not on how many challenges are open.
+
+    The index is seeded from Supabase by `load` and kept current incrementally: `add`
+    when a challenge is created, `remove` when it is accepted, and `on_events` drops
+    challenges the indexer sees joined or closed on chain.
+
+    Usage:
+        index = MatchmakingIndex()
+        index.add(OpenMatch(12, channel_id, "alice", "PC", "Fighting", "Tekken 8", 20))
+        index.find("PC", "Fighting", "Tekken 8", 25, k=5)
+    """
+
+    def __init__(self):
+        # key -> stake -> match_id -> OpenMatch
+        self._buckets = {}
+        # key -> sorted stakes with a non-empty bucket
+        self._stakes = {}
+        self._matches = {}
+        self._task = None
+
+    def __len__(self):
+        return len(self._matches)
+
+    def add(self, match):
+        self.remove(match.match_id)
+        for key in match.keys():
+            buckets = self._buckets.setdefault(key, {})
+            bucket = buckets.get(match.amount)
+            if bucket is None:
+                bucket = buckets[match.amount] = {}
+                bisect.insort(self._stakes.setdefault(key, []), match.amount)
+            bucket[match.match_id] = match
+        self._matches[match.match_id] = match
+
+    def remove(self, match_id):
+        match = self._matches.pop(str(match_id), None)
+        if match is None:
+            return None
+        for key in match.keys():
+            buckets = self._buckets[key]
+            bucket = buckets[match.amount]
+            del bucket[match.match_id]
+            if bucket:
+                continue
+            del buckets[match.amount]
+            stakes = self._stakes[key]
+            del stakes[bisect.bisect_left(stakes, match.amount)]
+            if not stakes:
+                del self._buckets[key]
+                del self._stakes[key]
+        return match
+
+    def rename(self, old_match_id, new_match_id):
+        """Moves an open challenge to a new match ID, e.g. after an ID collision."""
+        match = self.remove(old_match_id)
+        if match is not None:
+            match.match_id = str(new_match_id)
+            self.add(match)
+        return match
+
+    def newest(self, k=10):
+        """The `k` most recently opened challenges, newest first."""
+        return list(islice(reversed(self._matches.values()), k))
+
+    def find(
+        self,
+        platform,
+        category,
+        game,
+        amount,
+        k=5,
+        tolerance=STAKE_TOLERANCE,
+        exclude_player=None,
+    ):
+        """
+        Returns up to `k` open challenges on `platform` in `category` (and `game`, if
+        given) whose stake is within `tolerance` of `amount`, closest stake first and
+        then oldest first.
+        """
+        key = (platform, category, _game_key(game) if game else ANY_GAME)
+        stakes = self._stakes.get(key)
+        if not stakes:
+            return []
+        buckets = self._buckets[key]
+        low = amount * (1 - tolerance)
+        high = amount * (1 + tolerance)
+
+        found = []
+        right = bisect.bisect_left(stakes, amount)
+        left = right - 1
+        while len(found) < k:
+            below = amount - stakes[left] if left >= 0 else None
+            above = stakes[right] - amount if right < len(stakes) else None
+            if below is not None and stakes[left] < low:
+                below = None
+            if above is not None and stakes[right] > high:
+                above = None
+            if below is None and above is None:
+                break
+            if above is None or (below is not None and below < above):
+                candidates = buckets[stakes[left]].values()
+                left -= 1
+            elif below is None or above < below:
+                candidates = buckets[stakes[right]].values()
+                right += 1
+            else:
+                # Equally far above and below: interleave the two buckets by age
+                candidates = heapq.merge(
+                    buckets[stakes[left]].values(),
+                    buckets[stakes[right]].values(),
+                    key=lambda match: match.created_at,
+                )
+                left -= 1
+                right += 1
+            for match in candidates:
+                if exclude_player is None or match.player1_name != exclude_player:
+                    found.append(match)
+                    if len(found) == k:
+                        break
+        return found
+
+    def load(self, rows):
+        for row in rows:
+            if row.get("player2_name"):
+                continue
+            self.add(
+                OpenMatch(
+                    row["match_id"],
+                    row.get("channel_id"),
+                    row.get("player1_name"),
+                    row.get("platform"),
+                    row.get("category"),
+                    row.get("game"),
+                    row.get("match_amount_usd") or 0,
+                )
+            )
+
+    async def load_from_repository(self, repository, limit=MATCHMAKING_LOAD_LIMIT):
+        try:
+            rows = await repository.get_open_matches(limit)
+        except Exception as e:
+            logger.error(f"Failed to load open matches: {str(e)}")
+            return
+        self.load(rows)
+        logger.info(f"Matchmaking index loaded with {len(self)} open challenges")
+
+    def on_events(self, events):
+        """Indexer listener: drops challenges that were joined or closed on chain."""
+        for event in events:
+            if event["event"] in ("MatchJoined", "MatchClosed"):
+                self.remove(event["args"]["matchId"])
+
+    def start(self, repository, indexer):
+        """Loads the open challenges and follows the indexer (idempotent)."""
+        if self._task is None:
+            indexer.add_listener(self.on_events)
+            self._task = asyncio.create_task(self.load_from_repository(repository))
+        return self._task
@@ -7,11 +7,75 @@ const supabaseKey = process.env.NEXT_PUBLIC_SUPABASE_ANON_KEY;
 const supabase = createClient(supabaseUrl, supabaseKey);
 
 const DISCORD_BOT_TOKEN = process.env.DISCORD_BOT_TOKEN;
+// The bot's match channel index (e.g. http://127.0.0.1:9180), when it is reachable,
+// and the shared secret it expects (the bot's CHANNEL_INDEX_TOKEN)
+const CHANNEL_INDEX_URL = process.env.CHANNEL_INDEX_URL;
+const CHANNEL_INDEX_TOKEN = process.env.CHANNEL_INDEX_TOKEN;
+
+// Resolves every match ID to its channel ID: one request to the channel index, then
+// one Supabase query for the matches it does not know. Returns a Map of the found ones.
+async function getChannelIds(matchIds) {
+  const channels = new Map();
+  let missing = matchIds;
+  if (CHANNEL_INDEX_URL) {
+    try {
+      const ids = matchIds.map(encodeURIComponent).join(",");
+      const response = await fetch(`${CHANNEL_INDEX_URL}/channels?match_ids=${ids}`, {
+        headers: CHANNEL_INDEX_TOKEN
+          ? { Authorization: `Bearer ${CHANNEL_INDEX_TOKEN}` }
+          : {},
+      });
+      if (response.ok) {
+        const { channels: found } = await response.json();
+        for (const [matchId, channelId] of Object.entries(found)) {
+          channels.set(matchId, channelId);
+        }
+        missing = matchIds.filter((matchId) => !channels.has(matchId));
+      }
+    } catch (error) {
+      console.error("Channel index lookup failed:", error);
+    }
+  }
+  if (missing.length === 0) return channels;
+
+  // Fetch the remaining channel IDs from Supabase
+  const { data, error } = await supabase
+    .from("matches")
+    .select("match_id, channel_id")
+    .in("match_id", missing);
+
+  if (error) throw error;
+  for (const row of data) {
+    channels.set(String(row.match_id), row.channel_id);
+  }
+  return channels;
+}
+
+async function postToChannel(channelId, content) {
+  const discordWebhookUrl = `https://discord.com/api/v9/channels/${channelId}/messages`;
+  const discordResponse = await fetch(discordWebhookUrl, {
+    method: "POST",
+    headers: {
+      Authorization: `Bot ${DISCORD_BOT_TOKEN}`,
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({ content }),
+  });
+
+  const discordData = await discordResponse.json();
+
+  if (!discordResponse.ok) {
+    throw new Error(discordData.error || "Failed to send message to Discord");
+  }
+  return discordData;
+}
 
 export async function POST(req) {
-  const { matchId, content } = await req.json();
+  // One match ({ matchId }) or several ({ matchIds: [...] }) get the same content
+  const { matchId, matchIds, content } = await req.json();
+  const ids = (matchIds || (matchId ? [matchId] : [])).map(String);
 
-  if (!matchId || !content) {
+  if (ids.length === 0 || !content) {
     return new Response(
       JSON.stringify({ error: "Missing matchId or content" }),
       {
@@ -22,43 +86,35 @@ export async function POST(req) {
   }
 
   try {
-    // Fetch channel ID from Supabase
-    const { data, error } = await supabase
-      .from("matches")
-      .select("channel_id")
-      .eq("match_id", matchId)
-      .single();
-
-    if (error) throw error;
-    if (!data) throw new Error("Match not found");
-
-    const channelId = data.channel_id;
+    const channels = await getChannelIds(ids);
+    if (channels.size === 0) throw new Error("Match not found");
 
     console.log("Posting match info to Discord...");
-    console.log("Channel ID:", channelId);
+    console.log("Channels:", Object.fromEntries(channels));
     console.log("Content:", content);
 
-    // Send message to Discord
-    const discordWebhookUrl = `https://discord.com/api/v9/channels/${channelId}/messages`;
-    const discordResponse = await fetch(discordWebhookUrl, {
-      method: "POST",
-      headers: {
-        Authorization: `Bot ${DISCORD_BOT_TOKEN}`,
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({ content }),
-    });
-
-    const discordData = await discordResponse.json();
-
-    if (!discordResponse.ok) {
-      throw new Error(discordData.error || "Failed to send message to Discord");
-    }
+    const results = await Promise.allSettled(
+      ids.map((id) =>
+        channels.has(id)
+          ? postToChannel(channels.get(id), content)
+          : Promise.reject(new Error("Match not found"))
+      )
+    );
+    const failed = results.filter((result) => result.status === "rejected");
+    if (failed.length === ids.length) throw failed[0].reason;
 
     return new Response(
       JSON.stringify({
         message: "Match info posted to Discord successfully",
-        discordResponse: discordData,
+        discordResponse: results.length === 1 ? results[0].value : undefined,
+        results: Object.fromEntries(
+          ids.map((id, i) => [
+            id,
+            results[i].status === "fulfilled"
+              ? { ok: true }
+              : { ok: false, error: results[i].reason.message },
+          ])
+        ),
       }),
       {
         status: 200,
@@ -0,0 +1,7 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# bot_common is a package at the root; the tournament bot's modules are flat
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tournament_bot", "bot"))
@@ -0,0 +1,66 @@
+import random
+
+from bracket import DOUBLE_ELIMINATION, EliminationBracket, SwissBracket
+
+
+def play(bracket, pick):
+    """Plays `bracket` to the end, `pick(a, b)` choosing each winner; returns losses."""
+    losses = {entrant: 0 for entrant in bracket.entrants}
+    while not bracket.finished:
+        for match, a, b in bracket.ready_matches():
+            winner = pick(match, a, b)
+            bracket.report(match, winner)
+            losses[b if winner == a else a] += 1
+    return losses
+
+
+def test_grand_final_is_reset_when_the_losers_champion_wins():
+    bracket = EliminationBracket(list("abcd"), double=True)
+    assert bracket.format == DOUBLE_ELIMINATION
+
+    def pick(match, a, b):
+        # "a" wins everything but the first grand final
+        if match == bracket.grand_final:
+            return b
+        return a if "a" in (a, b) else min(a, b)
+
+    losses = play(bracket, pick)
+    assert bracket.final == bracket.reset
+    assert bracket.round_label(bracket.reset) == "Grand final reset"
+    assert bracket.champion == "a"
+    assert losses["a"] == 1
+
+
+def test_grand_final_decides_when_the_winners_champion_wins():
+    bracket = EliminationBracket(list("abcd"), double=True)
+    play(bracket, lambda match, a, b: min(a, b))
+    assert bracket.final == bracket.grand_final
+    assert bracket.champion == "a"
+    assert bracket.winner[bracket.reset] == -1
+
+
+def test_double_elimination_champion_is_the_only_player_with_fewer_than_two_losses():
+    for count in (4, 5, 8, 16):
+        for seed in range(20):
+            rng = random.Random(seed)
+            bracket = EliminationBracket(list(range(count)), double=True)
+            losses = play(bracket, lambda match, a, b: rng.choice((a, b)))
+            assert losses[bracket.champion] <= 1
+            assert [e for e, lost in losses.items() if lost < 2] == [bracket.champion]
+
+
+def test_swiss_rounds_have_no_rematches():
+    for count in (5, 7, 16, 64):
+        for seed in range(20):
+            rng = random.Random(seed)
+            bracket = SwissBracket(list(range(count)))
+            played = set()
+
+            def pick(match, a, b):
+                pair = frozenset((a, b))
+                assert pair not in played, f"{count} entrants, seed {seed}: rematch"
+                played.add(pair)
+                return rng.choice((a, b))
+
+            play(bracket, pick)
+            assert bracket.current_round == bracket.rounds
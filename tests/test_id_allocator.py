@@ -0,0 +1,124 @@
+import asyncio
+
+from bot_common.id_allocator import IdAllocator
+
+
+class Chain:
+    """The contract's next ID and the ID events mined so far, by block."""
+
+    def __init__(self, next_id, head_block=100):
+        self.next_id = next_id
+        self.head_block = head_block
+        self.events = []
+
+    async def read_next_id(self):
+        return self.next_id
+
+    async def read_head_block(self):
+        return self.head_block
+
+    async def read_events(self, from_block):
+        if from_block is None:
+            return self.head_block, []
+        return self.head_block, [
+            (event_id, block) for event_id, block in self.events if block >= from_block
+        ]
+
+    def mine(self, event_id):
+        self.head_block += 1
+        self.events.append((event_id, self.head_block))
+        self.next_id = max(self.next_id, event_id + 1)
+
+
+def allocator(chain, **kwargs):
+    return IdAllocator(
+        "match",
+        chain.read_next_id,
+        chain.read_events,
+        read_head_block=chain.read_head_block,
+        **kwargs,
+    )
+
+
+def test_collision_is_reissued_past_the_chain():
+    async def run():
+        chain = Chain(10)
+        repaired = []
+
+        async def on_collision(old_id, new_id, owner):
+            repaired.append((old_id, new_id, owner))
+
+        ids = allocator(chain, on_collision=on_collision)
+        await ids.reconcile()
+        # Someone else's transactions take 10 and 11 before the allocator sees them
+        chain.mine(10)
+        chain.mine(11)
+        assert await ids.reserve("alice") == 10
+        await ids.reconcile()
+        assert repaired == [(10, 12, "alice")]
+        assert ids.collisions == 1
+        assert await ids.reserve() == 13
+
+    asyncio.run(run())
+
+
+def test_own_event_is_not_a_collision():
+    async def run():
+        chain = Chain(10)
+        ids = allocator(chain)
+        assert await ids.reserve() == 10
+        # Let the reservation's head block read complete
+        await asyncio.sleep(0)
+        # Mined after the reservation: the reserved transaction itself
+        chain.mine(10)
+        await ids.reconcile()
+        assert ids.collisions == 0
+        assert 10 not in ids.pending
+
+    asyncio.run(run())
+
+
+def test_release_gives_back_the_last_id():
+    async def run():
+        chain = Chain(10)
+        ids = allocator(chain)
+        assert await ids.reserve() == 10
+        assert await ids.reserve() == 11
+        await ids.release(11)
+        assert await ids.reserve() == 11
+        # Not the last one handed out: the gap stays until the chain resyncs it
+        await ids.release(10)
+        assert await ids.reserve() == 12
+
+    asyncio.run(run())
+
+
+def test_reconcile_moves_back_to_the_chain_once_nothing_is_pending_above_it():
+    async def run():
+        chain = Chain(10)
+        ids = allocator(chain)
+        assert await ids.reserve() == 10
+        assert await ids.reserve() == 11
+        await ids.release(10)
+        await ids.reconcile()
+        # 11 is still pending above the chain's next ID
+        assert await ids.reserve() == 12
+        await ids.release(11)
+        await ids.release(12)
+        await ids.reconcile()
+        assert await ids.reserve() == 10
+
+    asyncio.run(run())
+
+
+def test_pending_reservations_survive_a_restart(tmp_path):
+    async def run():
+        chain = Chain(10)
+        state_path = str(tmp_path / "match_id_allocator.json")
+        ids = allocator(chain, state_path=state_path)
+        assert await ids.reserve() == 10
+        restarted = allocator(chain, state_path=state_path)
+        assert await restarted.reserve() == 11
+        assert set(restarted.pending) == {10, 11}
+
+    asyncio.run(run())
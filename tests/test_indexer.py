@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+from bot_common.indexer import EventIndexer
+
+
+def indexer_with(batches, reverted=()):
+    indexer = EventIndexer(None, SimpleNamespace(abi=[]), store=None)
+    batches = iter(batches)
+    indexer._reverted = list(reverted)
+
+    def poll_once():
+        batch = next(batches)
+        if isinstance(batch, Exception):
+            raise batch
+        return batch
+
+    indexer.poll_once = poll_once
+    return indexer
+
+
+async def run_until(indexer, done):
+    """Runs the indexer's poll loop until `done()` is true."""
+    task = asyncio.create_task(indexer.run(interval=0))
+    try:
+        async with asyncio.timeout(5):
+            while not done():
+                await asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+
+
+def test_failing_listener_does_not_stop_the_others():
+    received = []
+    reverted = []
+
+    def broken(events):
+        raise RuntimeError("listener bug")
+
+    async def run():
+        indexer = indexer_with([["e1"], ["e2"]], reverted=["r1"])
+        indexer.add_reorg_listener(broken)
+        indexer.add_reorg_listener(reverted.extend)
+        indexer.add_listener(broken)
+        indexer.add_listener(received.extend)
+        await run_until(indexer, lambda: len(received) == 2)
+
+    asyncio.run(run())
+    assert reverted == ["r1"]
+    assert received == ["e1", "e2"]
+
+
+def test_failed_poll_still_reports_reverted_events():
+    reverted = []
+
+    async def run():
+        indexer = indexer_with([RuntimeError("rpc down")], reverted=["r1"])
+        indexer.add_reorg_listener(reverted.extend)
+        await run_until(indexer, lambda: reverted)
+
+    asyncio.run(run())
+    assert reverted == ["r1"]
@@ -0,0 +1,663 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from array import array
+from itertools import chain
+
+logger = logging.getLogger(__name__)
+
+SINGLE_ELIMINATION = "single_elimination"
+DOUBLE_ELIMINATION = "double_elimination"
+SWISS = "swiss"
+FORMATS = (SINGLE_ELIMINATION, DOUBLE_ELIMINATION, SWISS)
+
+BRACKET_STORE_PATH = os.getenv("BRACKET_STORE_PATH", "brackets.log")
+# Pairing attempts a Swiss round may spend avoiding rematches before allowing them
+SWISS_PAIRING_BUDGET = int(os.getenv("SWISS_PAIRING_BUDGET", "100000"))
+
+# Values of a match side or winner that are not an entrant index
+EMPTY = -1
+BYE = -2
+
+# BracketStore.join outcomes
+JOINED = "joined"
+ALREADY_JOINED = "already_joined"
+FULL = "full"
+CLOSED = "closed"
+
+# BracketStore.report outcomes
+REPORTED = "reported"
+AWAITING_CONFIRMATION = "awaiting_confirmation"
+DISPUTED = "disputed"
+
+
+def seed_positions(size):
+    """
+    Bracket slot of each seed for a power-of-two `size`, arranged so that the top two
+    seeds can only meet in the final, the top four in the semi-finals, and so on.
+    """
+    order = [0]
+    while len(order) < size:
+        mirror = 2 * len(order) - 1
+        order = [slot for seed in order for slot in (seed, mirror - seed)]
+    return order
+
+
+def seed_entrants(entrants, ratings=None):
+    """Orders entrants by rating, highest first; ties and unrated keep join order."""
+    if not ratings:
+        return list(entrants)
+    return sorted(entrants, key=lambda entrant: -ratings.get(entrant, 0))
+
+
+class EliminationBracket:
+    """
+    Single or double elimination bracket over entrants given in seed order, padded
+    with byes to a power of two.
+
+    Every match is a row in parallel arrays: its two sides and winner (entrant indexes,
+    EMPTY or BYE), its round and where its winner and loser go next, encoded as
+    match * 2 + side. Reporting a result writes the winner and loser into the matches
+    they feed and settles byes along the way, so only the matches touched by a result
+    are visited. Rounds are numbered 1.. in the winners' bracket, -1.. in the losers'
+    bracket, and the grand final of a double elimination bracket comes last.
+
+    The double elimination grand final is played by the winners' bracket champion
+    (side a) and the losers' bracket champion (side b). If side b wins, both have lost
+    once and the reset match decides the tournament.
+
+    Args:
+        entrants (list): Entrant IDs, best seed first.
+        double (bool): Double instead of single elimination.
+    """
+
+    def __init__(self, entrants, double=False):
+        if len(entrants) < 2:
+            raise ValueError("A bracket needs at least two entrants")
+        self.format = DOUBLE_ELIMINATION if double else SINGLE_ELIMINATION
+        self.entrants = list(entrants)
+        self._index = {entrant: i for i, entrant in enumerate(self.entrants)}
+        self.size = 1 << (len(self.entrants) - 1).bit_length()
+
+        self.a = array("i")
+        self.b = array("i")
+        self.winner = array("i")
+        self.round = array("i")
+        self.next_winner = array("i")
+        self.next_loser = array("i")
+        self.ready = set()
+        self.final = EMPTY
+        self.grand_final = EMPTY
+        self.reset = EMPTY
+        self._build(double)
+
+    def _add(self, round_number):
+        self.a.append(EMPTY)
+        self.b.append(EMPTY)
+        self.winner.append(EMPTY)
+        self.round.append(round_number)
+        self.next_winner.append(EMPTY)
+        self.next_loser.append(EMPTY)
+        return len(self.a) - 1
+
+    def _build(self, double):
+        rounds = self.size.bit_length() - 1
+        winners = [[self._add(1) for _ in range(self.size // 2)]]
+        for round_number in range(2, rounds + 1):
+            previous = winners[-1]
+            current = [self._add(round_number) for _ in range(len(previous) // 2)]
+            for i, match in enumerate(previous):
+                self.next_winner[match] = current[i // 2] * 2 + i % 2
+            winners.append(current)
+        self.final = winners[-1][0]
+
+        if double and rounds > 1:
+            self._build_losers(winners)
+
+        # Seeds past the number of entrants are byes
+        slots = seed_positions(self.size)
+        placements = []
+        for seed, slot in enumerate(slots):
+            entrant = seed if seed < len(self.entrants) else BYE
+            placements.append((winners[0][slot // 2] * 2 + slot % 2, entrant))
+        self._place(placements)
+
+    def _build_losers(self, winners):
+        rounds = len(winners)
+        label = 1
+        losers = [self._add(-label) for _ in range(len(winners[0]) // 2)]
+        for i, match in enumerate(winners[0]):
+            self.next_loser[match] = losers[i // 2] * 2 + i % 2
+        for round_index in range(1, rounds):
+            # Losers dropping from the winners' bracket, in reverse order to delay rematches
+            label += 1
+            dropping = winners[round_index]
+            current = [self._add(-label) for _ in dropping]
+            for i, match in enumerate(losers):
+                self.next_winner[match] = current[i] * 2
+            for i, match in enumerate(reversed(dropping)):
+                self.next_loser[match] = current[i] * 2 + 1
+            losers = current
+            if round_index < rounds - 1:
+                label += 1
+                current = [self._add(-label) for _ in range(len(losers) // 2)]
+                for i, match in enumerate(losers):
+                    self.next_winner[match] = current[i // 2] * 2 + i % 2
+                losers = current
+        grand_final = self._add(rounds + 1)
+        self.next_winner[self.final] = grand_final * 2
+        self.next_winner[losers[0]] = grand_final * 2 + 1
+        self.final = self.grand_final = grand_final
+        # Only played if the losers' bracket champion wins the grand final
+        self.reset = self._add(rounds + 2)
+
+    def _place(self, placements):
+        while placements:
+            target, entrant = placements.pop()
+            match, side = target >> 1, target & 1
+            if side:
+                self.b[match] = entrant
+            else:
+                self.a[match] = entrant
+            a, b = self.a[match], self.b[match]
+            if a == EMPTY or b == EMPTY:
+                continue
+            if a != BYE and b != BYE:
+                self.ready.add(match)
+                continue
+            # A bye: the other side goes through without playing
+            winner, loser = (b, a) if a == BYE else (a, b)
+            self._settle(match, winner, loser, placements)
+
+    def _settle(self, match, winner, loser, placements):
+        self.winner[match] = winner
+        self.ready.discard(match)
+        if self.next_winner[match] != EMPTY:
+            placements.append((self.next_winner[match], winner))
+        if self.next_loser[match] != EMPTY:
+            placements.append((self.next_loser[match], loser))
+        if match == self.grand_final and winner == self.b[match] and loser != BYE:
+            # The winners' bracket champion lost for the first time: play again
+            self.final = self.reset
+            placements.append((self.reset * 2 + 1, winner))
+            placements.append((self.reset * 2, loser))
+
+    @property
+    def finished(self):
+        return self.winner[self.final] != EMPTY
+
+    @property
+    def champion(self):
+        winner = self.winner[self.final]
+        return self.entrants[winner] if winner >= 0 else None
+
+    def report(self, match, winner_id):
+        """Records that `winner_id` won `match` and advances both players."""
+        if match not in self.ready:
+            raise ValueError(f"Match {match} is not waiting for a result")
+        winner = self._index.get(winner_id)
+        if winner not in (self.a[match], self.b[match]):
+            raise ValueError(f"{winner_id} is not playing match {match}")
+        loser = self.b[match] if winner == self.a[match] else self.a[match]
+        placements = []
+        self._settle(match, winner, loser, placements)
+        self._place(placements)
+
+    def ready_matches(self):
+        """[(match, entrant_a, entrant_b)] waiting for a result, earliest round first."""
+        return [
+            (match, self.entrants[self.a[match]], self.entrants[self.b[match]])
+            for match in sorted(self.ready, key=lambda m: (abs(self.round[m]), m))
+        ]
+
+    def round_label(self, match):
+        round_number = self.round[match]
+        if match == self.reset:
+            return "Grand final reset"
+        if match == self.grand_final:
+            return "Grand final"
+        if round_number < 0:
+            return f"Losers round {-round_number}"
+        return f"Round {round_number}"
+
+
+class SwissBracket:
+    """
+    Swiss system: every entrant plays every round, against opponents on the same
+    score where possible, for ceil(log2(entrants)) rounds by default.
+
+    Each round is paired when the previous one is complete, score group by score group
+    (top half against bottom half, by seed). Rematches are avoided by backtracking over
+    the pairings and floating players down to lower score groups; only when no round
+    without rematches is found within SWISS_PAIRING_BUDGET attempts are they allowed.
+    With an odd number of
+    entrants the lowest-ranked player without a bye gets one, worth a win. Standings
+    break ties on Buchholz (the opponents' total score), then seed.
+
+    Args:
+        entrants (list): Entrant IDs, best seed first.
+        rounds (int, optional): Number of rounds.
+    """
+
+    format = SWISS
+
+    def __init__(self, entrants, rounds=None):
+        if len(entrants) < 2:
+            raise ValueError("A bracket needs at least two entrants")
+        self.entrants = list(entrants)
+        self._index = {entrant: i for i, entrant in enumerate(self.entrants)}
+        count = len(self.entrants)
+        self.rounds = rounds or max(1, math.ceil(math.log2(count)))
+        self.score = array("i", [0] * count)
+        self.had_bye = bytearray(count)
+        self.opponents = [set() for _ in range(count)]
+
+        self.a = array("i")
+        self.b = array("i")
+        self.winner = array("i")
+        self.round = array("i")
+        self.ready = set()
+        self.current_round = 0
+        self._pair()
+
+    def _add(self, a, b):
+        self.a.append(a)
+        self.b.append(b)
+        self.round.append(self.current_round)
+        if b == BYE:
+            self.winner.append(a)
+            self.score[a] += 1
+            self.had_bye[a] = 1
+        else:
+            self.winner.append(EMPTY)
+            self.ready.add(len(self.a) - 1)
+            self.opponents[a].add(b)
+            self.opponents[b].add(a)
+
+    def _pair(self):
+        self.current_round += 1
+        order = sorted(range(len(self.entrants)), key=lambda i: (-self.score[i], i))
+        if len(order) % 2:
+            bye = next((i for i in reversed(order) if not self.had_bye[i]), order[-1])
+            order.remove(bye)
+            self._add(bye, BYE)
+
+        pairs = self._match(order) or self._match(order, rematches=True)
+        for a, b in pairs:
+            self._add(a, b)
+
+    def _candidates(self, order, k, used, group_end, rematches):
+        """Possible opponents of order[k], preferred first, as indexes into `order`."""
+        opponents = self.opponents[order[k]]
+        ideal = min(k + max((group_end - k) // 2, 1), group_end)
+        for j in chain(
+            range(ideal, group_end), range(k + 1, ideal), range(group_end, len(order))
+        ):
+            if not used[j] and (rematches or order[j] not in opponents):
+                yield j
+
+    def _match(self, order, rematches=False):
+        """
+        Pairs `order` (best first) by depth-first search, each player taking the first
+        opponent it can that leaves a pairing for the rest. Returns [(a, b)], or None
+        if there is none without rematches within the budget.
+        """
+        count = len(order)
+        group_end = [0] * count
+        end = count
+        for k in range(count - 1, -1, -1):
+            if k + 1 < count and self.score[order[k]] != self.score[order[k + 1]]:
+                end = k + 1
+            group_end[k] = end
+        used = [False] * count
+        # [player index, candidates, chosen opponent index]
+        frames = []
+        budget = SWISS_PAIRING_BUDGET
+        k = 0
+        while True:
+            while k < count and used[k]:
+                k += 1
+            if k == count:
+                return [(order[frame[0]], order[frame[2]]) for frame in frames]
+            used[k] = True
+            frames.append(
+                [k, self._candidates(order, k, used, group_end[k], rematches), None]
+            )
+            while True:
+                frame = frames[-1]
+                if frame[2] is not None:
+                    used[frame[2]] = False
+                frame[2] = next(frame[1], None) if budget > 0 else None
+                budget -= 1
+                if frame[2] is not None:
+                    used[frame[2]] = True
+                    k = frame[0] + 1
+                    break
+                used[frame[0]] = False
+                frames.pop()
+                if not frames or budget <= 0:
+                    return None
+
+    @property
+    def finished(self):
+        return not self.ready and self.current_round >= self.rounds
+
+    @property
+    def champion(self):
+        return self.standings(1)[0][0] if self.finished else None
+
+    def report(self, match, winner_id):
+        """Records that `winner_id` won `match`; pairs the next round once all are in."""
+        if match not in self.ready:
+            raise ValueError(f"Match {match} is not waiting for a result")
+        winner = self._index.get(winner_id)
+        if winner not in (self.a[match], self.b[match]):
+            raise ValueError(f"{winner_id} is not playing match {match}")
+        self.winner[match] = winner
+        self.score[winner] += 1
+        self.ready.discard(match)
+        if not self.ready and self.current_round < self.rounds:
+            self._pair()
+
+    def ready_matches(self):
+        return [
+            (match, self.entrants[self.a[match]], self.entrants[self.b[match]])
+            for match in sorted(self.ready)
+        ]
+
+    def standings(self, limit=None):
+        """[(entrant, score, buchholz)] best first."""
+        buchholz = [
+            sum(self.score[o] for o in opponents) for opponents in self.opponents
+        ]
+        order = sorted(
+            range(len(self.entrants)),
+            key=lambda i: (-self.score[i], -buchholz[i], i),
+        )
+        return [(self.entrants[i], self.score[i], buchholz[i]) for i in order[:limit]]
+
+    def round_label(self, match):
+        return f"Round {self.round[match]}"
+
+
+def create_bracket(bracket_format, entrants):
+    if bracket_format == SWISS:
+        return SwissBracket(entrants)
+    if bracket_format in (SINGLE_ELIMINATION, DOUBLE_ELIMINATION):
+        return EliminationBracket(entrants, double=bracket_format == DOUBLE_ELIMINATION)
+    raise ValueError(f"Unknown bracket format: {bracket_format}")
+
+
+class Tournament:
+    __slots__ = (
+        "format",
+        "capacity",
+        "host",
+        "entrants",
+        "joined",
+        "set_up",
+        "bracket",
+        "claims",
+    )
+
+    def __init__(self, bracket_format, capacity, host=None):
+        self.format = bracket_format
+        self.capacity = capacity
+        self.host = host
+        self.entrants = []
+        self.joined = set()
+        # Entrants whose private channel has been set up
+        self.set_up = set()
+        self.bracket = None
+        # match -> {player: winner they reported}, until the result is recorded
+        self.claims = {}
+
+
+class BracketStore:
+    """
+    Sign-ups and brackets of the open tournaments, persisted as a log of operations
+    (create, join, channel, start, claim, result, drop, rename) appended one line each.
+
+    Pairings are a pure function of the entrants and the results, so `load` restores
+    every bracket by replaying its log, then rewrites the log without the dropped
+    tournaments; a renamed tournament keeps its records under the old ID, followed by
+    the rename.
+
+    A result is recorded when the tournament's host reports it, or when both players
+    of the match have reported the same winner; each player's report is logged as a
+    claim until then. Reports from anyone else are rejected before they are logged.
+
+    A join is logged when it is accepted and its channel op once the entrant's private
+    channel is set up, so a join lost in the queue by a restart can be resubmitted.
+
+    Commands must `await store.ready()` before touching the store; `start` loads it
+    in a worker thread after login.
+
+    Args:
+        path (str): Log file.
+    """
+
+    def __init__(self, path=BRACKET_STORE_PATH):
+        self.path = path
+        self.tournaments = {}
+        # old tournament ID -> the ID it was renamed to
+        self.renamed = {}
+        self._log = []
+        self._file = None
+        self._loaded = asyncio.Event()
+
+    def _apply(self, record):
+        op = record["op"]
+        tournament_id = record["tournament"]
+        if op == "create":
+            self.tournaments[tournament_id] = Tournament(
+                record["format"], record["capacity"], record.get("host")
+            )
+            return
+        tournament = self.tournaments.get(tournament_id)
+        if tournament is None:
+            return
+        if op == "join":
+            tournament.entrants.append(record["entrant"])
+            tournament.joined.add(record["entrant"])
+        elif op == "channel":
+            tournament.set_up.add(record["entrant"])
+        elif op == "start":
+            tournament.bracket = create_bracket(
+                tournament.format, seed_entrants(tournament.entrants)
+            )
+        elif op == "claim":
+            tournament.claims.setdefault(record["match"], {})[record["player"]] = (
+                record["winner"]
+            )
+        elif op == "result":
+            tournament.bracket.report(record["match"], record["winner"])
+            tournament.claims.pop(record["match"], None)
+        elif op == "drop":
+            del self.tournaments[tournament_id]
+        elif op == "rename":
+            self.tournaments[record["to"]] = self.tournaments.pop(tournament_id)
+            self.renamed[tournament_id] = record["to"]
+
+    def _append(self, record):
+        self._apply(record)
+        if self._file is not None:
+            self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self._file.flush()
+
+    def load(self):
+        started = time.perf_counter()
+        records = []
+        if self.path and os.path.exists(self.path):
+            with open(self.path, "r") as log_file:
+                for line in log_file:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # Torn last line after a crash
+                        continue
+        for record in records:
+            try:
+                self._apply(record)
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Skipping bad bracket record {record}: {e}")
+        if self.path:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as log_file:
+                for record in records:
+                    if self.resolve(record.get("tournament")) in self.tournaments:
+                        log_file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            os.replace(tmp_path, self.path)
+            self._file = open(self.path, "a")
+        logger.info(
+            f"Restored {len(self.tournaments)} tournaments in "
+            f"{time.perf_counter() - started:.2f}s"
+        )
+        return self
+
+    async def start(self):
+        if not self._loaded.is_set():
+            await asyncio.to_thread(self.load)
+            self._loaded.set()
+
+    async def ready(self):
+        await self._loaded.wait()
+
+    def get(self, tournament_id):
+        return self.tournaments.get(tournament_id)
+
+    def resolve(self, tournament_id):
+        """Returns the current ID of a tournament that may have been renamed since."""
+        seen = set()
+        while tournament_id in self.renamed and tournament_id not in seen:
+            seen.add(tournament_id)
+            tournament_id = self.renamed[tournament_id]
+        return tournament_id
+
+    def is_host(self, tournament_id, user_id):
+        tournament = self.tournaments.get(tournament_id)
+        return (
+            tournament is not None
+            and tournament.host is not None
+            and tournament.host == user_id
+        )
+
+    def create(self, tournament_id, bracket_format, capacity, host=None):
+        if bracket_format not in FORMATS:
+            raise ValueError(f"Unknown bracket format: {bracket_format}")
+        self._append(
+            {
+                "op": "create",
+                "tournament": tournament_id,
+                "format": bracket_format,
+                "capacity": int(capacity),
+                "host": host,
+            }
+        )
+
+    def join(self, tournament_id, entrant):
+        tournament = self.tournaments.get(tournament_id)
+        if tournament is None or tournament.bracket is not None:
+            return CLOSED
+        if entrant in tournament.joined:
+            return ALREADY_JOINED
+        if len(tournament.entrants) >= tournament.capacity:
+            return FULL
+        self._append({"op": "join", "tournament": tournament_id, "entrant": entrant})
+        return JOINED
+
+    def channel_ready(self, tournament_id, entrant):
+        """Records that the entrant's private channel has been set up."""
+        tournament = self.tournaments.get(tournament_id)
+        if tournament is not None and entrant not in tournament.set_up:
+            self._append(
+                {"op": "channel", "tournament": tournament_id, "entrant": entrant}
+            )
+
+    def needs_channel(self, tournament_id, entrant):
+        """True if the entrant joined but their private channel was never set up."""
+        tournament = self.tournaments.get(tournament_id)
+        return (
+            tournament is not None
+            and entrant in tournament.joined
+            and entrant not in tournament.set_up
+        )
+
+    def start_bracket(self, tournament_id):
+        """Builds the bracket from the sign-ups; raises ValueError if it cannot start."""
+        tournament = self.tournaments.get(tournament_id)
+        if tournament is None:
+            raise ValueError(f"Tournament {tournament_id} does not exist")
+        if tournament.bracket is not None:
+            raise ValueError(f"Tournament {tournament_id} has already started")
+        if len(tournament.entrants) < 2:
+            raise ValueError(f"Tournament {tournament_id} needs at least two entrants")
+        self._append({"op": "start", "tournament": tournament_id})
+        return tournament.bracket
+
+    def report(self, tournament_id, match, winner, reporter):
+        """
+        Reports `winner` of `match` on behalf of `reporter`. Returns REPORTED once the
+        result is recorded, AWAITING_CONFIRMATION while the other player has not
+        confirmed it, or DISPUTED if the players named different winners; raises
+        ValueError for an invalid report or a reporter who may not report it.
+        """
+        tournament = self.tournaments.get(tournament_id)
+        if tournament is None or tournament.bracket is None:
+            raise ValueError(f"Tournament {tournament_id} is not running")
+        # Validate before logging so a bad report is never replayed
+        bracket = tournament.bracket
+        if match not in bracket.ready:
+            raise ValueError(f"Match {match} is not waiting for a result")
+        players = (
+            bracket.entrants[bracket.a[match]],
+            bracket.entrants[bracket.b[match]],
+        )
+        if winner not in players:
+            raise ValueError(f"That player is not in match {match}")
+        result = {
+            "op": "result",
+            "tournament": tournament_id,
+            "match": match,
+            "winner": winner,
+        }
+        if tournament.host is not None and reporter == tournament.host:
+            self._append(result)
+            return REPORTED
+        if reporter not in players:
+            raise ValueError(
+                f"Only the host or a player in match {match} can report its result"
+            )
+        opponent = players[1] if reporter == players[0] else players[0]
+        opponent_claim = tournament.claims.get(match, {}).get(opponent)
+        if opponent_claim == winner:
+            self._append(result)
+            return REPORTED
+        self._append(
+            {
+                "op": "claim",
+                "tournament": tournament_id,
+                "match": match,
+                "player": reporter,
+                "winner": winner,
+            }
+        )
+        return AWAITING_CONFIRMATION if opponent_claim is None else DISPUTED
+
+    def rename(self, old_tournament_id, new_tournament_id):
+        """Moves a tournament to a new ID, e.g. after an ID collision."""
+        if old_tournament_id in self.tournaments:
+            self._append(
+                {
+                    "op": "rename",
+                    "tournament": old_tournament_id,
+                    "to": new_tournament_id,
+                }
+            )
+
+    def drop(self, tournament_id):
+        if tournament_id in self.tournaments:
+            self._append({"op": "drop", "tournament": tournament_id})
@@ -1,23 +1,3 @@
-primer = f"""
-My only purpose is to categorise user input into 5 categories. 
-First category is for Tournaments. If I think given text can be classified as a tournament, my response will be
-one word "tournament".
-Second category is for 1v1. If I think given text can be classified as a profile description of a 
-player looking for a 1v1 match, my response will be one word: "1v1".
-Third category is for showing list of active 1v1 rounds. If I think given text can be classified as a 
-request to show list of user 1v1 posts or active tournaments or player profile descriptions, my response will be one 
-word: "list". This also applies if given text is user saying he wants to see something or asks what you have or if 
-you have. Fourth category is for deleting previously submitted post by user. If I think given text can be classified 
-as a request for deletion of user post, my response will be one word: "delete". 
-Fifth category is for unidentified. If I think given text can't be classified as neither of previous 2 categories, 
-my response will be one word: "unidentified".
-I only respond with one of following phrases: "tournament", "1v1", "list", "delete", "unidentified".
-
-GIVEN TEXT:
-"""
-
-primer_messages = [{"role": "system", "content": primer}]
-
 tournament_primer = f"""
 I am thankful discord chatbot. I thank in 1 or 2 sentences to a player submitting his profile details
 to our community chat. I politely tell him to take a look at active and upcoming tournaments listed below. I can also
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+JOIN_WORKERS = int(os.getenv("JOIN_WORKERS", "16"))
+JOIN_MAX_RETRIES = int(os.getenv("JOIN_MAX_RETRIES", "3"))
+JOIN_RETRY_BACKOFF = float(os.getenv("JOIN_RETRY_BACKOFF", "1"))
+
+
+class JoinJob:
+    """One accepted join; `channel` is kept across retries so it is created once."""
+
+    __slots__ = ("tournament_id", "user", "guild", "interaction", "channel")
+
+    def __init__(self, tournament_id, user, guild, interaction):
+        self.tournament_id = tournament_id
+        self.user = user
+        self.guild = guild
+        self.interaction = interaction
+        self.channel = None
+
+
+class JoinProgress:
+    __slots__ = ("submitted", "done", "failed", "started", "updated")
+
+    def __init__(self):
+        self.submitted = 0
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.updated = self.started
+
+    @property
+    def pending(self):
+        return self.submitted - self.done - self.failed
+
+    def eta(self):
+        """Seconds until the queue drains at the rate seen so far, or None."""
+        elapsed = self.updated - self.started
+        if not self.done or elapsed <= 0:
+            return None
+        return self.pending / (self.done / elapsed)
+
+
+class JoinPipeline:
+    """
+    Admission queue for tournament joins. The button callback records the entrant,
+    answers the interaction right away and submits a JoinJob; a bounded pool of
+    workers then runs `handler(job)` (channel, database row, messages) paced by
+    the shared outbound RouteBuckets, retrying failures with exponential backoff.
+
+    A user is queued at most once per tournament at a time. Joins that still fail after
+    `max_retries` are reported to `on_failure(job, error)` and counted in `failed`.
+    The queue lives in memory: the handler records each set-up channel in the
+    BracketStore, and the button resubmits joins that have none, so a join that
+    failed or was lost in a restart is retried when the user clicks again.
+
+    Usage:
+        pipeline = JoinPipeline(process_join, on_failure=notify_join_failed)
+        pipeline.start()
+        position = pipeline.submit(JoinJob(tournament_id, user, guild, interaction))
+    """
+
+    def __init__(
+        self,
+        handler,
+        on_failure=None,
+        workers=JOIN_WORKERS,
+        max_retries=JOIN_MAX_RETRIES,
+        backoff=JOIN_RETRY_BACKOFF,
+    ):
+        self.handler = handler
+        self.on_failure = on_failure
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.queue = asyncio.Queue()
+        self.in_flight = set()
+        self.failed = set()
+        # tournament_id -> JoinProgress
+        self.tournaments = {}
+        self._tasks = []
+
+    def submit(self, job):
+        """Queues `job`; returns the number of joins ahead of it, or None if it is a duplicate."""
+        key = (job.tournament_id, job.user.id)
+        if key in self.in_flight:
+            return None
+        self.in_flight.add(key)
+        self.failed.discard(key)
+        progress = self.tournaments.get(job.tournament_id)
+        if progress is None:
+            progress = self.tournaments[job.tournament_id] = JoinProgress()
+        progress.submitted += 1
+        self.queue.put_nowait(job)
+        return self.queue.qsize() - 1
+
+    def progress(self, tournament_id):
+        return self.tournaments.get(tournament_id)
+
+    async def _run_job(self, job):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                await self.handler(job)
+                return None
+            except Exception as e:
+                if attempt == self.max_retries:
+                    return e
+                logger.warning(
+                    f"Join of {job.user.id} to tournament {job.tournament_id} "
+                    f"failed (attempt {attempt}): {e!r}"
+                )
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+    async def _work(self):
+        while True:
+            job = await self.queue.get()
+            key = (job.tournament_id, job.user.id)
+            progress = self.tournaments[job.tournament_id]
+            error = await self._run_job(job)
+            if error is None:
+                progress.done += 1
+            else:
+                progress.failed += 1
+                self.failed.add(key)
+                logger.error(
+                    f"Join of {job.user.id} to tournament {job.tournament_id} "
+                    f"failed: {error!r}"
+                )
+                if self.on_failure is not None:
+                    try:
+                        await self.on_failure(job, error)
+                    except Exception as e:
+                        logger.error(f"Failed to report a failed join: {e!r}")
+            progress.updated = time.monotonic()
+            self.in_flight.discard(key)
+            self.queue.task_done()
+
+    def start(self):
+        """Starts the workers once; safe to call from every on_ready."""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._work()) for _ in range(self.workers)
+            ]
+        return self._tasks
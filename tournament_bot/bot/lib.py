@@ -1,105 +1,203 @@
-import json
+import asyncio
+import logging
 import os
-from web3 import Web3
-from supabase import create_client, Client
-
-# Initialize Supabase client
-
-
-def initialize_supabase():
-    SUPABASE_URL = os.getenv("SUPABASE_URL", "https://bqrkkxsfkpxyxflsqtlo.supabase.co")
-    SUPABASE_KEY = os.getenv("SUPABASE_KEY", "your-supabase-key")
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-    return supabase
+from bot_common.services import (
+    configure_repository,
+    get_contract_client,
+    get_indexer,
+    get_supabase_repository,
+    get_supabase_write_queue,
+)
 
+logger = logging.getLogger(__name__)
 
-# Web3 configuration
-WEB3_PROVIDER = os.getenv("WEB3_PROVIDER", "https://sepolia.base.org")
-CONTRACT_ADDRESS = os.getenv(
-    "CONTRACT_ADDRESS", "0xA4dd8C402331721f7912AFA26793e00bBA3458B7"
+# TOURNAMENT_SUPABASE_* tell this bot's project apart when it shares a process and an
+# environment with the 1v1 bot (combined_bot)
+SUPABASE_URL = os.getenv(
+    "TOURNAMENT_SUPABASE_URL",
+    os.getenv("SUPABASE_URL", "https://bqrkkxsfkpxyxflsqtlo.supabase.co"),
+)
+SUPABASE_KEY = os.getenv(
+    "TOURNAMENT_SUPABASE_KEY", os.getenv("SUPABASE_KEY", "your-supabase-key")
 )
-CONTRACT_ABI_PATH = os.getenv("CONTRACT_ABI_PATH", "contractABI.json")
 
-# Initialize web3
-web3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER))
+configure_repository(SUPABASE_URL, SUPABASE_KEY)
 
-# Load contract ABI
 
+def get_repository():
+    """This bot's Supabase repository."""
+    return get_supabase_repository(SUPABASE_URL, SUPABASE_KEY)
 
-def load_contract_abi():
-    with open(CONTRACT_ABI_PATH, "r") as abi_file:
-        contract_abi = json.load(abi_file)
-    return contract_abi
 
+def get_write_queue():
+    """The write-behind queue of this bot's Supabase project."""
+    return get_supabase_write_queue(SUPABASE_URL, SUPABASE_KEY)
 
-contract_abi = load_contract_abi()
-contract = web3.eth.contract(address=CONTRACT_ADDRESS, abi=contract_abi)
 
-# Function to get the next match ID
+# Chain reads run off the event loop, bounded by these limits
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "10"))
+RPC_RETRIES = int(os.getenv("RPC_RETRIES", "3"))
+RPC_RETRY_BACKOFF = float(os.getenv("RPC_RETRY_BACKOFF", "0.5"))
 
 
+# Function to get the next tournament ID
 def get_next_tournament_id():
-    if web3.is_connected():
+    try:
+        next_tournament_id = get_contract_client().call("nextTournamentId")
+        logger.info(f"Next tournament ID: {next_tournament_id}")
+        return next_tournament_id
+    except Exception as e:
+        return f"Contract logic error: {e}"
+
+
+async def call_contract_async(
+    func, *args, timeout=RPC_TIMEOUT, retries=RPC_RETRIES, backoff=RPC_RETRY_BACKOFF
+):
+    """
+    Runs a blocking contract read in a worker thread so the Discord event loop never
+    waits on chain I/O. Each attempt is bounded by `timeout` seconds and retried up to
+    `retries` times with exponential backoff. Returns None if every attempt fails.
+    """
+    for attempt in range(1, retries + 1):
         try:
-            next_tournament_id = contract.functions.nextTournamentId().call()
-            print(f"Next tournament ID: {next_tournament_id}")
-            return next_tournament_id
+            result = await asyncio.wait_for(asyncio.to_thread(func, *args), timeout)
+            if not isinstance(result, str):
+                return result
+            logger.warning(f"{func.__name__} attempt {attempt} failed: {result}")
+        except asyncio.TimeoutError:
+            logger.warning(f"{func.__name__} attempt {attempt} timed out")
         except Exception as e:
-            return f"Contract logic error: {e}"
-    else:
-        return "Failed to connect to the network"
+            logger.warning(f"{func.__name__} attempt {attempt} raised: {e}")
+        if attempt < retries:
+            await asyncio.sleep(backoff * 2 ** (attempt - 1))
+    return None
+
+
+async def fetch_next_tournament_id():
+    return await call_contract_async(get_next_tournament_id)
+
+
+def get_head_block_number():
+    return get_contract_client().web3.eth.block_number
+
+
+async def fetch_head_block():
+    return await call_contract_async(get_head_block_number)
+
+
+def get_tournaments(tournament_ids, block_identifier=None):
+    """Reads tournaments(id) for many tournaments in batched round trips, keyed by ID."""
+    results = get_contract_client().batch_call(
+        [("tournaments", (tournament_id,)) for tournament_id in tournament_ids],
+        block_identifier,
+    )
+    return dict(zip(tournament_ids, results))
+
+
+def get_tournament_state(tournament_id, block_identifier=None):
+    """
+    Reads a tournament, its round, the matching pool, every entrant and every entrant's
+    winnings, all pinned to one block. A 256-entrant tournament takes a handful of
+    batched round trips instead of several hundred single calls.
+    """
+    client = get_contract_client()
+    if block_identifier is None:
+        block_identifier = client.web3.eth.block_number
+    tournament, current_round, matching_pool = client.batch_call(
+        [
+            ("tournaments", (tournament_id,)),
+            ("currentTournamentRound", (tournament_id,)),
+            ("matchingPool", ()),
+        ],
+        block_identifier,
+    )
+    if tournament is None:
+        return None
+    entrants = client.batch_call(
+        [
+            ("tournamentEntrants", (tournament_id, i))
+            for i in range(tournament["numEntrants"])
+        ],
+        block_identifier,
+    )
+    # Slots past the number of joined entrants revert
+    entrants = [entrant for entrant in entrants if entrant is not None]
+    winnings = client.batch_call(
+        [("tournamentWinners", (tournament_id, entrant)) for entrant in entrants],
+        block_identifier,
+    )
+    return {
+        "tournament": tournament,
+        "current_round": current_round,
+        "matching_pool": matching_pool,
+        "entrants": entrants,
+        "winnings": dict(zip(entrants, winnings)),
+        "block_number": block_identifier,
+    }
+
+
+async def fetch_tournament_state(tournament_id):
+    return await call_contract_async(get_tournament_state, tournament_id)
+
+
+async def fetch_tournament_created_events(from_block):
+    # Served from the local event store rather than eth_getLogs
+    return get_indexer().store.event_ids(
+        "TournamentCreated", "tournamentId", from_block
+    )
 
 
 # Function to insert tournament data
-def insert_tournament_data(supabase, tournament_id, data):
-    response = (
-        supabase.from_("tournaments")
-        .insert(
-            {
-                "id": tournament_id,
-                "num_entrants": data["num_entrants"],
-                "winners_percentage": 0,
-                "multisig_percentage": 0,
-                "status": "open",
-            }
-        )
-        .execute()
+async def insert_tournament_data(write_queue, tournament_id, data):
+    return await write_queue.write(
+        "tournaments",
+        {
+            "id": tournament_id,
+            "num_entrants": data["num_entrants"],
+            "winners_percentage": 0,
+            "multisig_percentage": 0,
+            "status": "open",
+        },
+        wait=True,
     )
-    return response
 
 
 # Function to insert entrant data
-def insert_entrant_data(supabase, tournament_id, user_id):
-    response = (
-        supabase.from_("tournament_entrants")
-        .insert({"tournament_id": tournament_id, "user_id": user_id})
-        .execute()
+async def insert_entrant_data(write_queue, tournament_id, user_id):
+    return await write_queue.write(
+        "tournament_entrants",
+        {"tournament_id": tournament_id, "user_id": user_id},
+        wait=True,
     )
-    return response
 
 
 # Function to update tournament status
-def update_tournament_status(supabase, tournament_id, status):
-    response = (
-        supabase.from_("tournaments")
-        .update({"status": status})
-        .eq("id", tournament_id)
-        .execute()
-    )
-    return response
-
-
-def insert_tournament_channel(supabase, tournament_id, channel_id):
-    response = (
-        supabase.table("tournament_channels")
-        .insert(
-            {
-                "tournament_id": tournament_id,
-                "channel_id": str(
-                    channel_id
-                ),  # Ensure channel_id is stored as a string
-            }
+def update_tournament_status(write_queue, tournament_id, status):
+    write_queue.update("tournaments", {"id": tournament_id, "status": status})
+
+
+async def update_tournament_channel_ids(
+    repository, old_tournament_id, new_tournament_id
+):
+    try:
+        return await repository.update(
+            "tournament_channels",
+            {"tournament_id": new_tournament_id},
+            "tournament_id",
+            old_tournament_id,
         )
-        .execute()
+    except Exception as e:
+        logger.error(
+            f"Exception when moving the channels of tournament {old_tournament_id}: {str(e)}"
+        )
+        return None
+
+
+def insert_tournament_channel(write_queue, tournament_id, channel_id):
+    write_queue.write(
+        "tournament_channels",
+        {
+            "tournament_id": tournament_id,
+            "channel_id": str(channel_id),  # Ensure channel_id is stored as a string
+        },
     )
-    return response
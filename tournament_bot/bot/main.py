@@ -1,37 +1,127 @@
+import asyncio
 import os
+import sys
+from dotenv import load_dotenv
+
+# bot_common, the package both bots share, lives at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Load environment variables before the bot modules read their settings on import
+load_dotenv()
+
+from bot_common import startup_profile
+
+startup_profile.install()
+
 import discord
-from discord.ext import commands
 from discord.commands import Option
-from dotenv import load_dotenv
 import logging
 from lib import (
-    initialize_supabase,
-    get_next_tournament_id,
+    get_repository,
+    get_write_queue,
+    fetch_next_tournament_id,
+    fetch_head_block,
+    fetch_tournament_created_events,
     # insert_tournament_data,
     # update_tournament_status,
     # insert_entrant_data,
     insert_tournament_channel,
+    update_tournament_channel_ids,
 )
+from bot_common.services import (
+    get_channel_pool,
+    get_intent_router,
+    get_leaderboard,
+    get_metrics,
+    get_outbox,
+    get_view_router,
+    start_services,
+)
+from bot_common.id_allocator import IdAllocator, shared_id_counter
+from join_pipeline import JoinJob, JoinPipeline
+from bot_common.outbound import CHANNEL_ROUTE
+from bracket import (
+    ALREADY_JOINED,
+    AWAITING_CONFIRMATION,
+    CLOSED,
+    DISPUTED,
+    FORMATS,
+    FULL,
+    JOINED,
+    SINGLE_ELIMINATION,
+    SWISS,
+    BracketStore,
+)
+from bot_common.leaderboard import ALL, PLAYER, TOTAL, describe
+from bot_common.sharding import create_bot
+from config_strings import unidentified_prompt_message
 
-get_next_tournament_id()
-
-# Load environment variables
-load_dotenv()
 TOKEN = os.getenv("TOURNAMENT_GPT_TOKEN")
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("tournament_bot")
 
-# Initialize Supabase
-supabase = initialize_supabase()
+# Supabase and chain clients are built lazily and warmed up in on_ready
+channel_pool = get_channel_pool()
+metrics = get_metrics()
+leaderboard = get_leaderboard()
+outbox = get_outbox()
+intent_router = get_intent_router()
+bracket_store = BracketStore()
 
 # Initialize Discord Bot
 intents = discord.Intents.default()
 intents.messages = True
 intents.guilds = True
 intents.message_content = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Set by setup(), standalone or in a combined runtime
+bot = None
+
+
+async def repair_tournament_id(old_tournament_id, new_tournament_id, channel_id):
+    await bracket_store.ready()
+    bracket_store.rename(old_tournament_id, new_tournament_id)
+    old_custom_id = f"{JOIN_TOURNAMENT_PREFIX}{old_tournament_id}"
+    if view_router.snapshot.get(old_custom_id) is not None:
+        button = AcceptButton(new_tournament_id)
+        await view_router.replace_view(old_custom_id, button, button.state())
+    # Channel rows still queued under the old ID go first, then they are moved
+    await get_write_queue().flush()
+    await update_tournament_channel_ids(
+        get_repository(), old_tournament_id, new_tournament_id
+    )
+    channel = bot.get_channel(channel_id)
+    if channel is not None:
+        outbox.send(
+            channel,
+            f"Tournament ID {old_tournament_id} was already taken on chain. "
+            f"This tournament now uses ID: {new_tournament_id}",
+        )
+
+
+tournament_allocator = IdAllocator(
+    "tournament",
+    fetch_next_tournament_id,
+    fetch_tournament_created_events,
+    on_collision=repair_tournament_id,
+    state_path=os.getenv("TOURNAMENT_ID_STATE_PATH", "tournament_id_allocator.json"),
+    counter=shared_id_counter("tournament"),
+    read_head_block=fetch_head_block,
+)
+
+
+JOIN_TOURNAMENT_PREFIX = "join_tournament_"
+JOIN_REFUSALS = {
+    ALREADY_JOINED: "You have already joined this tournament.",
+    FULL: "This tournament is full.",
+    CLOSED: "This tournament is no longer taking entrants.",
+}
+# Discord messages are capped at 2000 characters
+MAX_LISTED_MATCHES = 20
+MAX_LISTED_TOURNAMENTS = 20
 
 
 class AcceptButton(discord.ui.Button):
@@ -39,42 +129,100 @@ class AcceptButton(discord.ui.Button):
         super().__init__(
             label="Join Tournament",
             style=discord.ButtonStyle.green,
-            custom_id=f"join_tournament_{tournament_id}",
+            custom_id=f"{JOIN_TOURNAMENT_PREFIX}{tournament_id}",
         )
         self.tournament_id = tournament_id
 
+    @classmethod
+    def from_state(cls, tournament_id, state):
+        return cls(state["tournament_id"])
+
+    def state(self):
+        return {"tournament_id": self.tournament_id}
+
     async def callback(self, interaction: discord.Interaction):
-        user = interaction.user
-        # response = insert_entrant_data(supabase, self.tournament_id, user.id)
-        response = True
-        if response:
+        with metrics.flow("join_tournament"):
+            user = interaction.user
+            # response = await insert_entrant_data(get_write_queue(), self.tournament_id, user.id)
+            await bracket_store.ready()
+            if bracket_store.needs_channel(self.tournament_id, user.id):
+                # Their channel was never set up: the join failed, or was still
+                # queued when the bot restarted. Try again.
+                response = JOINED
+            else:
+                response = bracket_store.join(self.tournament_id, user.id)
+            if response != JOINED:
+                metrics.error("join_tournament", response)
+                await interaction.response.send_message(
+                    JOIN_REFUSALS[response], ephemeral=True
+                )
+                return
+            # Answer within the interaction deadline; the channel is set up in the queue
+            ahead = join_pipeline.submit(
+                JoinJob(self.tournament_id, user, interaction.guild, interaction)
+            )
+            with metrics.stage("send"):
+                await interaction.response.send_message(
+                    "You're in! Your private channel is being set up"
+                    + (f" ({ahead} joins ahead of you)." if ahead else "."),
+                    ephemeral=True,
+                )
+
+
+async def process_join(job):
+    with metrics.flow("join_pipeline"):
+        user = job.user
+        if job.channel is None:
             # Create a private channel for the user
             overwrites = {
-                interaction.guild.default_role: discord.PermissionOverwrite(
+                job.guild.default_role: discord.PermissionOverwrite(
                     read_messages=False
                 ),
                 user: discord.PermissionOverwrite(read_messages=True),
             }
-            channel = await interaction.guild.create_text_channel(
-                name=f"private-{user.name}", overwrites=overwrites
-            )
+            with metrics.stage("channel"):
+                await join_buckets.acquire(CHANNEL_ROUTE, job.guild.id)
+                job.channel = await channel_pool.acquire(
+                    job.guild, f"private-{user.name}", overwrites
+                )
             # Insert the channel and tournament ID into the new table
-            insert_tournament_channel(supabase, self.tournament_id, channel.id)
+            # The tournament may have moved to a new ID since the join was queued
+            tournament_id = bracket_store.resolve(job.tournament_id)
+            insert_tournament_channel(get_write_queue(), tournament_id, job.channel.id)
+            bracket_store.channel_ready(tournament_id, user.id)
 
-            demo_link = "https://tournament-bot.vercel.app/"  # Put your external website link here
-            await channel.send(
-                f"Welcome to your private tournament channel! Here is a demo link: {demo_link}"
-            )
-            await interaction.response.send_message(
-                f"Private channel created! {channel.mention}", ephemeral=True
-            )
-        else:
-            await interaction.response.send_message(
-                "Failed to join the tournament. Please try again.", ephemeral=True
+        demo_link = (
+            "https://tournament-bot.vercel.app/"  # Put your external website link here
+        )
+        # Paced by the channel's message bucket without holding up this worker
+        outbox.send(
+            job.channel,
+            f"Welcome to your private tournament channel! Here is a demo link: {demo_link}",
+        )
+        with metrics.stage("send"):
+            await job.interaction.followup.send(
+                f"Private channel created! {job.channel.mention}", ephemeral=True
             )
 
 
-@bot.slash_command(name="create_tournament", description="Create a new tournament.")
+async def notify_join_failed(job, error):
+    await job.interaction.followup.send(
+        "We couldn't set up your private channel. Please click Join again.",
+        ephemeral=True,
+    )
+
+
+# Channel creation shares the outbox's global bucket
+join_buckets = outbox.buckets
+join_pipeline = JoinPipeline(process_join, on_failure=notify_join_failed)
+
+
+# Join buttons survive restarts: their state is kept in the view snapshot
+view_router = get_view_router()
+view_router.register(JOIN_TOURNAMENT_PREFIX, AcceptButton.from_state)
+
+
+@discord.slash_command(name="create_tournament", description="Create a new tournament.")
 async def create_tournament(
     ctx,
     platform: Option(str, "Choose the platform (e.g., PC, PS5, Xbox)", required=True),
@@ -83,49 +231,188 @@ async def create_tournament(
     ),
     game: Option(str, "Enter the game name", required=True),
     num_entrants: Option(int, "Enter the number of entrants", required=True),
+    bracket_format: Option(
+        str,
+        "Choose the bracket format",
+        name="format",
+        choices=list(FORMATS),
+        required=False,
+    ) = SINGLE_ELIMINATION,
 ):
-    tournament_id = get_next_tournament_id()
-    tournament_data = {
-        "platform": platform,
-        "category": category,
-        "game": game,
-        "num_entrants": num_entrants,
-    }
-
-    # response = insert_tournament_data(supabase, tournament_id, tournament_data)
-    response = True
-    if response:
-        view = discord.ui.View()
-        join_button = AcceptButton(tournament_id)
-        view.add_item(join_button)
-        await ctx.respond(
-            f"Tournament created with ID: {tournament_id}. Click to join!", view=view
+    with metrics.flow("create_tournament"):
+        with metrics.stage("defer"):
+            await ctx.defer()
+
+        with metrics.stage("tournament_id"):
+            tournament_id = await tournament_allocator.reserve(owner=ctx.channel.id)
+        if tournament_id is None:
+            metrics.error("create_tournament", "tournament_id")
+            await ctx.respond(
+                "Failed to get the tournament ID. Please try again later."
+            )
+            return
+
+        tournament_data = {
+            "platform": platform,
+            "category": category,
+            "game": game,
+            "num_entrants": num_entrants,
+        }
+
+        # response = await insert_tournament_data(get_write_queue(), tournament_id, tournament_data)
+        await bracket_store.ready()
+        bracket_store.create(
+            tournament_id, bracket_format, num_entrants, host=ctx.author.id
         )
-    else:
-        await ctx.respond("Failed to create tournament. Please try again.")
+        response = True
+        if response:
+            join_button = AcceptButton(tournament_id)
+            with metrics.stage("send"):
+                await view_router.send_view(
+                    ctx.respond,
+                    join_button,
+                    join_button.state(),
+                    content=f"Tournament created with ID: {tournament_id}. Click to join!",
+                )
+        else:
+            metrics.error("create_tournament", "db_insert")
+            await ctx.respond("Failed to create tournament. Please try again.")
+
+
+def may_manage(ctx, tournament_id):
+    """True for the tournament's host and for members who can manage the server."""
+    permissions = getattr(ctx.author, "guild_permissions", None)
+    return bracket_store.is_host(tournament_id, ctx.author.id) or bool(
+        permissions is not None and permissions.manage_guild
+    )
+
+
+def describe_matches(bracket, matches):
+    lines = [
+        f"Match {match} ({bracket.round_label(match)}): <@{a}> vs <@{b}>"
+        for match, a, b in matches[:MAX_LISTED_MATCHES]
+    ]
+    if len(matches) > MAX_LISTED_MATCHES:
+        lines.append(f"...and {len(matches) - MAX_LISTED_MATCHES} more matches.")
+    return "\n".join(lines)
 
 
-@bot.slash_command(name="start_tournament", description="Start an existing tournament.")
+@discord.slash_command(
+    name="start_tournament", description="Start an existing tournament."
+)
 async def start_tournament(
     ctx, tournament_id: Option(int, "Enter the tournament ID", required=True)
 ):
-    # response = update_tournament_status(supabase, tournament_id, "in-progress")
-    response = {"status_code": 200}
-    if response["status_code"] == 200:
-        await ctx.respond(f"Tournament {tournament_id} has started!")
-    else:
+    with metrics.flow("start_tournament"):
+        await bracket_store.ready()
+        if not may_manage(ctx, tournament_id):
+            metrics.error("start_tournament", "not_host")
+            await ctx.respond(
+                "Only the tournament host or a server manager can start it.",
+                ephemeral=True,
+            )
+            return
+        # response = update_tournament_status(get_write_queue(), tournament_id, "in-progress")
+        try:
+            with metrics.stage("bracket"):
+                bracket = bracket_store.start_bracket(tournament_id)
+        except ValueError as e:
+            metrics.error("start_tournament", "bracket")
+            await ctx.respond(f"Failed to start tournament: {e}")
+            return
         await ctx.respond(
-            "Failed to start tournament. Please check the tournament ID and try again."
+            f"Tournament {tournament_id} has started with {len(bracket.entrants)} "
+            f"entrants ({bracket.format.replace('_', ' ')})!\n"
+            + describe_matches(bracket, bracket.ready_matches())
         )
 
 
-@bot.slash_command(name="end_tournament", description="End an existing tournament.")
+@discord.slash_command(
+    name="report_result", description="Report the winner of a match."
+)
+async def report_result(
+    ctx,
+    tournament_id: Option(int, "Enter the tournament ID", required=True),
+    match_id: Option(int, "Enter the match number", required=True),
+    winner: Option(discord.Member, "Choose the winner", required=True),
+):
+    with metrics.flow("report_result"):
+        await bracket_store.ready()
+        try:
+            with metrics.stage("bracket"):
+                outcome = bracket_store.report(
+                    tournament_id, match_id, winner.id, ctx.author.id
+                )
+        except ValueError as e:
+            metrics.error("report_result", "bracket")
+            await ctx.respond(f"Failed to report the result: {e}", ephemeral=True)
+            return
+        if outcome == AWAITING_CONFIRMATION:
+            await ctx.respond(
+                f"Result for match {match_id} noted. It is recorded once your opponent "
+                f"reports {winner.mention} as the winner too, or the host reports it."
+            )
+            return
+        if outcome == DISPUTED:
+            metrics.error("report_result", "disputed")
+            await ctx.respond(
+                f"You and your opponent reported different winners for match "
+                f"{match_id}. The tournament host has to report the result."
+            )
+            return
+        bracket = bracket_store.get(tournament_id).bracket
+        if bracket.finished:
+            await ctx.respond(
+                f"Tournament {tournament_id} is complete! "
+                f"The champion is <@{bracket.champion}>."
+            )
+            return
+        next_matches = [m for m in bracket.ready_matches() if winner.id in m[1:]]
+        if bracket.format == SWISS and not next_matches:
+            await ctx.respond(f"Result recorded for match {match_id}.")
+            return
+        await ctx.respond(
+            f"Result recorded for match {match_id}.\n"
+            + (
+                describe_matches(bracket, next_matches)
+                or f"{winner.mention} is waiting for their next opponent."
+            )
+        )
+
+
+@discord.slash_command(
+    name="join_status", description="Show how far tournament sign-ups have got."
+)
+async def join_status(
+    ctx, tournament_id: Option(int, "Enter the tournament ID", required=True)
+):
+    progress = join_pipeline.progress(tournament_id)
+    if progress is None:
+        await ctx.respond(f"No joins have been queued for tournament {tournament_id}.")
+        return
+    eta = progress.eta()
+    await ctx.respond(
+        f"Tournament {tournament_id} sign-ups: {progress.done} set up, "
+        f"{progress.pending} in the queue, {progress.failed} failed"
+        + (f", about {eta:.0f}s to go." if progress.pending and eta else ".")
+    )
+
+
+@discord.slash_command(name="end_tournament", description="End an existing tournament.")
 async def end_tournament(
     ctx, tournament_id: Option(int, "Enter the tournament ID", required=True)
 ):
-    # response = update_tournament_status(supabase, tournament_id, "closed")
+    await bracket_store.ready()
+    if not may_manage(ctx, tournament_id):
+        await ctx.respond(
+            "Only the tournament host or a server manager can end it.", ephemeral=True
+        )
+        return
+    # response = update_tournament_status(get_write_queue(), tournament_id, "closed")
     response = {"status_code": 200}
     if response["status_code"] == 200:
+        view_router.forget(f"{JOIN_TOURNAMENT_PREFIX}{tournament_id}")
+        bracket_store.drop(tournament_id)
         await ctx.respond(f"Tournament {tournament_id} has ended!")
     else:
         await ctx.respond(
@@ -133,12 +420,83 @@ async def end_tournament(
         )
 
 
-@bot.event
+@discord.slash_command(
+    name="tournament_leaderboard", description="Show the top tournament winners."
+)
+async def tournament_leaderboard(ctx):
+    entries = leaderboard.top(PLAYER, "tournament_wins", 10)
+    if not entries:
+        await ctx.respond("No tournament has ended yet.", ephemeral=True)
+        return
+    tournaments = leaderboard.stats(TOTAL, ALL).get("tournaments", 0)
+    await ctx.respond(
+        f"Tournament wins ({tournaments} tournaments ended):\n"
+        + describe(PLAYER, "tournament_wins", entries),
+        ephemeral=True,
+    )
+
+
+async def answer_tournament(message):
+    return (
+        "To enter a tournament, press Join on its announcement. "
+        "To host one, use /create_tournament."
+    )
+
+
+async def answer_list(message):
+    await bracket_store.ready()
+    lines = [
+        f"Tournament {tournament_id}: {tournament.format}, "
+        f"{len(tournament.entrants)}/{tournament.capacity} entrants"
+        for tournament_id, tournament in bracket_store.tournaments.items()
+        if tournament.bracket is None
+    ]
+    if not lines:
+        return "No tournament is taking entrants right now."
+    return "Tournaments taking entrants:\n" + "\n".join(lines[-MAX_LISTED_TOURNAMENTS:])
+
+
 async def on_ready():
+    # Commands may queue writes while the warm-up runs: flush them from the start
+    get_write_queue().start()
+    await asyncio.gather(
+        startup_profile.timed("brackets", bracket_store.start()),
+        start_services(bot.guilds),
+    )
+    join_pipeline.start()
+    tournament_allocator.start()
+    startup_profile.report("warm-up finished")
     logger.info(
         f"Logged in as {bot.user}! Registered commands: {[cmd.name for cmd in bot.application_commands]}"
     )
 
 
+def setup(client):
+    """
+    Adds the tournament commands, button routing and warm-up to `client`. This is the
+    extension entry point: main.py runs it on its own bot, combined_bot/main.py on a
+    bot shared with the 1v1 commands.
+    """
+    global bot
+    bot = client
+    for command in (
+        create_tournament,
+        start_tournament,
+        report_result,
+        join_status,
+        end_tournament,
+        tournament_leaderboard,
+    ):
+        bot.add_application_command(command)
+    view_router.attach(bot)
+    intent_router.handle("tournament", answer_tournament)
+    intent_router.handle("list", answer_list)
+    intent_router.fallback = unidentified_prompt_message
+    intent_router.attach(bot)
+    bot.add_listener(on_ready)
+
+
 if __name__ == "__main__":
+    setup(create_bot(command_prefix="!", intents=intents))
+    startup_profile.report("ready to log in")
     bot.run(TOKEN)